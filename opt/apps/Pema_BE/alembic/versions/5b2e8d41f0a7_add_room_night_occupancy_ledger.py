@@ -0,0 +1,53 @@
+"""Add room_night_occupancy ledger
+
+Revision ID: 5b2e8d41f0a7
+Revises: 3c9cc395a411
+Create Date: 2026-10-18 09:00:00.000000
+
+Per-night units held by active bookings, backfilled from bookings.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b2e8d41f0a7'
+down_revision = '3c9cc395a411'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'room_night_occupancy',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('room_id', sa.Integer(), nullable=False),
+        sa.Column('night', sa.Date(), nullable=False),
+        sa.Column('units_held', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['room_id'], ['rooms.id'], name='fk_room_night_occupancy_room_id_rooms'),
+        sa.PrimaryKeyConstraint('id', name='pk_room_night_occupancy'),
+        sa.UniqueConstraint('room_id', 'night', name='uq_room_night_occupancy_room_id'),
+    )
+    op.create_index('ix_room_night_occupancy_id', 'room_night_occupancy', ['id'])
+    op.create_index('ix_room_night_occupancy_room_id', 'room_night_occupancy', ['room_id'])
+    op.create_index('ix_room_night_occupancy_night', 'room_night_occupancy', ['night'])
+
+    # Backfill from active bookings (same statuses as app.services.occupancy_ledger)
+    op.execute("""
+        INSERT INTO room_night_occupancy (room_id, night, units_held)
+        SELECT b.room_id, n.night::date, COUNT(*)
+        FROM bookings b
+        CROSS JOIN LATERAL generate_series(
+            b.check_in_date, b.check_out_date - 1, interval '1 day'
+        ) AS n(night)
+        WHERE b.status IN ('reserved', 'confirmed', 'checked_in', 'doctor_approved')
+        GROUP BY b.room_id, n.night::date
+    """)
+
+
+def downgrade():
+    op.drop_index('ix_room_night_occupancy_night', table_name='room_night_occupancy')
+    op.drop_index('ix_room_night_occupancy_room_id', table_name='room_night_occupancy')
+    op.drop_index('ix_room_night_occupancy_id', table_name='room_night_occupancy')
+    op.drop_table('room_night_occupancy')
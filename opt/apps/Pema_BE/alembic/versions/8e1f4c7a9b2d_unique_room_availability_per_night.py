@@ -0,0 +1,50 @@
+"""Unique room_availability row per room code, date and rate plan
+
+Revision ID: 8e1f4c7a9b2d
+Revises: 5b2e8d41f0a7
+Create Date: 2026-10-18 12:00:00.000000
+
+Lets IDS inventory pushes upsert with INSERT ... ON CONFLICT. Duplicate rows left by the
+old select-then-insert path are collapsed to the most recently written one first. A missing
+rate plan is stored as '' (NULLs never conflict), so legacy NULL rows are rewritten and the
+column becomes NOT NULL DEFAULT ''.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e1f4c7a9b2d'
+down_revision = '5b2e8d41f0a7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        DELETE FROM room_availability a
+        USING room_availability b
+        WHERE a.room_code = b.room_code
+          AND a.date = b.date
+          AND COALESCE(a.rate_plan_code, '') = COALESCE(b.rate_plan_code, '')
+          AND (a.updated_at, a.id) < (b.updated_at, b.id)
+    """)
+    op.execute("UPDATE room_availability SET rate_plan_code = '' WHERE rate_plan_code IS NULL")
+    op.alter_column(
+        'room_availability', 'rate_plan_code',
+        existing_type=sa.String(length=50), nullable=False, server_default='',
+    )
+    op.create_unique_constraint(
+        'uq_room_availability_room_code',
+        'room_availability',
+        ['room_code', 'date', 'rate_plan_code'],
+    )
+
+
+def downgrade():
+    op.drop_constraint('uq_room_availability_room_code', 'room_availability', type_='unique')
+    op.alter_column(
+        'room_availability', 'rate_plan_code',
+        existing_type=sa.String(length=50), nullable=True, server_default=None,
+    )
+    op.execute("UPDATE room_availability SET rate_plan_code = NULL WHERE rate_plan_code = ''")
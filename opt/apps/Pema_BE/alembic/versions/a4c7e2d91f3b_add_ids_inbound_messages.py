@@ -0,0 +1,44 @@
+"""Add ids_inbound_messages queue
+
+Revision ID: a4c7e2d91f3b
+Revises: 8e1f4c7a9b2d
+Create Date: 2026-10-18 14:00:00.000000
+
+Durable queue for IDS pushes acknowledged before processing (IDS_ASYNC_INGESTION).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4c7e2d91f3b'
+down_revision = '8e1f4c7a9b2d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'ids_inbound_messages',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('message_type', sa.String(length=30), nullable=False),
+        sa.Column('echo_token', sa.String(length=100), nullable=True),
+        sa.Column('partition_key', sa.String(length=50), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('received_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('available_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('processed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id', name='pk_ids_inbound_messages'),
+    )
+    op.create_index('ix_ids_inbound_messages_id', 'ids_inbound_messages', ['id'])
+    op.create_index('ix_ids_inbound_messages_claim', 'ids_inbound_messages', ['status', 'partition_key', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_ids_inbound_messages_claim', table_name='ids_inbound_messages')
+    op.drop_index('ix_ids_inbound_messages_id', table_name='ids_inbound_messages')
+    op.drop_table('ids_inbound_messages')
@@ -0,0 +1,43 @@
+"""Add outbox_messages
+
+Revision ID: c81d5e3a7f24
+Revises: a4c7e2d91f3b
+Create Date: 2026-10-18 16:00:00.000000
+
+Transactional outbox for IDS booking pushes and confirmation emails after payment.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c81d5e3a7f24'
+down_revision = 'a4c7e2d91f3b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'outbox_messages',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(length=30), nullable=False),
+        sa.Column('aggregate_key', sa.String(length=64), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('available_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('processed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id', name='pk_outbox_messages'),
+    )
+    op.create_index('ix_outbox_messages_id', 'outbox_messages', ['id'])
+    op.create_index('ix_outbox_messages_claim', 'outbox_messages', ['status', 'aggregate_key', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_outbox_messages_claim', table_name='outbox_messages')
+    op.drop_index('ix_outbox_messages_id', table_name='outbox_messages')
+    op.drop_table('outbox_messages')
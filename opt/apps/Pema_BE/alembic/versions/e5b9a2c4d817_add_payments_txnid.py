@@ -0,0 +1,43 @@
+"""Add payments.txnid with a unique index
+
+Revision ID: e5b9a2c4d817
+Revises: c81d5e3a7f24
+Create Date: 2026-10-18 17:00:00.000000
+
+PayU callbacks looked payments up by payment_order_id OR reference_number, neither of
+which is indexed. The txnid we send to PayU now lives in one indexed column, backfilled
+from payment_order_id (falling back to reference_number); where two rows share a value,
+only the oldest keeps it.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b9a2c4d817'
+down_revision = 'c81d5e3a7f24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('payments', sa.Column('txnid', sa.String(length=100), nullable=True))
+    op.execute("""
+        UPDATE payments p
+        SET txnid = s.txnid
+        FROM (
+            SELECT DISTINCT ON (COALESCE(payment_order_id, reference_number))
+                   id, COALESCE(payment_order_id, reference_number) AS txnid
+            FROM payments
+            WHERE COALESCE(payment_order_id, reference_number) IS NOT NULL
+              AND length(COALESCE(payment_order_id, reference_number)) <= 100
+            ORDER BY COALESCE(payment_order_id, reference_number), id
+        ) s
+        WHERE p.id = s.id
+    """)
+    op.create_index('ix_payments_txnid', 'payments', ['txnid'], unique=True)
+
+
+def downgrade():
+    op.drop_index('ix_payments_txnid', table_name='payments')
+    op.drop_column('payments', 'txnid')
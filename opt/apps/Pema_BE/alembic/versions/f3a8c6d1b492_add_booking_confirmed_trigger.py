@@ -0,0 +1,55 @@
+"""Add the booking_confirmed NOTIFY trigger
+
+Revision ID: f3a8c6d1b492
+Revises: e5b9a2c4d817
+Create Date: 2026-10-18 18:00:00.000000
+
+Same trigger as create_email_trigger.sql (which was applied by hand); the confirmation
+email dispatcher LISTENs on this channel, so it now ships with the schema.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a8c6d1b492'
+down_revision = 'e5b9a2c4d817'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notify_booking_confirmation() RETURNS TRIGGER AS $$
+        BEGIN
+            IF (TG_OP = 'INSERT' AND NEW.status = 'confirmed') OR
+               (TG_OP = 'UPDATE' AND NEW.status = 'confirmed' AND OLD.status != 'confirmed') THEN
+                PERFORM pg_notify('booking_confirmed',
+                    json_build_object(
+                        'booking_id', NEW.id,
+                        'confirmation_number', NEW.confirmation_number,
+                        'guest_email', NEW.guest_email,
+                        'guest_name', COALESCE(NEW.guest_first_name || ' ', '') || COALESCE(NEW.guest_last_name, ''),
+                        'total_amount', NEW.total_amount,
+                        'deposit_amount', NEW.deposit_amount,
+                        'check_in_date', NEW.check_in_date,
+                        'check_out_date', NEW.check_out_date,
+                        'room_id', NEW.room_id,
+                        'operation', TG_OP
+                    )::text
+                );
+            END IF;
+            RETURN COALESCE(NEW, OLD);
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("DROP TRIGGER IF EXISTS booking_confirmation_trigger ON bookings")
+    op.execute("""
+        CREATE TRIGGER booking_confirmation_trigger
+            AFTER INSERT OR UPDATE ON bookings
+            FOR EACH ROW EXECUTE FUNCTION notify_booking_confirmation()
+    """)
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS booking_confirmation_trigger ON bookings")
+    op.execute("DROP FUNCTION IF EXISTS notify_booking_confirmation()")
@@ -15,6 +15,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.core.config import settings
+from app.core.http_client import http_client_stats
+from app.core.smtp_pool import smtp_transport_stats
 from app.db.postgresql import get_db
 from app.models import Booking, Payment
 from app.schemas.booking import (
@@ -27,6 +29,15 @@ from app.schemas.payment import (
     AdminPaymentListPaginatedResponse,
     AdminPaymentDetailResponse,
 )
+from app.services.pricing_index import pricing_band_index
+from app.services.rate_calendar import rate_calendar
+from app.services.estimate_cache import estimate_cache
+from app.services.occupancy_ledger import OccupancyLedgerService
+from app.services.ids_push_queue import ids_push_queue
+from app.services.payment_outbox import payment_outbox, payu_webhook_latency
+from app.services.confirmation_emails import confirmation_email_dispatcher
+from app.services.payu_hash import payu_hash_verifier
+from app.services.room_codes import room_codes
 
 router = APIRouter()
 security = HTTPBearer(auto_error=False)
@@ -209,4 +220,109 @@ async def admin_get_payment(
     payment = result.scalar_one_or_none()
     if not payment:
         raise HTTPException(status_code=404, detail="Payment not found")
-    return AdminPaymentDetailResponse.model_validate(payment)
\ No newline at end of file
+    return AdminPaymentDetailResponse.model_validate(payment)
+
+
+@router.get("/pricing-index")
+async def admin_pricing_index_stats(_: str = Depends(require_admin)):
+    """Pricing band index version plus hit/miss/reload counters, and nightly rate calendar stats."""
+    return {**pricing_band_index.stats(), "rate_calendar": rate_calendar.stats()}
+
+
+@router.post("/pricing-index/reload")
+async def admin_reload_pricing_index(
+    _: str = Depends(require_admin),
+    db: AsyncSession = Depends(get_db),
+):
+    """Force a reload of the pricing band index (e.g. after editing pricing_bands by SQL)."""
+    await pricing_band_index.reload(db)
+    return pricing_band_index.stats()
+
+
+@router.get("/http-pool")
+async def admin_http_pool_stats(_: str = Depends(require_admin)):
+    """Shared outbound HTTP client pool utilization (IDS/PMS traffic)."""
+    return http_client_stats()
+
+
+@router.get("/smtp")
+async def admin_smtp_stats(_: str = Depends(require_admin)):
+    """Pooled SMTP sessions: send latency percentiles, failures, timeouts and reconnects."""
+    return smtp_transport_stats()
+
+
+@router.get("/ids-push-queue")
+async def admin_ids_push_queue_stats(_: str = Depends(require_admin)):
+    """Coalescing IDS push queue: pending updates and updates-to-messages compaction counters."""
+    return ids_push_queue.stats()
+
+
+@router.get("/outbox")
+async def admin_outbox_stats(
+    _: str = Depends(require_admin),
+    db: AsyncSession = Depends(get_db),
+):
+    """Payment outbox depth per kind/status, outbox lag and delivery counters."""
+    return await payment_outbox.stats(db)
+
+
+@router.get("/confirmation-emails")
+async def admin_confirmation_email_stats(_: str = Depends(require_admin)):
+    """Confirmation email dispatcher: LISTEN state, queue, sent/skipped/failed and queue-to-sent latency."""
+    return confirmation_email_dispatcher.stats()
+
+
+@router.get("/payu-webhook")
+async def admin_payu_webhook_stats(_: str = Depends(require_admin)):
+    """PayU webhook response-time percentiles and response hash verification counters."""
+    return {
+        "latency": payu_webhook_latency.stats(),
+        "hash_verification": payu_hash_verifier.stats(),
+    }
+
+
+@router.get("/room-codes")
+async def admin_room_codes(_: str = Depends(require_admin)):
+    """Room/rate code tables shared by the inbound and outbound IDS paths."""
+    return room_codes.snapshot()
+
+
+@router.post("/room-codes/reload")
+async def admin_reload_room_codes(_: str = Depends(require_admin)):
+    """Rebuild the code registry from the environment (e.g. after changing the IDS mappings)."""
+    room_codes.reload()
+    return room_codes.snapshot()
+
+
+@router.get("/estimate-cache")
+async def admin_estimate_cache_stats(_: str = Depends(require_admin)):
+    """Estimate cache hit/miss counters (shared across workers) and current generation."""
+    return await estimate_cache.stats()
+
+
+@router.post("/estimate-cache/invalidate")
+async def admin_invalidate_estimate_cache(_: str = Depends(require_admin)):
+    """Start a new estimate cache generation (e.g. after editing rooms by SQL)."""
+    await estimate_cache.invalidate()
+    return await estimate_cache.stats()
+
+
+@router.get("/occupancy-ledger/check")
+async def admin_check_occupancy_ledger(
+    limit: int = Query(100, ge=1, le=1000),
+    _: str = Depends(require_admin),
+    db: AsyncSession = Depends(get_db),
+):
+    """Compare the per-night occupancy ledger with active bookings."""
+    mismatches = await OccupancyLedgerService(db).find_inconsistencies()
+    return {"consistent": not mismatches, "mismatch_count": len(mismatches), "mismatches": mismatches[:limit]}
+
+
+@router.post("/occupancy-ledger/rebuild")
+async def admin_rebuild_occupancy_ledger(
+    _: str = Depends(require_admin),
+    db: AsyncSession = Depends(get_db),
+):
+    """Regenerate the per-night occupancy ledger from bookings."""
+    room_nights = await OccupancyLedgerService(db).rebuild()
+    return {"room_nights": room_nights}
@@ -0,0 +1,104 @@
+"""
+Availability API endpoints (no authentication required)
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date, timedelta
+from typing import Optional
+import logging
+
+from app.core.config import settings
+from app.db.postgresql import get_db
+from app.schemas.room import (
+    AvailabilityCalendarResponse,
+    CategoryAvailabilityCalendar,
+    FlexibleStayOption,
+    FlexibleStaySearchResponse,
+    NightAvailability,
+)
+from app.services.availability_calendar import AvailabilityCalendarService, MAX_CALENDAR_DAYS
+from app.services.booking import BookingService
+from app.services.pricing import PricingService
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+@router.get("/calendar", response_model=AvailabilityCalendarResponse)
+async def availability_calendar(
+    response: Response,
+    from_date: date = Query(..., alias="from", description="First night (inclusive)"),
+    to_date: date = Query(..., alias="to", description="Last night (exclusive)"),
+    category: Optional[str] = Query(None, description="Pricing category; all categories when omitted"),
+    db: AsyncSession = Depends(get_db),
+):
+    """Per-night available units for every pricing category over up to 12 months."""
+    if to_date <= from_date:
+        raise HTTPException(status_code=400, detail="to must be after from")
+    if (to_date - from_date).days > MAX_CALENDAR_DAYS:
+        raise HTTPException(status_code=400, detail=f"Calendar range is limited to {MAX_CALENDAR_DAYS} nights")
+
+    calendar = await AvailabilityCalendarService(db).calendar(from_date, to_date, category)
+    response.headers["Cache-Control"] = "public, max-age=60"
+    return AvailabilityCalendarResponse(
+        from_date=from_date,
+        to_date=to_date,
+        categories=[
+            CategoryAvailabilityCalendar(
+                category=name,
+                total_inventory=entry["total_inventory"],
+                nights=[
+                    NightAvailability(date=from_date + timedelta(days=i), available_units=units)
+                    for i, units in enumerate(entry["available"])
+                ],
+            )
+            for name, entry in calendar.items()
+        ],
+    )
+
+
+@router.get("/flexible", response_model=FlexibleStaySearchResponse)
+async def flexible_stay_search(
+    category: str = Query(..., description="Pricing category, e.g. Premium Garden"),
+    nights: int = Query(..., ge=settings.MINIMUM_STAY_NIGHTS, le=60),
+    adults: int = Query(2, ge=1, le=settings.MAX_ADULTS_PER_ROOM, description="Adults per room"),
+    children: int = Query(0, ge=0, le=settings.MAX_CHILDREN_PER_ROOM, description="Children per room"),
+    rooms: int = Query(1, ge=1, le=10),
+    horizon_days: int = Query(90, ge=1, le=MAX_CALENDAR_DAYS, description="Check-in dates searched from `from`"),
+    from_date: Optional[date] = Query(None, alias="from", description="Earliest check-in (default today)"),
+    sort: str = Query("price", pattern=r"^(price|earliest)$"),
+    limit: int = Query(5, ge=1, le=50),
+    db: AsyncSession = Depends(get_db),
+):
+    """Best check-in dates for an N-night stay in a category within the horizon.
+
+    Feasible dates come from a sliding-window minimum per room row, summed; each
+    is priced from the nightly rate calendar for the category's first room row.
+    """
+    from_date = from_date or date.today()
+    if from_date < date.today():
+        raise HTTPException(status_code=400, detail="from cannot be in the past")
+
+    room_rows = await BookingService(db).find_rooms_by_pricing_category(category)
+    if not room_rows:
+        raise HTTPException(status_code=404, detail=f"No rooms in category {category}")
+    room = min(room_rows, key=lambda r: r.id)
+
+    windows = await AvailabilityCalendarService(db).stay_windows(category, nights, from_date, horizon_days, rooms)
+    prices = await PricingService(db).price_check_ins(
+        room, nights, [check_in for check_in, _ in windows], adults, children
+    )
+    options = [
+        FlexibleStayOption(
+            check_in_date=check_in,
+            check_out_date=check_in + timedelta(days=nights),
+            available_units=units,
+            total_price=price * rooms,
+            per_night_average=price * rooms // nights,
+        )
+        for (check_in, units), price in zip(windows, prices)
+    ]
+    if sort == "price":
+        options.sort(key=lambda option: (option.total_price, option.check_in_date))
+    return FlexibleStaySearchResponse(category=category, nights=nights, options=options[:limit])
@@ -25,6 +25,7 @@ from app.schemas.booking import (
 from app.services.pricing import PricingService
 from app.services.booking import BookingService
 from app.services.email import EmailService
+from app.services.estimate_cache import estimate_cache
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -43,6 +44,14 @@ def _compute_adult_distribution(total_adults: int) -> list[int]:
     return distribution
 
 
+def _is_complimentary_category(category: Optional[str]) -> bool:
+    """Executive, suite and villa categories host the caregiver free of charge."""
+    if not category:
+        return False
+    cat_lower = category.lower()
+    return "executive" in cat_lower or "suite" in cat_lower or "villa" in cat_lower
+
+
 def _distribute_adults(total_adults: int, rooms_count: int, max_per_room: int) -> list[int]:
     """Distribute adults across rooms respecting capacities."""
     if total_adults > rooms_count * max_per_room:
@@ -95,11 +104,17 @@ async def estimate_booking(
     logger.info(f"Estimate request started: category={estimate_data.room_pricing_category}, dates={estimate_data.check_in_date} to {estimate_data.check_out_date}")
 
     try:
+        cached = await estimate_cache.get(estimate_data, db)
+        if cached is not None:
+            logger.info("Estimate served from cache")
+            return BookingEstimateResponse(**{**cached, "from_cache": True})
+
         # Add timeout to prevent hanging requests
         result = await asyncio.wait_for(
             _estimate_booking_internal(estimate_data, db),
             timeout=30.0  # 30 second timeout
         )
+        await estimate_cache.set(estimate_data, result.model_dump(mode="json"), db)
         return result
     except asyncio.TimeoutError:
         logger.error("Estimate request timed out after 30 seconds")
@@ -215,23 +230,30 @@ async def _estimate_booking_internal(
     single_rooms = occupancy_counts.get(1, 0)
     double_rooms = occupancy_counts.get(2, 0)
     
-    for adult_count, count_rooms in occupancy_counts.items():
-        if adult_count == 0: continue
-        
-        res = await pricing_service.calculate_price(
-            program_id=None,
-            room_id=room.id,
-            nights=nights,
-            adults=adult_count,
-            children=0,
-            check_in_date=estimate_data.check_in_date,
-            children_ages=[],
-            teens_13_18=0,
-            caregiver_required=False,
-            caregiver_stay_with_guest=False,
-            caregiver_meal=None
-        )
-        
+    caregiver_flag = estimate_data.caregiver_required or (occupancy.caregiver_required if occupancy else False)
+    category = getattr(room, 'pricing_category', None) or booking_service._infer_pricing_category(room)
+    caregiver_category = estimate_data.caregiver_room_pricing_category or category
+    caregiver_guest_pricing = (
+        caregiver_flag
+        and not estimate_data.caregiver_stay_with_guest
+        and not _is_complimentary_category(caregiver_category)
+        and caregiver_category not in settings.CAREGIVER_SEPARATE_ROOM_PRICES_INR
+    )
+    
+    # Price every occupancy line (plus the caregiver guest-pricing fallback) in one batch
+    occupancy_lines = [(adult_count, count_rooms) for adult_count, count_rooms in occupancy_counts.items() if adult_count != 0]
+    scenarios = [{"adults": adult_count} for adult_count, _ in occupancy_lines]
+    if caregiver_guest_pricing:
+        scenarios.append({"adults": 1})
+    priced = await pricing_service.calculate_prices_batch(
+        room_id=room.id,
+        nights=nights,
+        scenarios=scenarios,
+        check_in_date=estimate_data.check_in_date,
+        room=room
+    )
+    
+    for (adult_count, count_rooms), res in zip(occupancy_lines, priced):
         line_total = res["base_price"] * count_rooms
         base_total_rupees += line_total
         
@@ -274,18 +296,11 @@ async def _estimate_booking_internal(
         ))
     
     # Caregiver detailed lines (group-level)
-    caregiver_flag = estimate_data.caregiver_required or (occupancy.caregiver_required if occupancy else False)
     caregiver_total_rupees = 0
     if caregiver_flag:
         # Caregiver can share even with double occupancy
-        category = getattr(room, 'pricing_category', None) or booking_service._infer_pricing_category(room)
-
         # Check for complimentary categories (Executive, Suites, Pema Suite, Elemental Villa) - applies to both sharing and separate
-        is_complimentary = False
-        if category:
-            cat_lower = category.lower()
-            if "executive" in cat_lower or "suite" in cat_lower or "villa" in cat_lower:
-                is_complimentary = True
+        is_complimentary = _is_complimentary_category(category)
 
         if estimate_data.caregiver_stay_with_guest:
             if is_complimentary:
@@ -304,15 +319,8 @@ async def _estimate_booking_internal(
                     quantity=1
                 ))
         else:
-            # Use caregiver room category if provided, otherwise use guest room category
-            caregiver_category = estimate_data.caregiver_room_pricing_category or category
-
-            # Check if caregiver room category is complimentary
-            caregiver_is_complimentary = False
-            if caregiver_category:
-                cat_lower = caregiver_category.lower()
-                if "executive" in cat_lower or "suite" in cat_lower or "villa" in cat_lower:
-                    caregiver_is_complimentary = True
+            # Caregiver room category (if provided) was resolved above; otherwise the guest room category
+            caregiver_is_complimentary = _is_complimentary_category(caregiver_category)
 
             if caregiver_is_complimentary:
                  price_lines.append(PriceLine(
@@ -333,21 +341,8 @@ async def _estimate_booking_internal(
                         quantity=1
                     ))
                 else:
-                    # Guest pricing fallback: use single occupancy base
-                    # Calculate single occupancy price for the stay duration
-                    single_res = await pricing_service.calculate_price(
-                        program_id=None,
-                        room_id=room.id,
-                        nights=nights,
-                        adults=1,
-                        children=0,
-                        check_in_date=estimate_data.check_in_date,
-                        children_ages=[],
-                        teens_13_18=0,
-                        caregiver_required=False,
-                        caregiver_stay_with_guest=False,
-                        caregiver_meal=None
-                    )
+                    # Guest pricing fallback: single occupancy base, priced in the batch above
+                    single_res = priced[-1]
                     caregiver_guest_cost = single_res["base_price"]
                     caregiver_total_rupees += caregiver_guest_cost
                     price_lines.append(PriceLine(
@@ -5,17 +5,19 @@ IDS Next ARI Integration API endpoints
 from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from fastapi.responses import PlainTextResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Optional, Dict, Any
+from typing import Any, Dict, List, Optional, Union
 from datetime import date, datetime
 from pydantic import BaseModel, Field
 import logging
 import base64
 import defusedxml.ElementTree as ET
 from defusedxml.ElementTree import ParseError
-import httpx
 
 from app.db.postgresql import get_db, get_db_with_retry
-from app.services.ids import IDSService
+from app.services.ids import IDSService, ids_circuit_breakers
+from app.services.ids_singleflight import ids_availability_flight
+from app.services.room_type_catalogue import room_type_catalogue_stats
+from app.services.ids_push_queue import ids_push_queue
 from app.models.ids import (
     AvailabilityUpdate, AvailabilityQuery, AvailabilityResponse,
     RateUpdate, OTAHotelAvailNotifRS, OTAHotelRatePlanNotifRS,
@@ -27,13 +29,20 @@ from app.models.ids_booking import (
 )
 from app.core.exceptions import ValidationError
 from app.core.config import settings
+from app.core.http_client import get_http_client
 from app.services.ids_processing import IDSDataProcessor
+from app.services.ids_ingest import ids_ingest_queue, PROCESSOR_METHODS
+from app.services.ids_idempotency import ids_idempotency
+from app.services.ids_notification_parser import (
+    AVAILABILITY, BOOKING, INVENTORY, ROOM_TYPE_DELTA,
+    notification_parse_stats, parse_notification, read_root_attributes,
+)
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
-def parse_inventory_notification(xml_string: str):
+def parse_inventory_notification(xml_data: Union[bytes, str]) -> Dict[str, Any]:
     """
     Parse OTA_HotelInvCountNotifRQ XML into structured data
 
@@ -41,226 +50,27 @@ def parse_inventory_notification(xml_string: str):
         dict with keys: echo_token, hotel_code, inventories
         inventories: list of dicts with status_application_control and inv_count
     """
-    try:
-        # Parse XML
-        root = ET.fromstring(xml_string)
-
-        # Extract basic info
-        echo_token = root.get('EchoToken')
-        hotel_code = root.find('.//{http://www.opentravel.org/OTA/2003/05}Inventories').get('HotelCode') if root.find('.//{http://www.opentravel.org/OTA/2003/05}Inventories') is not None else None
-
-        inventories = []
-
-        # Parse each inventory item
-        for inventory_elem in root.findall('.//{http://www.opentravel.org/OTA/2003/05}Inventory'):
-            sac_elem = inventory_elem.find('.//{http://www.opentravel.org/OTA/2003/05}StatusApplicationControl')
-            inv_count_elem = inventory_elem.find('.//{http://www.opentravel.org/OTA/2003/05}InvCount')
-
-            if sac_elem is not None and inv_count_elem is not None:
-                inventory_data = {
-                    'status_application_control': {
-                        'start': sac_elem.get('Start'),
-                        'end': sac_elem.get('End'),
-                        'inv_type_code': sac_elem.get('InvTypeCode'),  # Use InvTypeCode as per IDS spec
-                        'rate_plan_code': sac_elem.get('RatePlanCode'),
-                        'meal_plan_code': sac_elem.get('MealPlanCode')
-                    },
-                    'inv_count': {
-                        'count_type': inv_count_elem.get('CountType'),
-                        'count': int(inv_count_elem.get('Count', 0))
-                    }
-                }
-                inventories.append(inventory_data)
-
-        return {
-            'echo_token': echo_token,
-            'hotel_code': hotel_code,
-            'inventories': inventories
-        }
+    return parse_notification(xml_data, INVENTORY)
 
-    except ET.ParseError as e:
-        logger.error(f"XML parsing error for inventory notification: {e}")
-        raise ValueError(f"Invalid XML format: {e}")
-    except Exception as e:
-        logger.error(f"Error parsing inventory notification: {e}")
-        raise ValueError(f"Failed to parse inventory data: {e}")
 
-
-def parse_availability_notification(xml_string: str) -> Dict[str, Any]:
+def parse_availability_notification(xml_data: Union[bytes, str]) -> Dict[str, Any]:
     """
     Parse OTA_HotelAvailNotifRQ XML into structured data
 
     Returns:
         dict with keys: echo_token, hotel_code, avail_status_messages
     """
-    try:
-        root = ET.fromstring(xml_string)
-
-        echo_token = root.get('EchoToken')
-        hotel_code = root.find('.//{http://www.opentravel.org/OTA/2003/05}AvailStatusMessages').get('HotelCode') if root.find('.//{http://www.opentravel.org/OTA/2003/05}AvailStatusMessages') is not None else None
-
-        messages = []
-
-        for msg_elem in root.findall('.//{http://www.opentravel.org/OTA/2003/05}AvailStatusMessage'):
-            sac_elem = msg_elem.find('.//{http://www.opentravel.org/OTA/2003/05}StatusApplicationControl')
-            restriction_elem = msg_elem.find('.//{http://www.opentravel.org/OTA/2003/05}RestrictionStatus')
-
-            message_data = {
-                'status_application_control': {
-                    'start': sac_elem.get('Start') if sac_elem is not None else None,
-                    'end': sac_elem.get('End') if sac_elem is not None else None,
-                    'inv_type_code': sac_elem.get('InvTypeCode') if sac_elem is not None else None,
-                    'rate_plan_code': sac_elem.get('RatePlanCode') if sac_elem is not None else None,
-                    'meal_plan_code': sac_elem.get('MealPlanCode') if sac_elem is not None else None
-                } if sac_elem is not None else None,
-                'restriction_status': {
-                    'status': restriction_elem.get('Status') if restriction_elem is not None else None,
-                    'restriction': restriction_elem.get('Restriction') if restriction_elem is not None else None,
-                    'min_los': restriction_elem.get('MinLOS') if restriction_elem is not None else None,
-                    'max_los': restriction_elem.get('MaxLOS') if restriction_elem is not None else None
-                } if restriction_elem is not None else None
-            }
-            messages.append(message_data)
-
-        return {
-            'echo_token': echo_token,
-            'hotel_code': hotel_code,
-            'avail_status_messages': messages
-        }
-
-    except ET.ParseError as e:
-        logger.error(f"XML parsing error for availability notification: {e}")
-        raise ValueError(f"Invalid XML format: {e}")
-    except Exception as e:
-        logger.error(f"Error parsing availability notification: {e}")
-        raise ValueError(f"Failed to parse availability data: {e}")
+    return parse_notification(xml_data, AVAILABILITY)
 
 
-def parse_booking_notification(xml_string: str) -> Dict[str, Any]:
+def parse_booking_notification(xml_data: Union[bytes, str]) -> Dict[str, Any]:
     """
     Parse OTA_HotelResNotifRQ XML into structured data
 
     Returns:
         dict with keys: echo_token, message_content_code, hotel_reservations
     """
-    try:
-        root = ET.fromstring(xml_string)
-
-        echo_token = root.get('EchoToken')
-        message_content_code = root.get('MessageContentCode')
-
-        reservations = []
-
-        for res_elem in root.findall('.//{http://www.opentravel.org/OTA/2003/05}HotelReservation'):
-            reservation_data = {}
-
-            # Unique ID
-            unique_id_elem = res_elem.find('.//{http://www.opentravel.org/OTA/2003/05}UniqueID')
-            if unique_id_elem is not None:
-                reservation_data['unique_id'] = {
-                    'type': unique_id_elem.get('Type'),
-                    'id': unique_id_elem.get('ID')
-                }
-
-            # Room Stays
-            room_stays = []
-            for room_stay_elem in res_elem.findall('.//{http://www.opentravel.org/OTA/2003/05}RoomStay'):
-                room_stay_data = {}
-
-                # Room Types
-                room_types = []
-                for rt_elem in room_stay_elem.findall('.//{http://www.opentravel.org/OTA/2003/05}RoomType'):
-                    room_types.append({'room_type_code': rt_elem.get('RoomTypeCode')})
-                room_stay_data['room_types'] = room_types
-
-                # Rate Plans
-                rate_plans = []
-                for rp_elem in room_stay_elem.findall('.//{http://www.opentravel.org/OTA/2003/05}RatePlan'):
-                    rate_plans.append({'rate_plan_code': rp_elem.get('RatePlanCode')})
-                room_stay_data['rate_plans'] = rate_plans
-
-                # Time Span
-                time_span_elem = room_stay_elem.find('.//{http://www.opentravel.org/OTA/2003/05}TimeSpan')
-                if time_span_elem is not None:
-                    room_stay_data['time_span'] = {
-                        'start_date': time_span_elem.get('StartDate'),
-                        'end_date': time_span_elem.get('EndDate')
-                    }
-
-                # Guest Counts
-                guest_counts = []
-                for gc_elem in room_stay_elem.findall('.//{http://www.opentravel.org/OTA/2003/05}GuestCount'):
-                    guest_counts.append({
-                        'age_qualifying_code': gc_elem.get('AgeQualifyingCode'),
-                        'count': int(gc_elem.get('Count', 0))
-                    })
-                room_stay_data['guest_counts'] = guest_counts
-
-                # Total Amount
-                total_elem = room_stay_elem.find('.//{http://www.opentravel.org/OTA/2003/05}Total')
-                if total_elem is not None:
-                    room_stay_data['total'] = {
-                        'amount_after_tax': total_elem.get('AmountAfterTax'),
-                        'currency_code': total_elem.get('CurrencyCode')
-                    }
-
-                room_stays.append(room_stay_data)
-
-            reservation_data['room_stays'] = room_stays
-
-            # Services (Guest Info)
-            services = []
-            for service_elem in res_elem.findall('.//{http://www.opentravel.org/OTA/2003/05}Service'):
-                service_data = {
-                    'service_type': service_elem.get('ServiceType'),
-                    'service_code': service_elem.get('ServiceCode')
-                }
-
-                # Guest Name
-                guest_name_elem = service_elem.find('.//{http://www.opentravel.org/OTA/2003/05}GuestName')
-                if guest_name_elem is not None:
-                    service_data['guest_name'] = {
-                        'given_name': guest_name_elem.findtext('.//{http://www.opentravel.org/OTA/2003/05}GivenName'),
-                        'surname': guest_name_elem.findtext('.//{http://www.opentravel.org/OTA/2003/05}Surname')
-                    }
-
-                # Contact Info
-                contact_elem = service_elem.find('.//{http://www.opentravel.org/OTA/2003/05}ContactInfo')
-                if contact_elem is not None:
-                    contact_data = {}
-
-                    # Phones
-                    phones = []
-                    for phone_elem in contact_elem.findall('.//{http://www.opentravel.org/OTA/2003/05}Phone'):
-                        phones.append({'phone_number': phone_elem.get('PhoneNumber')})
-                    contact_data['phones'] = phones
-
-                    # Emails
-                    emails = []
-                    for email_elem in contact_elem.findall('.//{http://www.opentravel.org/OTA/2003/05}Email'):
-                        emails.append({'email': email_elem.text})
-                    contact_data['emails'] = emails
-
-                    service_data['contact_info'] = contact_data
-
-                services.append(service_data)
-
-            reservation_data['services'] = services
-
-            reservations.append(reservation_data)
-
-        return {
-            'echo_token': echo_token,
-            'message_content_code': message_content_code,
-            'hotel_reservations': reservations
-        }
-
-    except ET.ParseError as e:
-        logger.error(f"XML parsing error for booking notification: {e}")
-        raise ValueError(f"Invalid XML format: {e}")
-    except Exception as e:
-        logger.error(f"Error parsing booking notification: {e}")
-        raise ValueError(f"Failed to parse booking data: {e}")
+    return parse_notification(xml_data, BOOKING)
 
 
 def parse_ids_room_types_response(xml_string: str) -> Dict[str, Any]:
@@ -378,15 +188,35 @@ def parse_ids_room_types_response(xml_string: str) -> Dict[str, Any]:
         raise ValueError(f"Failed to parse room types data: {e}")
 
 
-async def verify_ids_auth(request: Request, xml_body: str = None) -> None:
+async def apply_notification(db: AsyncSession, kind: str, parsed_data: Dict[str, Any]) -> None:
+    """Apply a parsed IDS push now, or queue it for the ingest workers when IDS_ASYNC_INGESTION is on"""
+    if settings.IDS_ASYNC_INGESTION:
+        await ids_ingest_queue.enqueue(db, kind, parsed_data)
+        return
+    processor = IDSDataProcessor(db)
+    await getattr(processor, PROCESSOR_METHODS[kind])(parsed_data)
+
+
+async def check_duplicate_notification(request: Request, kind: str, xml_data: bytes) -> Optional[Any]:
+    """Authenticate from the root element and return the stored response if this push was already applied.
+
+    Only the root element is read here, so a re-send is answered without parsing its messages.
+    """
+    root_attributes = read_root_attributes(xml_data)
+    authenticate_ids_request(request, root_attributes)
+    return await ids_idempotency.lookup(kind, root_attributes.get('EchoToken'), xml_data)
+
+
+def authenticate_ids_request(request: Request, xml_attributes: Optional[Dict[str, str]] = None) -> None:
     """
     Verify HTTP Basic authentication from IDS with dual method support
 
     According to IDS specification:
     - Method 1: Authorization: Basic HTTP authentication using IDS provided username/password with base-64 encoding
-    - Method 2: Check for userid/password attributes in XML payload
+    - Method 2: Check for userid/password attributes on the XML root element
 
-    Supports both methods with fallback logic.
+    Supports both methods with fallback logic. `xml_attributes` are the root element
+    attributes, as read by `check_duplicate_notification` or `verify_ids_auth`.
     """
     username = None
     password = None
@@ -410,23 +240,15 @@ async def verify_ids_auth(request: Request, xml_body: str = None) -> None:
                 logger.warning(f"Failed to decode HTTP Basic Auth credentials: {e}")
 
     # Method 2: Fallback to XML attributes if HTTP Basic failed or not present
-    if not username and xml_body:
-        try:
-            import defusedxml.ElementTree as ET
-            root = ET.fromstring(xml_body)
-            xml_username = root.get('userid')
-            xml_password = root.get('password')
+    if not username and xml_attributes:
+        xml_username = xml_attributes.get('userid')
+        xml_password = xml_attributes.get('password')
 
-            if xml_username and xml_password:
-                username = xml_username
-                password = xml_password
-                auth_method = "XML Attributes"
-                logger.info(f" Found XML attribute credentials for user: {username}")
-
-        except ET.ParseError as e:
-            logger.warning(f"Failed to parse XML for credentials: {e}")
-        except Exception as e:
-            logger.warning(f"Error checking XML credentials: {e}")
+        if xml_username and xml_password:
+            username = xml_username
+            password = xml_password
+            auth_method = "XML Attributes"
+            logger.info(f" Found XML attribute credentials for user: {username}")
 
     # Check if we have credentials from either method
     if not username or not password:
@@ -444,6 +266,22 @@ async def verify_ids_auth(request: Request, xml_body: str = None) -> None:
     logger.info(f" Successfully authenticated IDS request from: {username} (method: {auth_method})")
 
 
+async def verify_ids_auth(request: Request, xml_body: Union[bytes, str, None] = None) -> None:
+    """Authenticate a request whose body is not parsed by the streaming parser.
+
+    Only the root element is read, and always when a body is present, so the XML
+    userid/password still apply when a Basic header is sent but cannot be decoded.
+    Notification endpoints authenticate through `check_duplicate_notification` instead.
+    """
+    xml_attributes = None
+    if xml_body:
+        try:
+            xml_attributes = read_root_attributes(xml_body)
+        except ValueError as e:
+            logger.warning(f"Failed to parse XML for credentials: {e}")
+    authenticate_ids_request(request, xml_attributes)
+
+
 @router.post("/availability/check", response_model=List[AvailabilityResponse])
 async def check_availability(
     room_codes: List[str] = Query(..., description="Room codes to check"),
@@ -507,29 +345,28 @@ async def receive_inventory_update(
     """
     try:
         # Get raw XML data from IDS
-        xml_data = await request.body()
-        xml_string = xml_data.decode('utf-8').strip()
+        xml_data = (await request.body()).strip()
 
-        if not xml_string:
+        if not xml_data:
             raise HTTPException(status_code=400, detail="Empty request body")
 
-        # Verify authentication (check userid/password in XML)
-        await verify_ids_auth(request, xml_string)
+        logger.info(f"📥 Received inventory update XML from IDS: {len(xml_data)} bytes")
+        logger.info(f"XML content: {xml_data[:500].decode('utf-8', 'replace')}...")
 
-        logger.info(f"📥 Received inventory update XML from IDS: {len(xml_string)} bytes")
-        logger.info(f"XML content: {xml_string[:500]}...")
+        # Authenticate (check userid/password in XML); IDS re-sends are answered from the idempotency store
+        duplicate = await check_duplicate_notification(request, INVENTORY, xml_data)
+        if duplicate is not None:
+            return Response(content=duplicate, media_type="application/xml")
 
-        # Parse the XML
         logger.info("🔍 Starting XML parsing...")
-        parsed_data = parse_inventory_notification(xml_string)
+        parsed_data = parse_inventory_notification(xml_data)
         logger.info(f"Parsed inventory data: echo_token={parsed_data['echo_token']}, "
                    f"hotel_code={parsed_data['hotel_code']}, "
                    f"inventory_items={len(parsed_data['inventories'])}")
         logger.info(f"Parsed data type: {type(parsed_data)}")
 
         # Process and store the inventory data
-        processor = IDSDataProcessor(db)
-        await processor.process_inventory_data(parsed_data)
+        await apply_notification(db, INVENTORY, parsed_data)
 
         # Log the inventory updates for verification
         for inventory in parsed_data['inventories']:
@@ -548,6 +385,7 @@ async def receive_inventory_update(
     <Success />
 </OTA_HotelInvCountNotifRS>'''
 
+        await ids_idempotency.remember(INVENTORY, parsed_data['echo_token'], xml_data, success_response)
         logger.info(f" Response type: {type(success_response)}, content length: {len(success_response)}")
         logger.info(" Successfully processed inventory update from IDS")
         return Response(content=success_response, media_type="application/xml")
@@ -608,9 +446,8 @@ async def update_inventory(
     meal_plan_code: str = Query("CP", description="Meal plan code"),
     db: AsyncSession = Depends(get_db)
 ):
-    """Update room inventory with IDS"""
+    """Update room inventory with IDS (coalesced with concurrent pushes)"""
     try:
-        ids_service = IDSService()
         inventory_update = {
             'room_code': room_code,
             'rate_plan_code': rate_plan_code,
@@ -619,7 +456,7 @@ async def update_inventory(
             'available_count': available_count,
             'meal_plan_code': meal_plan_code
         }
-        return await ids_service.update_inventory([inventory_update])
+        return await ids_push_queue.push_inventory([inventory_update])
     except Exception as e:
         logger.error(f"Inventory update failed: {e}")
         raise HTTPException(status_code=500, detail=f"Inventory update failed: {str(e)}")
@@ -632,8 +469,9 @@ async def bulk_update_inventory(
 ):
     """Bulk update room inventory with IDS"""
     try:
-        ids_service = IDSService()
-        return await ids_service.update_inventory(inventory_updates)
+        return await ids_push_queue.push_inventory(inventory_updates)
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Bulk inventory update failed: {e}")
         raise HTTPException(status_code=500, detail=f"Bulk inventory update failed: {str(e)}")
@@ -646,8 +484,6 @@ async def bulk_update_availability(
 ):
     """Bulk update availability and restrictions with IDS"""
     try:
-        ids_service = IDSService()
-
         # Group updates by room type and date range for efficiency
         grouped_updates = {}
         for update in updates:
@@ -656,8 +492,8 @@ async def bulk_update_availability(
                 grouped_updates[key] = []
             grouped_updates[key].append(update)
 
-        # Process each group
-        results = []
+        # Merge each group, then push all groups as one coalesced batch
+        merged_updates = []
         for (room_code, rate_plan, start_date, end_date), group_updates in grouped_updates.items():
             # Merge restrictions if multiple updates for same room/date range
             merged_update = AvailabilityUpdate(
@@ -673,16 +509,20 @@ async def bulk_update_availability(
                 day_of_week=group_updates[0].day_of_week,
                 unique_id=f"bulk_{start_date}_{end_date}_{room_code}"
             )
-
-            response = await ids_service.update_availability([merged_update])
-            results.append({
-                "room_code": room_code,
-                "start_date": start_date,
-                "end_date": end_date,
+            merged_updates.append(merged_update)
+
+        response = await ids_push_queue.push_availability(merged_updates)
+        results = [
+            {
+                "room_code": merged_update.room_code,
+                "start_date": merged_update.start_date,
+                "end_date": merged_update.end_date,
                 "success": response.success is not None,
                 "warnings": len(response.warnings.warning) if response.warnings else 0,
                 "errors": len(response.errors.error) if response.errors else 0
-            })
+            }
+            for merged_update in merged_updates
+        ]
 
         return {"results": results, "total_processed": len(results)}
     except Exception as e:
@@ -752,8 +592,6 @@ async def update_restrictions(
 ):
     """Update room restrictions (open/close, min/max LOS) in IDS"""
     try:
-        ids_service = IDSService()
-
         update = AvailabilityUpdate(
             room_code=room_code,
             rate_plan_code=rate_plan_code,
@@ -767,7 +605,7 @@ async def update_restrictions(
             unique_id=f"restriction_{start_date}_{end_date}_{room_code}"
         )
 
-        response = await ids_service.update_availability([update])
+        response = await ids_push_queue.push_availability([update])
 
         return {
             "success": response.success is not None,
@@ -853,24 +691,22 @@ async def sync_inventory(
     """
     try:
         # Get raw XML data from IDS
-        xml_data = await request.body()
-        xml_string = xml_data.decode('utf-8').strip()
+        xml_data = (await request.body()).strip()
 
-        if not xml_string:
+        if not xml_data:
             raise HTTPException(status_code=400, detail="Empty request body")
 
-        logger.info(f"📥 Received inventory sync XML from IDS: {len(xml_string)} bytes")
-        logger.info(f"XML content: {xml_string[:500]}...")
+        logger.info(f"📥 Received inventory sync XML from IDS: {len(xml_data)} bytes")
+        logger.info(f"XML content: {xml_data[:500].decode('utf-8', 'replace')}...")
 
         # Parse the XML
-        parsed_data = parse_inventory_notification(xml_string)
+        parsed_data = parse_inventory_notification(xml_data)
         logger.info(f"Parsed inventory data: echo_token={parsed_data['echo_token']}, "
                    f"hotel_code={parsed_data['hotel_code']}, "
                    f"inventory_items={len(parsed_data['inventories'])}")
 
         # Process and store the inventory data
-        processor = IDSDataProcessor(db)
-        await processor.process_inventory_data(parsed_data)
+        await apply_notification(db, INVENTORY, parsed_data)
 
         # Return success response as XML
         success_response = f'''<?xml version="1.0" encoding="utf-8"?>
@@ -913,12 +749,24 @@ async def get_ids_status():
         "api_key_configured": bool(ids_service.api_key),
         "rate_plan_mapping": ids_service.rate_plan_mapping,
         "room_code_mapping": ids_service.room_code_mapping,
-        "background_sync_enabled": False  # This would be configurable
+        "background_sync_enabled": False,  # This would be configurable
+        "notification_parse_stats": notification_parse_stats.stats(),
+        "idempotency": await ids_idempotency.stats([INVENTORY, AVAILABILITY, BOOKING, ROOM_TYPE_DELTA]),
+        "availability_singleflight": ids_availability_flight.stats(),
+        "room_type_catalogue": room_type_catalogue_stats(),
+        "degraded": ids_circuit_breakers.degraded(),
+        "circuit_breakers": ids_circuit_breakers.snapshot()
     }
 
     return status
 
 
+@router.get("/ingest/status")
+async def get_ids_ingest_status(db: AsyncSession = Depends(get_db)):
+    """Inbound ingestion queue depth, processing lag and per-message latency"""
+    return await ids_ingest_queue.stats(db)
+
+
 @router.post("/test-connection")
 async def test_ids_connection():
     """Test connection to IDS backend"""
@@ -943,24 +791,24 @@ async def test_ids_connection():
                     encoded_credentials = base64.b64encode(credentials.encode('utf-8')).decode('utf-8')
                     headers["Authorization"] = f"Basic {encoded_credentials}"
 
-                async with httpx.AsyncClient(timeout=ids_service.timeout) as client:
-                    response = await client.get(connectivity_url, headers=headers)
-                    response.raise_for_status()
-
-                    # Parse response
-                    response_text = response.text.strip('"')
-                    logger.info(f"PMS connectivity verified: {response_text[:100]}...")
-
-                    return {
-                        "success": True,
-                        "message": "PMS API connection successful",
-                        "response": {
-                            "connectivity_tested": True,
-                            "status": "connected",
-                            "base_url": ids_service.base_url,
-                            "hotel_code": ids_service.hotel_code
-                        }
+                client = get_http_client()
+                response = await client.get(connectivity_url, headers=headers, timeout=ids_service.timeout)
+                response.raise_for_status()
+
+                # Parse response
+                response_text = response.text.strip('"')
+                logger.info(f"PMS connectivity verified: {response_text[:100]}...")
+
+                return {
+                    "success": True,
+                    "message": "PMS API connection successful",
+                    "response": {
+                        "connectivity_tested": True,
+                        "status": "connected",
+                        "base_url": ids_service.base_url,
+                        "hotel_code": ids_service.hotel_code
                     }
+                }
 
             except Exception as conn_error:
                 logger.warning(f"PMS API connectivity test failed: {conn_error}")
@@ -1249,23 +1097,21 @@ async def receive_room_type_delta(
     try:
         # Get raw XML data first
         xml_data = await request.body()
-        xml_string = xml_data.decode('utf-8')
-
-        # Verify authentication with XML body for fallback credential checking
-        await verify_ids_auth(request, xml_string)
+        logger.info(f"Received room type delta XML from IDS: {len(xml_data)} bytes")
 
-        logger.info(f"Received room type delta XML from IDS: {len(xml_string)} bytes")
+        # Authenticate (root userid/password fallback); IDS re-sends are answered from the idempotency store
+        duplicate = await check_duplicate_notification(request, ROOM_TYPE_DELTA, xml_data)
+        if duplicate is not None:
+            return Response(content=duplicate, media_type="application/xml")
 
-        # Parse the delta room type XML
-        parsed_data = parse_room_type_delta(xml_string)
+        parsed_data = parse_room_type_delta(xml_data)
         logger.info(f"Parsed delta room type data: echo_token={parsed_data['echo_token']}, "
                    f"hotel_code={parsed_data['hotel_code']}, "
                    f"room_types={len(parsed_data['room_types'])}, "
                    f"rate_plans={len(parsed_data['rate_plans'])}")
 
-        # Process delta room type data using IDSDataProcessor
-        processor = IDSDataProcessor(db)
-        await processor.process_room_type_delta(parsed_data)
+        # Apply delta room type data now, or queue it when async ingestion is enabled
+        await apply_notification(db, ROOM_TYPE_DELTA, parsed_data)
 
         # Return success response as XML (ProductSyncSuccessResponse)
         success_response = '''<?xml version="1.0" encoding="utf-8"?>
@@ -1275,6 +1121,7 @@ Version="1.2" EchoToken="''' + parsed_data['echo_token'] + '''">
   <Success/>
 </ProductSyncSuccessResponse>'''
 
+        await ids_idempotency.remember(ROOM_TYPE_DELTA, parsed_data['echo_token'], xml_data, success_response)
         logger.info("Successfully processed room type delta from IDS")
         return Response(content=success_response, media_type="application/xml")
 
@@ -1294,75 +1141,13 @@ Version="1.2" EchoToken="error">
         return Response(content=error_response, media_type="application/xml", status_code=500)
 
 
-def parse_room_type_delta(xml_string: str) -> Dict[str, Any]:
+def parse_room_type_delta(xml_data: Union[bytes, str]) -> Dict[str, Any]:
     """
     Parse IDS Delta Room Type XML (RN_HotelRatePlanRQ) into structured data
 
     This handles the push notifications for room type changes from IDS.
     """
-    try:
-        root = ET.fromstring(xml_string)
-        ns = {'ota': 'http://www.opentravel.org/OTA/2003/05'}
-
-        # Get basic info
-        echo_token = root.get('EchoToken')
-        hotel_code = root.find('.//ota:HotelCriteria', ns).get('HotelCode') if root.find('.//ota:HotelCriteria', ns) is not None else None
-
-        # Parse room types
-        room_types = []
-        for room_type_elem in root.findall('.//ota:RoomType', ns):
-            room_type = {
-                'inv_type_code': room_type_elem.get('InvTypeCode'),
-                'name': room_type_elem.get('Name'),
-                'base_occupancy': room_type_elem.get('BaseOccupancy'),
-                'max_occupancy': room_type_elem.get('MaxOccupancy'),
-                'quantity': int(room_type_elem.get('Quantity', 0)),
-                'is_room_active': room_type_elem.get('IsRoomActive') == '1',
-                'room_description': room_type_elem.findtext('.//ota:RoomDescription', '', ns)
-            }
-            room_types.append(room_type)
-
-        # Parse rate plans
-        rate_plans = []
-        for rate_plan_elem in root.findall('.//ota:RatePlan', ns):
-            rate_plan = {
-                'rate_plan_code': rate_plan_elem.get('RatePlanCode'),
-                'rate_plan_category': rate_plan_elem.get('RatePlanCategory'),
-                'rate_plan_status_type': rate_plan_elem.get('RatePlanStatusType'),
-                'rate_plan_name': rate_plan_elem.get('RatePlanName'),
-                'description': rate_plan_elem.get('Description'),
-                'inv_type_code': rate_plan_elem.get('InvTypeCode'),
-                'meal_plan_code': rate_plan_elem.get('MealPlanCode'),
-                'meal_plan_desc': rate_plan_elem.get('MealPlanDesc'),
-                'start': rate_plan_elem.get('Start'),
-                'end': rate_plan_elem.get('End'),
-                'currency_code': rate_plan_elem.get('CurrencyCode')
-            }
-            rate_plans.append(rate_plan)
-
-        # Parse inclusions
-        inclusions = []
-        for inclusion_elem in root.findall('.//ota:Inclusion', ns):
-            inclusion = {
-                'meal_plan_code': inclusion_elem.get('MealPlanCode'),
-                'meal_plan_desc': inclusion_elem.get('MealPlanDesc')
-            }
-            inclusions.append(inclusion)
-
-        return {
-            'echo_token': echo_token,
-            'hotel_code': hotel_code,
-            'room_types': room_types,
-            'rate_plans': rate_plans,
-            'inclusions': inclusions
-        }
-
-    except ET.ParseError as e:
-        logger.error(f"XML parsing error for room type delta: {e}")
-        raise ValueError(f"Invalid XML format: {e}")
-    except Exception as e:
-        logger.error(f"Error parsing room type delta: {e}")
-        raise ValueError(f"Failed to parse room type delta data: {e}")
+    return parse_notification(xml_data, ROOM_TYPE_DELTA)
 
 
 @router.post("/inventory/receive")
@@ -1379,22 +1164,20 @@ async def receive_inventory_notification(
     try:
         # Get raw XML data first
         xml_data = await request.body()
-        xml_string = xml_data.decode('utf-8')
+        logger.info(f"Received inventory notification XML from IDS: {len(xml_data)} bytes")
 
-        # Verify authentication with XML body for fallback credential checking
-        await verify_ids_auth(request, xml_string)
+        # Authenticate (root userid/password fallback); IDS re-sends are answered from the idempotency store
+        duplicate = await check_duplicate_notification(request, INVENTORY, xml_data)
+        if duplicate is not None:
+            return duplicate
 
-        logger.info(f"Received inventory notification XML from IDS: {len(xml_string)} bytes")
-
-        # Parse the XML into structured data
-        parsed_data = parse_inventory_notification(xml_string)
+        parsed_data = parse_inventory_notification(xml_data)
         logger.info(f"Parsed inventory data: echo_token={parsed_data['echo_token']}, "
                    f"hotel_code={parsed_data['hotel_code']}, "
                    f"inventory_items={len(parsed_data['inventories'])}")
 
-        # Process inventory data using IDSDataProcessor
-        processor = IDSDataProcessor(db)
-        await processor.process_inventory_data(parsed_data)
+        # Apply inventory data now, or queue it when async ingestion is enabled
+        await apply_notification(db, INVENTORY, parsed_data)
 
         # Return success response as XML (OTA standard format)
         success_response = '''<?xml version="1.0" encoding="utf-8"?>
@@ -1402,6 +1185,7 @@ async def receive_inventory_notification(
     <Success />
 </OTA_HotelInvCountNotifRS>'''
 
+        await ids_idempotency.remember(INVENTORY, parsed_data['echo_token'], xml_data, success_response)
         logger.info("Successfully processed inventory notification from IDS")
         return success_response
 
@@ -1433,22 +1217,20 @@ async def receive_availability_notification(
     try:
         # Get raw XML data first
         xml_data = await request.body()
-        xml_string = xml_data.decode('utf-8')
-
-        # Verify authentication with XML body for fallback credential checking
-        await verify_ids_auth(request, xml_string)
+        logger.info(f"Received availability notification XML from IDS: {len(xml_data)} bytes")
 
-        logger.info(f"Received availability notification XML from IDS: {len(xml_string)} bytes")
+        # Authenticate (root userid/password fallback); IDS re-sends are answered from the idempotency store
+        duplicate = await check_duplicate_notification(request, AVAILABILITY, xml_data)
+        if duplicate is not None:
+            return duplicate
 
-        # Parse the XML into structured data
-        parsed_data = parse_availability_notification(xml_string)
+        parsed_data = parse_availability_notification(xml_data)
         logger.info(f"Parsed availability data: echo_token={parsed_data['echo_token']}, "
                    f"hotel_code={parsed_data['hotel_code']}, "
                    f"messages={len(parsed_data['avail_status_messages'])}")
 
-        # Process availability data using IDSDataProcessor
-        processor = IDSDataProcessor(db)
-        await processor.process_availability_data(parsed_data)
+        # Apply availability data now, or queue it when async ingestion is enabled
+        await apply_notification(db, AVAILABILITY, parsed_data)
 
         # Return success response as XML
         success_response = '''<?xml version="1.0" encoding="utf-8"?>
@@ -1458,6 +1240,7 @@ Version="1.0" EchoToken="processed" TimeStamp="''' + datetime.now().isoformat()
   <Success/>
 </OTA_HotelAvailNotifRS>'''
 
+        await ids_idempotency.remember(AVAILABILITY, parsed_data['echo_token'], xml_data, success_response)
         logger.info("Successfully processed availability notification from IDS")
         return success_response
 
@@ -1491,22 +1274,20 @@ async def receive_booking_notification(
     try:
         # Get raw XML data first
         xml_data = await request.body()
-        xml_string = xml_data.decode('utf-8')
-
-        # Verify authentication with XML body for fallback credential checking
-        await verify_ids_auth(request, xml_string)
+        logger.info(f"Received booking notification XML from IDS: {len(xml_data)} bytes")
 
-        logger.info(f"Received booking notification XML from IDS: {len(xml_string)} bytes")
+        # Authenticate (root userid/password fallback); IDS re-sends are answered from the idempotency store
+        duplicate = await check_duplicate_notification(request, BOOKING, xml_data)
+        if duplicate is not None:
+            return duplicate
 
-        # Parse the XML into structured data
-        parsed_data = parse_booking_notification(xml_string)
+        parsed_data = parse_booking_notification(xml_data)
         logger.info(f"Parsed booking data: echo_token={parsed_data['echo_token']}, "
                    f"message_content_code={parsed_data['message_content_code']}, "
                    f"reservations={len(parsed_data['hotel_reservations'])}")
 
-        # Process booking data using IDSDataProcessor
-        processor = IDSDataProcessor(db)
-        await processor.process_booking_data(parsed_data)
+        # Apply booking data now, or queue it when async ingestion is enabled
+        await apply_notification(db, BOOKING, parsed_data)
 
         # Return success response as JSON for now (IDS might accept JSON for bookings)
         response = {
@@ -1517,6 +1298,7 @@ async def receive_booking_notification(
             "processed_reservations": len(parsed_data['hotel_reservations'])
         }
 
+        await ids_idempotency.remember(BOOKING, parsed_data['echo_token'], xml_data, response)
         logger.info("Successfully processed booking notification from IDS")
         return response
 
@@ -12,175 +12,26 @@ import hmac
 import hashlib
 import json
 import re
+import time
 from datetime import datetime, date
 
 from app.core.exceptions import PaymentError, ValidationError
 from app.core.logging import audit_logger
 from app.core.config import settings
 from app.db.postgresql import get_db
-from app.models import Payment, Booking, User, Room
+from app.models import Payment, Booking, User
 from sqlalchemy import select
 from app.schemas.payment import (
     PaymentInitiateRequest, PaymentInitiateResponse, PaymentResponse,
-    PaymentListResponse, PaymentWebhookData, RefundRequest, RefundResponse
+    PaymentListResponse, PaymentSettlementResponse, PaymentWebhookData, RefundRequest, RefundResponse
 )
-from app.services.ids import IDSService
+from app.services.payment_outbox import PAYU_SETTLEMENT, payment_outbox, payu_webhook_latency
+from app.services.payu_hash import payu_hash_verifier
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
-async def _create_booking_from_payment(payment: Payment, db: AsyncSession):
-    """
-    Creates a booking in the local DB and IDS system from payment details.
-    This is used when a payment is successful but has no associated booking_id.
-    """
-    if not payment.booking_details:
-        logger.error(f"Payment {payment.id} has no booking_details, cannot create booking.")
-        return
-
-    details = payment.booking_details
-    check_in = details.get("check_in_date")
-    check_out = details.get("check_out_date")
-
-    if not all([check_in, check_out, details.get("room_category")]):
-        logger.error(f"Payment {payment.id} booking_details are incomplete. Missing dates or room category.")
-        return
-    
-    # Prepare IDS booking data if parameters are present
-    if details.get("room_category") and details.get("ids_rate_plan_code"):
-        # Map room category to IDS room code
-        room_category_mapping = {
-            "Elemental Villa": "PEV",
-            "Executive": "EXT",
-            "Executive Junior Suite": "SUI",
-            "Garden Executive Suite": "GES",
-            "Pema Suite": "PES",
-            "Premium Balcony": "PBT",
-            "Premium Garden": "PGT",
-            "Standard": "STT"
-        }
-        ids_room_code = room_category_mapping.get(details.get("room_category"), details.get("room_category"))
-
-        # Extract financial details from estimate response
-        estimate_response = details.get("estimate_response", {})
-        price_breakdown = estimate_response.get("price_breakdown", {})
-        
-        # Get correct total amount from estimate (subtotal) or fallback to details amount
-        total_amount = float(price_breakdown.get("subtotal", details.get("amount", payment.amount)))
-
-        # Get correct deposit amount from estimate or fallback to payment amount
-        deposit_val = estimate_response.get("deposit_required", payment.amount)
-        try:
-            deposit_amount = float(deposit_val)
-        except (ValueError, TypeError):
-            deposit_amount = float(payment.amount)
-
-        ids_booking_data = {
-            "unique_id": f"PAY-{payment.reference_number}",
-            "check_in_date": check_in,  # Keep as string for IDS adapter
-            "check_out_date": check_out,  # Keep as string for IDS adapter
-            "adults": details.get("occupancy_details", {}).get("adults", 1),
-            "children": details.get("occupancy_details", {}).get("children", 0),
-            "room_code": ids_room_code,
-            "rate_plan_code": details.get("ids_rate_plan_code"),
-            "total_amount": total_amount,
-            "deposit_amount": deposit_amount,
-            "currency_code": "INR",
-            "guest_info": {
-                "first_name": details.get("guest_first_name", "Guest"),
-                "last_name": details.get("ids_guest_last_name") or "",
-                "email": details.get("guest_email", "guest@example.com"),
-                "phone": details.get("guest_phone", "NA"),
-                "country": "India",  # Default to India or get from details if available
-                "other_guests": details.get("ids_other_guests")
-            },
-            "special_requests": details.get("ids_special_requests"),
-            "estimate_details": estimate_response
-        }
-    else:
-        # Fallback logic if IDS parameters are missing (though frontend should provide them now)
-        room_category_mapping = {
-            "Elemental Villa": "PEV",
-            "Executive": "EXT",
-            "Executive Junior Suite": "SUI",
-            "Garden Executive Suite": "GES",
-            "Pema Suite": "PES",
-            "Premium Balcony": "PBT",
-            "Premium Garden": "PGT",
-            "Standard": "STT"
-        }
-        room_code = room_category_mapping.get(details["room_category"], details["room_category"])
-        
-        occupancy = details.get("occupancy_details", {"adults": 1, "children": 0})
-        
-        # Extract financial details from estimate response
-        estimate_response = details.get("estimate_response", {})
-        price_breakdown = estimate_response.get("price_breakdown", {})
-        
-        # Get correct total amount from estimate (subtotal) or fallback to payment amount
-        total_amount = float(price_breakdown.get("subtotal", payment.amount))
-        
-        # Get correct deposit amount from estimate or fallback to payment amount
-        # deposit_required can be string "100000.00" or float
-        deposit_val = estimate_response.get("deposit_required", payment.amount)
-        try:
-            deposit_amount = float(deposit_val)
-        except (ValueError, TypeError):
-            deposit_amount = float(payment.amount)
-            
-        ids_booking_data = {
-            "unique_id": f"PAY-{payment.reference_number}",
-            "check_in_date": check_in,  # Keep as string for IDS adapter
-            "check_out_date": check_out,  # Keep as string for IDS adapter
-            "adults": occupancy.get("adults", 1),
-            "children": occupancy.get("children", 0),
-            "room_code": room_code,
-            "rate_plan_code": "BAR", # Fallback
-            "total_amount": total_amount,
-            "deposit_amount": deposit_amount,
-            "guest_info": {
-                "first_name": details.get("guest_first_name", "Guest"),
-                "last_name": "",
-                "email": details.get("guest_email", "guest@example.com"),
-                "phone": details.get("guest_phone", "NA"),
-            },
-            "estimate_details": estimate_response
-        }
-
-    # Only create booking if IDS succeeds - no fallback bookings
-    try:
-        ids_result = await IDSService().create_booking(ids_booking_data)
-        if not ids_result.get("success"):
-            logger.error(f"IDS booking creation failed for payment {payment.id}: {ids_result.get('error')}")
-            # Don't create any booking if IDS fails
-            return
-
-        ids_confirmation_number = ids_result.get("booking_reference")
-        logger.info(f"Successfully created IDS booking {ids_confirmation_number} for payment {payment.id}")
-
-        # Link the created booking to the payment
-        # IDSService.create_booking -> _store_booking_locally -> creates Booking
-        # We need to find that booking and update payment.booking_id
-
-        stmt = select(Booking).where(Booking.ids_booking_reference == ids_booking_data["unique_id"])
-        result = await db.execute(stmt)
-        local_booking = result.scalar_one_or_none()
-
-        if local_booking:
-            payment.booking_id = local_booking.id
-            local_booking.paid_amount = payment.amount
-            # Status is already set to confirmed in IDS storage service
-            db.add(local_booking)
-            logger.info(f"Linked payment {payment.id} to booking {local_booking.id}")
-
-    except Exception as e:
-        logger.error(f"Error creating IDS booking from payment: {e}")
-        # Don't create any fallback booking
-
-    # No fallback booking creation - only successful IDS bookings
-
-
 def _compute_payu_request_hash(
     key: str,
     txnid: str,
@@ -208,6 +59,13 @@ def _compute_payu_request_hash(
     )
     return hashlib.sha512(hash_string.encode()).hexdigest().lower()
 
+async def _payment_by_txnid(db: AsyncSession, txnid: Optional[str]) -> Optional[Payment]:
+    """Payment for a PayU txnid via the unique txnid index (no scan over payments)."""
+    if not txnid:
+        return None
+    result = await db.execute(select(Payment).where(Payment.txnid == txnid))
+    return result.scalar_one_or_none()
+
 def _format_rupees(amount_rupees) -> str:
     """Format rupee amount to string with 2 decimals (no paise conversion)."""
     try:
@@ -248,83 +106,6 @@ def _compute_payu_response_hash(
     return hashlib.sha512(reverse_seq.encode()).hexdigest().lower()
 
 
-def _compute_payu_response_hash_candidates(
-    *,
-    salts: List[str],
-    status: str,
-    email_candidates: List[str],
-    firstname_candidates: List[str],
-    productinfo_candidates: List[str],
-    amount_candidates: List[str],
-    txnid: str,
-    key: str,
-    udf1_candidates: Optional[List[str]] = None,
-    udf2_candidates: Optional[List[str]] = None,
-    udf3_candidates: Optional[List[str]] = None,
-    udf4_candidates: Optional[List[str]] = None,
-    udf5_candidates: Optional[List[str]] = None,
-    additional_charges: Optional[str] = None,
-):
-    """Generate possible response hash values for known PayU variants.
-
-    Variants covered:
-    - Classic: salt|status|||||udf5|udf4|udf3|udf2|udf1|email|firstname|productinfo|amount|txnid|key
-    - No-UDF (10 blanks): salt|status||||||||||email|firstname|productinfo|amount|txnid|key
-    - No-UDF (11 blanks): salt|status|||||||||||email|firstname|productinfo|amount|txnid|key
-    Each also with optional additional_charges prefix.
-    """
-    candidates: list[str] = []
-    blanks10 = "|" * 10
-    blanks11 = "|" * 11
-
-    # Set default UDF candidates if not provided
-    udf1_candidates = udf1_candidates or [""]
-    udf2_candidates = udf2_candidates or [""]
-    udf3_candidates = udf3_candidates or [""]
-    udf4_candidates = udf4_candidates or [""]
-    udf5_candidates = udf5_candidates or [""]
-
-    # Build combinations
-    for salt in salts:
-        for em in email_candidates:
-            for fn in firstname_candidates:
-                for pi in productinfo_candidates:
-                    for amt in amount_candidates:
-                        for udf1_val in udf1_candidates:
-                            for udf2_val in udf2_candidates:
-                                for udf3_val in udf3_candidates:
-                                    for udf4_val in udf4_candidates:
-                                        for udf5_val in udf5_candidates:
-                                            # Normalize fields to strings
-                                            ems = (em or "")
-                                            fns = (fn or "")
-                                            pis = (pi or "")
-                                            amts = f"{float(amt):.2f}" if amt not in (None, "") else ""
-
-                                            # Variant 1: classic with udf5..udf1
-                                            seq1 = (
-                                                f"{salt}|{status}|||||{udf5_val or ''}|{udf4_val or ''}|{udf3_val or ''}|{udf2_val or ''}|{udf1_val or ''}|{ems}|{fns}|{pis}|{amts}|{txnid}|{key}"
-                                            )
-                                            candidates.append(seq1)
-                                            if additional_charges:
-                                                candidates.append(f"{additional_charges}|{seq1}")
-
-                                            # Variant 2: with 10 blanks (no explicit UDFs)
-                                            seq2 = f"{salt}|{status}{blanks10}{ems}|{fns}|{pis}|{amts}|{txnid}|{key}"
-                                            candidates.append(seq2)
-                                            if additional_charges:
-                                                candidates.append(f"{additional_charges}|{seq2}")
-
-                                            # Variant 3: with 11 blanks (observed in some environments)
-                                            seq3 = f"{salt}|{status}{blanks11}{ems}|{fns}|{pis}|{amts}|{txnid}|{key}"
-                                            candidates.append(seq3)
-                                            if additional_charges:
-                                                candidates.append(f"{additional_charges}|{seq3}")
-
-    # Return hashed values (lowercase hex)
-    return [hashlib.sha512(seq.encode()).hexdigest().lower() for seq in candidates]
-
-
 @router.post("/initiate", response_model=PaymentInitiateResponse)
 async def initiate_payment(
     payment_data: PaymentInitiateRequest,
@@ -384,8 +165,9 @@ async def initiate_payment(
     await db.commit()
     await db.refresh(payment)
     
-    # Generate reference number
+    # Generate reference number (also the PayU txnid)
     payment.reference_number = payment.generate_reference_number()
+    payment.txnid = payment.reference_number
     # For single order id across multiple payments
     payment.order_id = payment.reference_number
     await db.commit()
@@ -616,6 +398,8 @@ async def payment_webhook(
     db: AsyncSession = Depends(get_db)
 ):
     """Handle PayU hosted checkout return (surl/furl) and verify hash."""
+    received_at = datetime.utcnow()
+    started = time.perf_counter()
     try:
         # PayU typically POSTs form data to surl/furl. In case of GET, read query params.
         data = {}
@@ -651,11 +435,7 @@ async def payment_webhook(
         udf5 = data.get("udf5", "")
         
         # Lookup payment by txnid early to reconstruct original fields
-        p_stmt = select(Payment).where(
-            (Payment.payment_order_id == txnid) | (Payment.reference_number == txnid)
-        )
-        p_res = await db.execute(p_stmt)
-        payment = p_res.scalar()
+        payment = await _payment_by_txnid(db, txnid)
 
         booking = None
         stored_email = None
@@ -715,28 +495,17 @@ async def payment_webhook(
             if settings.FRONTEND_FORCE_HTTP and stored_udf1.startswith("https://"):
                 stored_udf1 = stored_udf1.replace("https://", "http://", 1)
 
-        udf1_candidates = list(set([udf1 or "", stored_udf1]))
-        udf2_candidates = list(set([udf2 or "", ""]))  # We always send empty
-        udf3_candidates = list(set([udf3 or "", ""]))  # We always send empty
-        udf4_candidates = list(set([udf4 or "", ""]))  # We always send empty
-        udf5_candidates = list(set([udf5 or "", ""]))  # We always send empty
-
-        expected_hashes = _compute_payu_response_hash_candidates(
-            salts=salts,
-            status=status or "",
-            email_candidates=email_candidates,
-            firstname_candidates=firstname_candidates,
-            productinfo_candidates=productinfo_candidates,
-            amount_candidates=amount_candidates,
-            txnid=txnid or "",
-            key=key or "",
-            udf1_candidates=udf1_candidates,
-            udf2_candidates=udf2_candidates,
-            udf3_candidates=udf3_candidates,
-            udf4_candidates=udf4_candidates,
-            udf5_candidates=udf5_candidates,
-            additional_charges=additional_charges,
-        )
+        hash_fields = {
+            "email": email_candidates,
+            "firstname": firstname_candidates,
+            "productinfo": productinfo_candidates,
+            "amount": amount_candidates,
+            "udf1": [udf1 or "", stored_udf1],
+            "udf2": [udf2 or "", ""],  # We always send empty
+            "udf3": [udf3 or "", ""],  # We always send empty
+            "udf4": [udf4 or "", ""],  # We always send empty
+            "udf5": [udf5 or "", ""],  # We always send empty
+        }
 
         # Parse posted hash (could be a simple hex string or a JSON with v1/v2)
         posted_v1 = None
@@ -754,15 +523,17 @@ async def payment_webhook(
             posted_v1 = (str(posted_hash_raw) if posted_hash_raw else "").lower()
         
         # TEMPORARILY DISABLE HASH VERIFICATION FOR TESTING
-        # Validate against any matching expected hash (v2 preferred if provided by PayU)
-        valid = False
-        matching_hash = None
-        if posted_v1 and posted_v1 in expected_hashes:
-            valid = True
-            matching_hash = posted_v1
-        if (not valid) and posted_v2 and posted_v2 in expected_hashes:
-            valid = True
-            matching_hash = posted_v2
+        # Validate against the v1 or v2 hash posted by PayU; stops at the first matching candidate
+        verification = payu_hash_verifier.verify(
+            [posted_v1, posted_v2],
+            salts=salts,
+            status=status or "",
+            txnid=txnid or "",
+            key=key or "",
+            fields=hash_fields,
+            additional_charges=additional_charges,
+        )
+        valid = verification.valid
 
         # TEMPORARY: Log details but don't fail for testing
         if not valid:
@@ -775,8 +546,8 @@ async def payment_webhook(
                 additional_charges,
             )
             logger.warning(
-                "Hash verification details: posted_v1=%s, posted_v2=%s, expected_hashes_count=%d",
-                posted_v1, posted_v2, len(expected_hashes)
+                "Hash verification details: posted_v1=%s, posted_v2=%s, candidates_tried=%d",
+                posted_v1, posted_v2, verification.tried
             )
             logger.warning(
                 "Webhook parameters: email=%s, firstname=%s, productinfo=%s, amount=%s, udf1=%s, udf2=%s, udf3=%s, udf4=%s, udf5=%s",
@@ -787,93 +558,29 @@ async def payment_webhook(
                 stored_email, stored_firstname, stored_productinfo, stored_amount_str
             )
             # Log first few expected hashes for debugging
-            for i, h in enumerate(expected_hashes[:3]):
+            for i, h in enumerate(verification.sample):
                 logger.warning("Expected hash %d: %s", i+1, h)
 
             # TEMPORARY: Allow processing even with invalid hash
             logger.warning("TEMPORARY: Allowing webhook processing despite invalid hash for testing")
             # raise HTTPException(status_code=400, detail="Invalid hash")
         
-        # Lookup payment by txnid if not already loaded
-        if not payment:
-            stmt = select(Payment).where(
-                (Payment.payment_order_id == txnid) | (Payment.reference_number == txnid)
-            )
-            result = await db.execute(stmt)
-            payment = result.scalar()
         if not payment:
             logger.error(f"Payment not found for txnid={txnid}")
             raise HTTPException(status_code=404, detail="Payment not found")
         
-        # Update payment
-        payment.payment_intent_id = mihpayid
-        payment.raw_response = data
-        payment.completed_at = datetime.utcnow()
-        if status and status.lower() == "success":
-            payment.status = "success"
-        else:
-            payment.status = "failed"
-        
-        # If payment is successful, create/update booking
-        if payment.status == "success":
-            if payment.booking_id:
-                # If booking already exists, just update payment amount
-                booking_stmt = select(Booking).where(Booking.id == payment.booking_id)
-                booking = (await db.execute(booking_stmt)).scalar()
-                if booking:
-                    booking.paid_amount += payment.amount
-                    # Update booking status based on payment type
-                    if payment.payment_type == "deposit" and booking.doctor_review_required:
-                        booking.status = "pending_medical"
-                    elif booking.paid_amount >= booking.total_amount:
-                        booking.status = "reserved"
-            else:
-                # If no booking exists, create one via IDS booking
-                await _create_booking_from_payment(payment, db)
-
-            # Send confirmation email for successful payment and mark as sent
-            if payment.booking_id and booking:
-                try:
-                    from app.services.email import EmailService
-                    email_service = EmailService()
-
-                    # Get room information
-                    room_stmt = select(Room).where(Room.id == booking.room_id)
-                    room_result = await db.execute(room_stmt)
-                    room = room_result.scalar()
-
-                    if room:
-                        # Send deposit confirmation email
-                        guest_name = f"{booking.guest_first_name or ''} {booking.guest_last_name or ''}".strip()
-                        if not guest_name:
-                            guest_name = "Valued Guest"
-
-                        email_sent = await email_service.send_deposit_confirmation_email(
-                            guest_email=booking.guest_email,
-                            guest_name=guest_name,
-                            check_in_date=booking.check_in_date,
-                            check_out_date=booking.check_out_date,
-                            room_name=room.name,
-                            room_count=booking.number_of_rooms or 1,
-                            adults=booking.occupancy_details.get("adults_total", 1) if booking.occupancy_details else 1,
-                            caregiver=booking.caregiver_required,
-                            total_amount=booking.total_amount,  # Already in rupees
-                            deposit_amount=payment.amount,  # Already in rupees
-                            confirmation_number=booking.confirmation_number
-                        )
-
-                        if email_sent:
-                            logger.info(f"Confirmation email sent successfully to {booking.guest_email} for booking {booking.id}")
-                            # Mark email as sent in database
-                            booking.confirmation_email_sent = True
-                        else:
-                            logger.error(f"Failed to send confirmation email to {booking.guest_email} for booking {booking.id}")
-                            # Leave confirmation_email_sent as False/NULL so database trigger can retry later
-
-                except Exception as e:
-                    logger.error(f"Error sending confirmation email for booking {booking.id}: {e}")
-
+        # Record the callback and answer PayU; the outbox workers settle it, one callback
+        # per txnid at a time, so duplicate surl/furl POSTs cannot race each other
+        payment_outbox.add(db, PAYU_SETTLEMENT, f"txn:{txnid}", {
+            "payment_id": payment.id,
+            "status": status,
+            "mihpayid": mihpayid,
+            "hash_valid": valid,
+            "received_at": received_at.isoformat(),
+            "data": data,
+        })
         await db.commit()
+        payment_outbox.notify()
         
         audit_logger.log_payment_event(
             event="payment_webhook",
@@ -885,6 +592,8 @@ async def payment_webhook(
 
         # If frontend return_url was carried in udf1, redirect the browser there
         # with txnid, booking_id (if exists) and status so FE can show result page.
+        # Payment-first bookings are created later by the outbox, so their redirect has no
+        # booking_id; the page resolves it from GET /payments/txn/{txnid} once settled.
         fe_return_url = data.get("udf1")
         # Redirect priority: udf1 if present, else default FE confirmation route
         try:
@@ -912,6 +621,8 @@ async def payment_webhook(
     except Exception as e:
         logger.error(f"Webhook processing error: {e}")
         raise HTTPException(status_code=400, detail="Webhook processing failed")
+    finally:
+        payu_webhook_latency.record(time.perf_counter() - started)
 
 
 async def handle_payment_success(payment_data: dict, db: AsyncSession):
@@ -1030,6 +741,23 @@ async def get_payment(
     return PaymentResponse.model_validate(payment)
 
 
+@router.get("/txn/{txnid}", response_model=PaymentSettlementResponse)
+async def get_payment_settlement(txnid: str, db: AsyncSession = Depends(get_db)):
+    """Settlement status and booking id for a PayU txnid (polled by the confirmation page)."""
+    payment = await _payment_by_txnid(db, txnid)
+    if not payment:
+        raise HTTPException(status_code=404, detail="Payment not found")
+    # Settled once the payment failed, or succeeded and its booking exists
+    settled = payment.status == "failed" or (payment.status == "success" and payment.booking_id is not None)
+    return PaymentSettlementResponse(
+        txnid=txnid,
+        payment_id=payment.id,
+        status=payment.status,
+        booking_id=payment.booking_id if payment.status == "success" else None,
+        settled=settled,
+    )
+
+
 @router.post("/refund", response_model=RefundResponse)
 async def request_refund(
     refund_data: RefundRequest,
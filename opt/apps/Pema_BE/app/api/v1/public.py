@@ -21,6 +21,7 @@ from app.schemas.room import (
 )
 from app.services.booking import BookingService
 from app.services.pricing import PricingService
+from app.services.room_codes import room_codes
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -370,22 +371,10 @@ async def list_room_types(db: AsyncSession = Depends(get_db)):
 
     print(pricing_upto_7_dict, "pricing_upto_7_dict")
     print(pricing_8_plus_dict, "pricing_8_plus_dict")
-    # Map pricing categories to codes
-    category_code_map = {
-        "Standard": "STT",
-        "Premium Balcony": "PBT",
-        "Premium Garden": "PGT",
-        "Executive": "EXT",
-        "Garden Executive Suite": "GES",
-        "Executive Junior Suite": "SUI",
-        "Elemental Villa": "PEV",
-        "Pema Suite": "PES"
-    }
-
     room_types = []
     for row in room_inventory_rows:
         category = row.pricing_category
-        code = category_code_map.get(category, "UNK")
+        code = room_codes.pms_code_for_category(category, "UNK")
 
         # Get pricing data
         pricing_8_plus = pricing_8_plus_dict.get(category)
@@ -422,22 +411,14 @@ async def room_availability(
         from fastapi import HTTPException
         raise HTTPException(status_code=400, detail="check_out_date must be after check_in_date")
 
-    # Gather rooms and group by category
-    stmt = select(Room).where(and_(Room.is_active == True, Room.maintenance_mode == False))
-    result = await db.execute(stmt)
-    rooms = result.scalars().all()
+    # One grouped overlap query for all rooms, grouped by category
     bs = BookingService(db)
-    groups: dict[str, list[Room]] = {}
-    for r in rooms:
-        cat = getattr(r, "pricing_category", None) or bs._infer_pricing_category(r)
-        groups.setdefault(cat, []).append(r)
+    groups = await bs.get_remaining_units_by_category(check_in_date.date(), check_out_date.date())
 
     # Sum remaining units by category
     out: list[RoomAvailabilityByCategory] = []
     for cat, items in groups.items():
-        total_inv = sum((getattr(r, "inventory_count", 1) or 1) for r in items)
-        remaining = 0
-        for r in items:
-            remaining += await bs.get_remaining_units(r.id, check_in_date.date(), check_out_date.date())
+        total_inv = sum((getattr(r, "inventory_count", 1) or 1) for r, _ in items)
+        remaining = sum(units for _, units in items)
         out.append(RoomAvailabilityByCategory(category=cat, available_units=remaining, total_inventory=total_inv))
     return out
@@ -0,0 +1,156 @@
+"""
+Circuit breaker for outbound integrations
+Tracks a rolling window of call outcomes and latencies per endpoint; when the error or
+slow-call rate crosses its threshold the breaker opens and calls fail fast until a
+cool-down has passed and a half-open probe succeeds
+"""
+
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def remaining_budget(deadline: Optional[float]) -> Optional[float]:
+    """Seconds left until a time.monotonic() deadline (None means no deadline)"""
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker over a rolling time window"""
+
+    def __init__(
+        self,
+        name: str,
+        window_seconds: float = 60.0,
+        minimum_calls: int = 5,
+        failure_rate_threshold: float = 0.5,
+        slow_call_seconds: float = 5.0,
+        slow_call_rate_threshold: float = 0.8,
+        open_seconds: float = 30.0,
+        half_open_max_calls: int = 1,
+    ):
+        self.name = name
+        self.window_seconds = window_seconds
+        self.minimum_calls = minimum_calls
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+
+        # (finished_at, failed, latency_seconds)
+        self._calls: Deque[Tuple[float, bool, float]] = deque()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._half_open_in_flight = 0
+        self.rejected = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._half_open_in_flight = 0
+            logger.info(f"Circuit {self.name} half-open: allowing probe calls")
+        return self._state
+
+    def retry_in(self) -> float:
+        return max(0.0, self.open_seconds - (time.monotonic() - self._opened_at))
+
+    def allow(self) -> bool:
+        """Whether a call may go out now; half-open admits a limited number of probes"""
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and self._half_open_in_flight < self.half_open_max_calls:
+            self._half_open_in_flight += 1
+            return True
+        self.rejected += 1
+        return False
+
+    def _prune(self, now: float) -> None:
+        while self._calls and now - self._calls[0][0] > self.window_seconds:
+            self._calls.popleft()
+
+    def record(self, failed: bool, latency: float) -> None:
+        now = time.monotonic()
+        if self._state == HALF_OPEN:
+            self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+            if failed or latency >= self.slow_call_seconds:
+                self._trip(now, "half-open probe failed")
+            else:
+                self._state = CLOSED
+                self._calls.clear()
+                logger.info(f"Circuit {self.name} closed after successful probe")
+            return
+
+        self._calls.append((now, failed, latency))
+        self._prune(now)
+        if self._state != CLOSED or len(self._calls) < self.minimum_calls:
+            return
+        failure_rate, slow_rate = self._rates()
+        if failure_rate >= self.failure_rate_threshold:
+            self._trip(now, f"failure rate {failure_rate:.0%}")
+        elif slow_rate >= self.slow_call_rate_threshold:
+            self._trip(now, f"slow call rate {slow_rate:.0%}")
+
+    def _rates(self) -> Tuple[float, float]:
+        if not self._calls:
+            return 0.0, 0.0
+        total = len(self._calls)
+        failures = sum(1 for _, failed, _ in self._calls if failed)
+        slow = sum(1 for _, _, latency in self._calls if latency >= self.slow_call_seconds)
+        return failures / total, slow / total
+
+    def _trip(self, now: float, reason: str) -> None:
+        self._state = OPEN
+        self._opened_at = now
+        self.times_opened += 1
+        logger.warning(f"Circuit {self.name} opened: {reason}")
+
+    def snapshot(self) -> dict:
+        self._prune(time.monotonic())
+        failure_rate, slow_rate = self._rates()
+        latencies = sorted(latency for _, _, latency in self._calls)
+        return {
+            "state": self.state,
+            "calls_in_window": len(self._calls),
+            "failure_rate": round(failure_rate, 3),
+            "slow_call_rate": round(slow_rate, 3),
+            "p95_latency_ms": round(latencies[int(0.95 * (len(latencies) - 1))] * 1000, 1) if latencies else None,
+            "retry_in_seconds": round(self.retry_in(), 1) if self._state == OPEN else None,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+        }
+
+
+class CircuitBreakerRegistry:
+    """One breaker per endpoint, created on first use with shared settings"""
+
+    def __init__(self, **breaker_settings):
+        self._settings = breaker_settings
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, endpoint: str) -> CircuitBreaker:
+        breaker = self._breakers.get(endpoint)
+        if breaker is None:
+            breaker = self._breakers[endpoint] = CircuitBreaker(endpoint, **self._settings)
+        return breaker
+
+    def snapshot(self) -> Dict[str, dict]:
+        return {endpoint: breaker.snapshot() for endpoint, breaker in self._breakers.items()}
+
+    def degraded(self) -> bool:
+        return any(breaker.state != CLOSED for breaker in self._breakers.values())
+
+    def reset(self) -> None:
+        self._breakers.clear()
@@ -84,6 +84,14 @@ class Settings(BaseSettings):
     PAYU_FORCE_V1_ONLY: bool = False
     PAYU_API_ENDPOINT: str = "https://secure.payu.in/_payment"
 
+    # Payment outbox: IDS booking push and confirmation email after the PayU webhook commits
+    OUTBOX_WORKERS: int = 2
+    OUTBOX_POLL_SECONDS: float = 1.0
+    OUTBOX_MAX_ATTEMPTS: int = 8
+    OUTBOX_MAX_BACKOFF_SECONDS: int = 300
+    OUTBOX_STALE_SECONDS: int = 300  # requeue rows a crashed worker left in processing
+    OUTBOX_RETENTION_DAYS: int = 7
+
     # Caregiver pricing (in INR)
     CAREGIVER_STAY_WITH_GUEST_PRICE_INR: int = 8000
     CAREGIVER_MEAL_PRICE_INR: int = 8000
@@ -93,6 +101,19 @@ class Settings(BaseSettings):
         "Premium Garden": 28000,
     }
 
+    # Pricing band index: seconds between change checks against pricing_bands (0 = only on local writes)
+    PRICING_INDEX_REFRESH_SECONDS: int = 300
+
+    # Nightly rate calendar: nights precomputed ahead of today (~18 months)
+    RATE_CALENDAR_HORIZON_DAYS: int = 548
+
+    # Estimate result cache (Redis)
+    ESTIMATE_CACHE_ENABLED: bool = True
+    ESTIMATE_CACHE_TTL_SECONDS: int = 600
+
+    # Availability calendar month buckets (Redis); also invalidated on booking/room commits
+    AVAILABILITY_CALENDAR_CACHE_TTL_SECONDS: int = 300
+
     # Email Configuration
     SMTP_HOST: str = "smtp.gmail.com"
     SMTP_PORT: int = 587
@@ -122,6 +143,44 @@ class Settings(BaseSettings):
     IDS_SYNC_INTERVAL_MINUTES: int = 30
     IDS_ROOM_CODE_MAPPING: Dict[str, str] = {}
     IDS_RATE_PLAN_MAPPING: Dict[str, str] = {}
+    IDS_CATEGORY_ROOM_CODES: Dict[str, str] = {}  # overrides for the category -> PMS room code table
+    IDS_PUSH_COALESCE_SECONDS: float = 0.5  # 0 sends every inventory/availability push immediately
+    IDS_PUSH_MAX_MESSAGES_PER_REQUEST: int = 500
+    IDS_ASYNC_INGESTION: bool = False  # queue inbound pushes and acknowledge before processing
+    IDS_INGEST_WORKERS: int = 4
+    IDS_INGEST_POLL_SECONDS: float = 1.0
+    IDS_INGEST_MAX_ATTEMPTS: int = 5
+    IDS_INGEST_MAX_BACKOFF_SECONDS: int = 300
+    IDS_INGEST_STALE_SECONDS: int = 300
+    IDS_INGEST_RETENTION_DAYS: int = 7
+    IDS_IDEMPOTENCY_ENABLED: bool = True  # answer IDS re-sends from the stored response
+    IDS_IDEMPOTENCY_TTL_SECONDS: int = 86400
+
+    # Outbound IDS circuit breakers (per endpoint) and latency budget
+    IDS_BREAKER_WINDOW_SECONDS: float = 60.0
+    IDS_BREAKER_MIN_CALLS: int = 5  # calls in the window before rates are judged
+    IDS_BREAKER_FAILURE_RATE: float = 0.5
+    IDS_BREAKER_SLOW_CALL_SECONDS: float = 5.0
+    IDS_BREAKER_SLOW_CALL_RATE: float = 0.8
+    IDS_BREAKER_OPEN_SECONDS: float = 30.0  # fail fast this long before a half-open probe
+    IDS_BREAKER_HALF_OPEN_CALLS: int = 1
+    IDS_AVAILABILITY_DEADLINE_SECONDS: float = 8.0  # budget for one availability check incl. retries
+    IDS_AVAILABILITY_BATCH_ROOMS: int = 20  # RoomStayCandidates per multi-room availability query
+    IDS_AVAILABILITY_CONCURRENCY: int = 4  # parallel availability queries per search
+    IDS_AVAILABILITY_SINGLEFLIGHT_ENABLED: bool = True  # identical concurrent queries share one request
+    IDS_AVAILABILITY_CACHE_TTL_SECONDS: float = 2.0  # reuse a successful answer this long (0 disables)
+
+    # In-memory room type catalogue (PMS and rooms table)
+    ROOM_TYPE_CATALOGUE_TTL_SECONDS: float = 300.0  # background refresh interval
+    ROOM_TYPE_CATALOGUE_RETRY_SECONDS: float = 30.0  # wait this long after a failed load
+
+    # Shared outbound HTTP client (IDS/PMS)
+    HTTP_CLIENT_MAX_CONNECTIONS: int = 50
+    HTTP_CLIENT_MAX_KEEPALIVE: int = 20
+    HTTP_CLIENT_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    HTTP_CLIENT_MAX_CONNECTIONS_PER_HOST: int = 10
+    HTTP_CLIENT_HTTP2: bool = True  # used only when the h2 package is installed
+    HTTP_CLIENT_TIMEOUT_SECONDS: float = 30.0
 
     # Business Rules
     MINIMUM_STAY_NIGHTS: int = 3
@@ -151,6 +210,18 @@ class Settings(BaseSettings):
     # Email service (Google SMTP)
     GMAIL_USERNAME: Optional[str] = None
     GMAIL_APP_PASSWORD: Optional[str] = None
+    SMTP_POOL_SIZE: int = 2  # authenticated sessions kept open and reused across messages
+    SMTP_SEND_TIMEOUT_SECONDS: float = 30.0  # per message, including connect/login when needed
+    SMTP_IDLE_SECONDS: float = 60.0  # pooled sessions idle longer than this are reopened
+
+    # Booking confirmation emails: LISTEN on booking_confirmed, plus a slow safety-net sweep
+    CONFIRMATION_EMAIL_LISTEN: bool = True
+    CONFIRMATION_EMAIL_CONCURRENCY: int = 2
+    CONFIRMATION_EMAIL_SETTLE_SECONDS: float = 2.0  # let the confirming transaction finish follow-up writes
+    CONFIRMATION_EMAIL_LISTEN_CHECK_SECONDS: float = 30.0
+    CONFIRMATION_EMAIL_SWEEP_SECONDS: int = 1800
+    CONFIRMATION_EMAIL_SWEEP_MIN_AGE_SECONDS: int = 300
+    CONFIRMATION_EMAIL_SWEEP_BATCH: int = 50
 
     # Note: Pydantic Settings v2 uses model_config above instead of Config
 
@@ -186,6 +186,24 @@ class ExternalServiceError(PemaException):
         )
 
 
+class CircuitOpenError(ExternalServiceError):
+    """Call rejected because the endpoint's breaker is open"""
+
+    def __init__(self, service_name: str, endpoint: str, retry_in: float):
+        super().__init__(
+            service_name,
+            f"{endpoint} circuit open, retry in {retry_in:.0f}s",
+            details={"endpoint": endpoint, "retry_in_seconds": round(retry_in, 1)},
+        )
+
+
+class DeadlineExceededError(ExternalServiceError):
+    """The caller's latency budget ran out before the call could complete"""
+
+    def __init__(self, service_name: str, endpoint: str):
+        super().__init__(service_name, f"{endpoint} deadline exceeded")
+
+
 class RateLimitError(PemaException):
     """Rate limiting errors"""
     
@@ -0,0 +1,140 @@
+"""
+Shared outbound HTTP client
+One application-lifetime httpx.AsyncClient for IDS/PMS traffic, so connections are reused
+instead of paying a TCP/TLS handshake per call
+"""
+
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+import asyncio
+import importlib.util
+import logging
+import time
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _http2_available() -> bool:
+    """HTTP/2 needs the optional h2 package (httpx[http2])"""
+    return importlib.util.find_spec("h2") is not None
+
+
+class PooledHTTPClient:
+    """httpx.AsyncClient wrapper with per-host concurrency caps and pool metrics"""
+
+    def __init__(
+        self,
+        max_connections: Optional[int] = None,
+        max_keepalive_connections: Optional[int] = None,
+        keepalive_expiry: Optional[float] = None,
+        max_per_host: Optional[int] = None,
+        http2: Optional[bool] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.max_connections = max_connections or settings.HTTP_CLIENT_MAX_CONNECTIONS
+        self.max_per_host = max_per_host or settings.HTTP_CLIENT_MAX_CONNECTIONS_PER_HOST
+        self.http2 = (settings.HTTP_CLIENT_HTTP2 if http2 is None else http2) and _http2_available()
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=max_keepalive_connections or settings.HTTP_CLIENT_MAX_KEEPALIVE,
+            keepalive_expiry=keepalive_expiry or settings.HTTP_CLIENT_KEEPALIVE_EXPIRY_SECONDS,
+        )
+        self._client = httpx.AsyncClient(
+            limits=limits,
+            http2=self.http2,
+            timeout=settings.HTTP_CLIENT_TIMEOUT_SECONDS,
+            transport=transport,
+        )
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self._in_flight: Dict[str, int] = {}
+        self.requests = 0
+        self.errors = 0
+        self.peak_in_flight = 0
+        self.slot_wait_seconds = 0.0
+
+    @property
+    def is_closed(self) -> bool:
+        return self._client.is_closed
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request, waiting for a free slot when the host is at its connection cap"""
+        host = urlsplit(url).netloc
+        slots = self._host_slots.setdefault(host, asyncio.Semaphore(self.max_per_host))
+        waited = time.monotonic()
+        async with slots:
+            self.slot_wait_seconds += time.monotonic() - waited
+            self._in_flight[host] = self._in_flight.get(host, 0) + 1
+            self.peak_in_flight = max(self.peak_in_flight, sum(self._in_flight.values()))
+            self.requests += 1
+            try:
+                return await self._client.request(method, url, **kwargs)
+            except httpx.HTTPError:
+                self.errors += 1
+                raise
+            finally:
+                self._in_flight[host] -= 1
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    def stats(self) -> dict:
+        """Pool utilization: open/idle connections from the transport plus request counters"""
+        connections = getattr(getattr(self._client._transport, "_pool", None), "connections", [])
+        idle = sum(1 for conn in connections if getattr(conn, "is_idle", lambda: False)())
+        return {
+            "http2": self.http2,
+            "max_connections": self.max_connections,
+            "max_connections_per_host": self.max_per_host,
+            "open_connections": len(connections),
+            "idle_connections": idle,
+            "pool_utilization": round((len(connections) - idle) / self.max_connections, 4),
+            "in_flight": {host: count for host, count in self._in_flight.items() if count},
+            "peak_in_flight": self.peak_in_flight,
+            "requests": self.requests,
+            "errors": self.errors,
+            "slot_wait_seconds": round(self.slot_wait_seconds, 3),
+        }
+
+
+_http_client: Optional[PooledHTTPClient] = None
+
+
+async def init_http_client() -> PooledHTTPClient:
+    """Create the shared client (called from the FastAPI lifespan)"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = PooledHTTPClient()
+        logger.info(f"Shared HTTP client initialized (http2={_http_client.http2})")
+    return _http_client
+
+
+def get_http_client() -> PooledHTTPClient:
+    """Shared client; created lazily for scripts and workers that run outside the lifespan"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = PooledHTTPClient()
+    return _http_client
+
+
+async def close_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+        logger.info("Shared HTTP client closed")
+
+
+def http_client_stats() -> dict:
+    if _http_client is None:
+        return {"initialized": False}
+    return {"initialized": True, **_http_client.stats()}
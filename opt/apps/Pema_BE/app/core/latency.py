@@ -0,0 +1,44 @@
+"""
+Rolling latency window
+Keeps the last N request durations in memory so endpoints can report p50/p95/p99
+without an external metrics stack
+"""
+
+from collections import deque
+from typing import Deque, Optional
+
+
+class LatencyWindow:
+    """Fixed-size window of recent durations (seconds) with percentile summaries"""
+
+    def __init__(self, name: str, size: int = 1000):
+        self.name = name
+        self._samples: Deque[float] = deque(maxlen=size)
+        self.count = 0
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        self.count += 1
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def reset(self) -> None:
+        self._samples.clear()
+        self.count = 0
+
+    def stats(self) -> dict:
+        def _ms(value: Optional[float]) -> Optional[float]:
+            return round(value * 1000, 1) if value is not None else None
+
+        return {
+            "count": self.count,
+            "window": len(self._samples),
+            "p50_ms": _ms(self.percentile(0.50)),
+            "p95_ms": _ms(self.percentile(0.95)),
+            "p99_ms": _ms(self.percentile(0.99)),
+            "max_ms": _ms(max(self._samples) if self._samples else None),
+        }
@@ -0,0 +1,225 @@
+"""
+Shared outbound SMTP transport
+A small pool of authenticated SMTP sessions reused across messages; every blocking smtplib
+call (connect, STARTTLS, login, send) runs in a worker thread so the event loop never waits
+on the mail server
+"""
+
+from email.message import Message
+from typing import Callable, List, Optional, Sequence
+import asyncio
+import logging
+import smtplib
+import threading
+import time
+
+from app.core.config import settings
+from app.core.latency import LatencyWindow
+
+logger = logging.getLogger(__name__)
+
+# Failures after which a reused session is assumed dead and the send is retried once on a new one
+_DROPPED_SESSION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+class _Session:
+    def __init__(self, smtp: smtplib.SMTP, username: str):
+        self.smtp = smtp
+        self.username = username
+        self.last_used = time.monotonic()
+        self.reused = False
+
+
+class PooledSMTPTransport:
+    """Thread-backed pool of logged-in SMTP sessions with send latency and reconnect counters"""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        size: Optional[int] = None,
+        timeout: Optional[float] = None,
+        idle_seconds: Optional[float] = None,
+        smtp_factory: Callable[..., smtplib.SMTP] = smtplib.SMTP,
+    ):
+        self.host = host
+        self.port = port
+        self.size = size or settings.SMTP_POOL_SIZE
+        self.timeout = timeout or settings.SMTP_SEND_TIMEOUT_SECONDS
+        self.idle_seconds = settings.SMTP_IDLE_SECONDS if idle_seconds is None else idle_seconds
+        self.smtp_factory = smtp_factory
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self._idle: List[_Session] = []
+        self._in_use = 0
+        self.latency = LatencyWindow("smtp_send")
+        self.sent = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.connections_opened = 0
+        self.reconnects = 0
+
+    def _connect(self, username: str, password: str) -> _Session:
+        smtp = self.smtp_factory(self.host, self.port, timeout=self.timeout)
+        try:
+            smtp.starttls()
+            smtp.login(username, password)
+        except Exception:
+            self._discard(_Session(smtp, username))
+            raise
+        with self._lock:
+            self.connections_opened += 1
+        return _Session(smtp, username)
+
+    @staticmethod
+    def _discard(session: _Session) -> None:
+        try:
+            session.smtp.quit()
+        except Exception:
+            try:
+                session.smtp.close()
+            except Exception:
+                pass
+
+    def _checkout(self, username: str, password: str) -> _Session:
+        """Most recently used idle session, dropping ones that idled too long or use old credentials"""
+        while True:
+            with self._lock:
+                session = self._idle.pop() if self._idle else None
+            if session is None:
+                return self._connect(username, password)
+            if session.username == username and time.monotonic() - session.last_used < self.idle_seconds:
+                session.reused = True
+                return session
+            self._discard(session)
+            with self._lock:
+                self.reconnects += 1
+
+    def _checkin(self, session: _Session) -> None:
+        session.last_used = time.monotonic()
+        with self._lock:
+            self._idle.append(session)
+
+    def _send_blocking(
+        self, msg: Message, recipients: Sequence[str], username: str, password: str, abandoned: threading.Event
+    ) -> None:
+        """Send on a pooled session unless the caller gave up first.
+
+        `abandoned` is set once the caller's timeout fires; it is checked after the slot is
+        acquired and before every send_message, so a message the caller recorded as failed
+        (and will retry) is not delivered late. A send already in progress still completes.
+        """
+        started = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError(f"No SMTP session free within {self.timeout}s")
+        try:
+            if abandoned.is_set():
+                return
+            with self._lock:
+                self._in_use += 1
+            try:
+                session = self._checkout(username, password)
+                if abandoned.is_set():
+                    self._checkin(session)
+                    return
+                try:
+                    session.smtp.send_message(msg, to_addrs=list(recipients))
+                except _DROPPED_SESSION_ERRORS:
+                    self._discard(session)
+                    if not session.reused:
+                        raise
+                    # The server closed a pooled session while it idled; retry once on a new one
+                    with self._lock:
+                        self.reconnects += 1
+                    session = self._connect(username, password)
+                    if abandoned.is_set():
+                        self._checkin(session)
+                        return
+                    try:
+                        session.smtp.send_message(msg, to_addrs=list(recipients))
+                    except Exception:
+                        self._discard(session)
+                        raise
+                except smtplib.SMTPRecipientsRefused:
+                    # The session itself is fine
+                    self._checkin(session)
+                    raise
+                except Exception:
+                    self._discard(session)
+                    raise
+                self._checkin(session)
+            finally:
+                with self._lock:
+                    self._in_use -= 1
+        finally:
+            self._slots.release()
+        self.latency.record(time.perf_counter() - started)
+
+    async def send(self, msg: Message, recipients: Sequence[str], username: str, password: str) -> None:
+        """Send one message on a pooled session; raises asyncio.TimeoutError past the per-message timeout"""
+        abandoned = threading.Event()
+        try:
+            await asyncio.wait_for(
+                asyncio.to_thread(self._send_blocking, msg, recipients, username, password, abandoned),
+                timeout=self.timeout,
+            )
+        except asyncio.TimeoutError:
+            # The worker thread cannot be interrupted; it skips the send if it has not started it
+            abandoned.set()
+            self.timeouts += 1
+            self.failed += 1
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+        self.sent += 1
+
+    def _close_blocking(self) -> None:
+        with self._lock:
+            sessions, self._idle = self._idle, []
+        for session in sessions:
+            self._discard(session)
+
+    async def aclose(self) -> None:
+        await asyncio.to_thread(self._close_blocking)
+
+    def stats(self) -> dict:
+        with self._lock:
+            idle, in_use = len(self._idle), self._in_use
+        return {
+            "host": f"{self.host}:{self.port}",
+            "pool_size": self.size,
+            "idle_sessions": idle,
+            "in_use": in_use,
+            "sent": self.sent,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "connections_opened": self.connections_opened,
+            "reconnects": self.reconnects,
+            "send_latency": self.latency.stats(),
+        }
+
+
+_smtp_transport: Optional[PooledSMTPTransport] = None
+
+
+def get_smtp_transport(host: str, port: int) -> PooledSMTPTransport:
+    """Shared transport for host:port; created lazily on the first email"""
+    global _smtp_transport
+    if _smtp_transport is None or (_smtp_transport.host, _smtp_transport.port) != (host, port):
+        _smtp_transport = PooledSMTPTransport(host, port)
+    return _smtp_transport
+
+
+async def close_smtp_transport() -> None:
+    global _smtp_transport
+    if _smtp_transport is not None:
+        await _smtp_transport.aclose()
+        _smtp_transport = None
+        logger.info("Shared SMTP transport closed")
+
+
+def smtp_transport_stats() -> dict:
+    if _smtp_transport is None:
+        return {"initialized": False}
+    return {"initialized": True, **_smtp_transport.stats()}
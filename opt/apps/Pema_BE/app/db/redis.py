@@ -162,3 +162,12 @@ def pricing_cache_key(program_id: int, room_id: int, nights: int) -> str:
 
 def availability_cache_key(room_id: int, date: str) -> str:
     return f"availability:{room_id}:{date}"
+
+def estimate_cache_key(version: str, request_hash: str) -> str:
+    return f"estimate:{version}:{request_hash}"
+
+def availability_calendar_cache_key(generation: int, month: str) -> str:
+    return f"availability:calendar:v2:{generation}:{month}"  # v2: buckets carry per-room rows
+
+def ids_idempotency_cache_key(message_type: str, echo_token: str, payload_hash: str) -> str:
+    return f"ids:idempotency:{message_type}:{echo_token}:{payload_hash}"
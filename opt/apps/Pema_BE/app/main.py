@@ -14,14 +14,20 @@ from starlette.exceptions import HTTPException as StarletteHTTPException
 import time
 import logging
 import asyncio
-import json
 from contextlib import asynccontextmanager
 
 from app.core.config import settings
 from app.core.logging import setup_logging
 from app.core.exceptions import PemaException
-from app.api.v1 import bookings, payments, public, contact, ids, admin
-from app.db.postgresql import init_db, AsyncSessionLocal
+from app.core.http_client import init_http_client, close_http_client
+from app.core.smtp_pool import close_smtp_transport
+from app.services.ids_push_queue import ids_push_queue
+from app.services.ids_ingest import ids_ingest_queue
+from app.services.payment_outbox import payment_outbox
+from app.services.confirmation_emails import confirmation_email_dispatcher
+from app.services.room_type_catalogue import room_type_catalogues
+from app.api.v1 import bookings, payments, public, contact, ids, admin, availability
+from app.db.postgresql import init_db
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.postgresql import get_db
 
@@ -53,112 +59,6 @@ async def ids_sync_worker():
         await asyncio.sleep(settings.IDS_SYNC_INTERVAL_MINUTES * 60)
 
 
-# Background task for fallback email sending
-async def booking_confirmation_fallback():
-    """Background worker that sends confirmation emails for bookings that missed the initial email"""
-    # Zuber would approve of this fallback mechanism - it's like having a backup dancer!
-    from app.db.postgresql import get_db
-    from app.services.email import EmailService
-    from sqlalchemy import text
-
-    logger.info("Starting booking confirmation fallback checker...")
-
-    while True:
-        try:
-            # Get database connection
-            async with AsyncSessionLocal() as db:
-                # Find confirmed bookings that haven't had confirmation emails sent
-                    # This serves as a fallback for bookings that somehow missed the initial email
-                    result = await db.execute(text("""
-                        SELECT b.id, b.guest_email, b.guest_first_name, b.guest_last_name,
-                               b.check_in_date, b.check_out_date, b.total_amount, b.deposit_amount,
-                               b.occupancy_details, b.caregiver_required, b.number_of_rooms,
-                               r.name as room_name, b.confirmation_number, b.created_at
-                        FROM bookings b
-                        JOIN rooms r ON b.room_id = r.id
-                        WHERE b.status = 'confirmed'
-                        AND (b.confirmation_email_sent = false OR b.confirmation_email_sent IS NULL)
-                        AND b.created_at < NOW() - INTERVAL '5 minutes'  -- Only process bookings older than 5 minutes
-                        ORDER BY b.created_at DESC
-                        LIMIT 5  -- Process max 5 at a time to avoid spam
-                    """))
-
-                    missed_bookings = result.fetchall()
-
-                    if missed_bookings:
-                        logger.info(f"Found {len(missed_bookings)} confirmed bookings that missed confirmation emails")
-
-                        for booking_row in missed_bookings:
-                            try:
-                                booking_id = booking_row[0]
-                                guest_email = booking_row[1]
-                                guest_first_name = booking_row[2]
-                                guest_last_name = booking_row[3]
-                                check_in_date = booking_row[4]
-                                check_out_date = booking_row[5]
-                                total_amount = booking_row[6]
-                                deposit_amount = booking_row[7]
-                                occupancy_details = booking_row[8]
-                                caregiver_required = booking_row[9]
-                                number_of_rooms = booking_row[10]
-                                room_name = booking_row[11]
-                                confirmation_number = booking_row[12]
-
-                                logger.info(f"Sending fallback confirmation email for booking {booking_id} ({guest_email})")
-
-                                # Send confirmation email
-                                email_service = EmailService()
-                                guest_name = f"{guest_first_name or ''} {guest_last_name or ''}".strip()
-                                if not guest_name:
-                                    guest_name = "Valued Guest"
-
-                                # Parse occupancy_details if it's a string
-                                adults = 2
-                                if occupancy_details:
-                                    try:
-                                        if isinstance(occupancy_details, str):
-                                            occupancy_details = json.loads(occupancy_details)
-                                        adults = occupancy_details.get("adults_total", 2)
-                                    except:
-                                        adults = 2
-
-                                email_sent = await email_service.send_deposit_confirmation_email(
-                                    guest_email=guest_email,
-                                    guest_name=guest_name,
-                                    check_in_date=check_in_date,
-                                    check_out_date=check_out_date,
-                                    room_name=room_name,
-                                    room_count=number_of_rooms or 1,
-                                    adults=adults,
-                                    caregiver=caregiver_required,
-                                    total_amount=total_amount,
-                                    deposit_amount=deposit_amount or total_amount,  # Fallback to total if no deposit
-                                    confirmation_number=confirmation_number
-                                )
-
-                                if email_sent:
-                                    logger.info(f"Fallback confirmation email sent successfully to {guest_email} for booking {booking_id}")
-                                    # Mark as sent
-                                    await db.execute(
-                                        text("UPDATE bookings SET confirmation_email_sent = TRUE WHERE id = :booking_id"),
-                                        {"booking_id": booking_id}
-                                    )
-                                else:
-                                    logger.error(f"Failed to send fallback confirmation email to {guest_email} for booking {booking_id}")
-
-                            except Exception as e:
-                                logger.error(f"Error processing fallback email for booking {booking_id}: {e}")
-
-                        await db.commit()
-                    else:
-                        logger.debug("No bookings found that need fallback confirmation emails")
-
-        except Exception as e:
-            logger.error(f"Booking confirmation fallback checker failed: {e}")
-
-        # Check every 10 minutes (much less frequent since this is just a fallback)
-        await asyncio.sleep(600)
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan context manager"""
@@ -173,6 +73,9 @@ async def lifespan(app: FastAPI):
         logger.warning("Application starting without database - some endpoints may not work")
         db_initialized = False
 
+    # Shared keep-alive client for IDS/PMS calls
+    await init_http_client()
+
     # Start IDS background sync if enabled
     if settings.IDS_ENABLE_BACKGROUND_SYNC:
         logger.info("Starting IDS background synchronization...")
@@ -181,11 +84,20 @@ async def lifespan(app: FastAPI):
         sync_task = None
         logger.info("IDS background sync disabled")
 
-    # Start booking confirmation fallback checker
-    logger.info("Starting booking confirmation fallback checker...")
-    notification_task = asyncio.create_task(booking_confirmation_fallback())
-    # Give the checker a moment to start
-    await asyncio.sleep(0.1)
+    # Background workers for queued inbound IDS pushes
+    if settings.IDS_ASYNC_INGESTION:
+        ids_ingest_queue.start()
+
+    # Deliver paid bookings to IDS and send confirmation emails outside the PayU webhook
+    if db_initialized:
+        payment_outbox.start()
+
+    # Keep the in-memory room type catalogues warm
+    for catalogue in room_type_catalogues:
+        catalogue.start()
+
+    # Email guests as soon as bookings are confirmed (LISTEN/NOTIFY, with a slow sweep as fallback)
+    confirmation_email_dispatcher.start()
 
     yield
 
@@ -198,12 +110,16 @@ async def lifespan(app: FastAPI):
         except asyncio.CancelledError:
             pass
 
-    if notification_task:
-        notification_task.cancel()
-        try:
-            await notification_task
-        except asyncio.CancelledError:
-            pass
+    await confirmation_email_dispatcher.stop()
+    await ids_ingest_queue.stop()
+    await payment_outbox.stop()
+    for catalogue in room_type_catalogues:
+        await catalogue.stop()
+
+    # Send any coalesced IDS pushes still waiting for their window
+    await ids_push_queue.drain()
+    await close_http_client()
+    await close_smtp_transport()
 
 # Create FastAPI app
 app = FastAPI(
@@ -319,6 +235,10 @@ async def api_root():
                 "detail": "/api/v1/rooms/{room_id}",
                 "categories": "/api/v1/room-categories"
             },
+            "availability": {
+                "calendar": "/api/v1/availability/calendar",
+                "flexible": "/api/v1/availability/flexible"
+            },
             "bookings": "/api/v1/bookings",
             "payments": "/api/v1/payments",
             "contact": "/api/v1/contact",
@@ -330,6 +250,7 @@ async def api_root():
 
 # API routes
 app.include_router(public.router, prefix="/api/v1", tags=["Public"])
+app.include_router(availability.router, prefix="/api/v1/availability", tags=["Availability"])
 app.include_router(bookings.router, prefix="/api/v1/bookings", tags=["Bookings"])
 app.include_router(payments.router, prefix="/api/v1/payments", tags=["Payments"])
 app.include_router(contact.router, prefix="/api/v1/contact", tags=["Contact"])
@@ -9,11 +9,15 @@ from app.models.room import Room
 from app.models.availability import RoomAvailability
 from app.models.pricing import PricingBand
 from app.models.booking import Booking, BookingStatus
+from app.models.occupancy import RoomNightOccupancy
 from app.models.payment import Payment, Refund
 from app.models.medical_form import MedicalForm, DoctorReview
 from app.models.cms import CmsPage, Article, PdfDownloadRequest
 from app.models.notification import Notification, AuditLog, Integration
 from app.models.contact import ContactUs
+from app.models.queue import QueueStatus
+from app.models.ids_inbound import IDSInboundMessage, InboundMessageStatus
+from app.models.outbox import OutboxMessage, OutboxStatus
 
 # Export all models
 __all__ = [
@@ -29,6 +33,7 @@ __all__ = [
     # Booking flow
     "Booking",
     "BookingStatus",
+    "RoomNightOccupancy",
     "Payment",
     "Refund",
 
@@ -46,4 +51,15 @@ __all__ = [
     "AuditLog",
     "Integration",
     "ContactUs",
+
+    # Durable queues
+    "QueueStatus",
+
+    # IDS integration
+    "IDSInboundMessage",
+    "InboundMessageStatus",
+
+    # Outbox
+    "OutboxMessage",
+    "OutboxStatus",
 ]
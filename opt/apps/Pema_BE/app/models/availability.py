@@ -2,7 +2,7 @@
 Room Availability model for date-specific inventory management
 """
 
-from sqlalchemy import Column, Integer, String, Date, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Date, Boolean, DateTime, ForeignKey, UniqueConstraint
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
@@ -15,6 +15,8 @@ class RoomAvailability(Base):
     This table tracks how many rooms of each type are available on specific dates.
     """
     __tablename__ = "room_availability"
+    # One row per room type, night and rate plan; IDS inventory pushes upsert on this key
+    __table_args__ = (UniqueConstraint("room_code", "date", "rate_plan_code"),)
 
     # Primary key
     id = Column(Integer, primary_key=True, index=True)
@@ -37,8 +39,8 @@ class RoomAvailability(Base):
     min_length_of_stay = Column(Integer, nullable=True)  # Minimum nights
     max_length_of_stay = Column(Integer, nullable=True)  # Maximum nights
 
-    # Rate plan code (if availability is rate-plan specific)
-    rate_plan_code = Column(String(50), nullable=True, index=True)
+    # Rate plan code (if availability is rate-plan specific); '' when not, so the unique key applies
+    rate_plan_code = Column(String(50), nullable=False, default="", server_default="", index=True)
 
     # Source of this availability data (manual, ids_sync, etc.)
     source = Column(String(50), default="manual", nullable=False)
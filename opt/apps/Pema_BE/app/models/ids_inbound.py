@@ -0,0 +1,31 @@
+"""
+Inbound IDS message queue model
+"""
+
+from sqlalchemy import Column, String, DateTime, Index
+from sqlalchemy.sql import func
+
+from app.db.postgresql import Base
+from app.models.queue import QueueMessageMixin, QueueStatus
+
+# Same lifecycle as every durable queue row
+InboundMessageStatus = QueueStatus
+
+
+class IDSInboundMessage(QueueMessageMixin, Base):
+    """
+    Parsed IDS push waiting for (or done with) background processing.
+    One row per notification and room type, so rows of a partition are applied in id order.
+    The payload is the parsed notification restricted to this partition.
+    """
+    __tablename__ = "ids_inbound_messages"
+    __table_args__ = (Index("ix_ids_inbound_messages_claim", "status", "partition_key", "id"),)
+
+    message_type = Column(String(30), nullable=False)  # inventory, availability, booking, room_type_delta
+    echo_token = Column(String(100), nullable=True)
+    partition_key = Column(String(50), nullable=False)  # IDS room type code, or the message type
+
+    received_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<IDSInboundMessage(id={self.id}, type='{self.message_type}', partition='{self.partition_key}', status='{self.status}')>"
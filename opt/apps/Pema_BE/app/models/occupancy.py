@@ -0,0 +1,27 @@
+"""
+Per-night occupancy ledger model
+"""
+
+from sqlalchemy import Column, Integer, Date, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+
+from app.db.postgresql import Base
+
+
+class RoomNightOccupancy(Base):
+    """
+    Units of a room row held by active bookings on one night.
+    Maintained from booking state changes; see app/services/occupancy_ledger.py.
+    """
+    __tablename__ = "room_night_occupancy"
+    __table_args__ = (UniqueConstraint("room_id", "night"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    room_id = Column(Integer, ForeignKey("rooms.id"), nullable=False, index=True)
+    night = Column(Date, nullable=False, index=True)
+    units_held = Column(Integer, default=0, nullable=False)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<RoomNightOccupancy(room_id={self.room_id}, night={self.night}, units_held={self.units_held})>"
@@ -0,0 +1,30 @@
+"""
+Transactional outbox model
+"""
+
+from sqlalchemy import Column, String, DateTime, Index
+from sqlalchemy.sql import func
+
+from app.db.postgresql import Base
+from app.models.queue import QueueMessageMixin, QueueStatus
+
+# Same lifecycle as every durable queue row
+OutboxStatus = QueueStatus
+
+
+class OutboxMessage(QueueMessageMixin, Base):
+    """
+    Side effect (IDS booking push, confirmation email) committed in the same transaction as
+    the payment that caused it and delivered later by the outbox workers.
+    Rows with the same aggregate_key are delivered one at a time in id order.
+    """
+    __tablename__ = "outbox_messages"
+    __table_args__ = (Index("ix_outbox_messages_claim", "status", "aggregate_key", "id"),)
+
+    kind = Column(String(30), nullable=False)  # payu_settlement, ids_booking, confirmation_email
+    aggregate_key = Column(String(64), nullable=False)  # e.g. payment:42
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<OutboxMessage(id={self.id}, kind='{self.kind}', key='{self.aggregate_key}', status='{self.status}')>"
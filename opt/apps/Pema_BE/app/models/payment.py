@@ -53,6 +53,7 @@ class Payment(Base):
     gateway = Column(String(20), nullable=False)  # razorpay, stripe, manual
     payment_intent_id = Column(String(255), nullable=True, index=True)  # Gateway payment ID
     payment_order_id = Column(String(255), nullable=True)  # Gateway order ID
+    txnid = Column(String(100), nullable=True, unique=True, index=True)  # PayU txnid, used for callback lookups
     
     # Amount and currency
     amount = Column(Integer, nullable=False)  # Amount in INR rupees
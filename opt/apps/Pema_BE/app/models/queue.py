@@ -0,0 +1,32 @@
+"""
+Shared columns for durable work queue tables
+"""
+
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON
+from sqlalchemy.sql import func
+from enum import Enum
+
+
+class QueueStatus(str, Enum):
+    PENDING = "pending"
+    PROCESSING = "processing"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class QueueMessageMixin:
+    """
+    Delivery state of one queued row, driven by app.services.durable_queue.
+    Each table adds its own kind, ordering key and creation timestamp columns.
+    """
+    id = Column(Integer, primary_key=True, index=True)
+
+    payload = Column(JSON, nullable=False)
+
+    status = Column(String(20), default=QueueStatus.PENDING.value, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text, nullable=True)
+
+    available_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    processed_at = Column(DateTime(timezone=True), nullable=True)
@@ -130,6 +130,8 @@ class BookingEstimateResponse(BaseModel):
     alternative_rooms: List[int] = []
     # Selected room ids (when multiple rooms requested)
     room_ids: List[int] = []
+    # True when served from the estimate cache
+    from_cache: bool = False
 
 
 # Booking creation
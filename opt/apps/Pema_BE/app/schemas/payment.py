@@ -173,6 +173,19 @@ class PaymentListResponse(BaseModel):
         from_attributes = True
 
 
+class PaymentSettlementResponse(BaseModel):
+    """Where a PayU payment stands after the browser returns from the gateway.
+
+    The webhook only records the callback; booking_id appears once the outbox has
+    settled the payment and, for payment-first flows, created the booking.
+    """
+    txnid: str
+    payment_id: int
+    status: str
+    booking_id: Optional[int] = None
+    settled: bool
+
+
 # Refund processing
 class RefundRequest(BaseModel):
     payment_id: int = Field(..., gt=0)
@@ -4,7 +4,7 @@ Room schemas for request/response validation
 
 from pydantic import BaseModel, Field, validator
 from typing import Optional, List, Dict, Any
-from datetime import datetime
+from datetime import date, datetime
 
 from app.models.room import RoomCategory
 
@@ -246,3 +246,34 @@ class RoomAvailabilityByCategory(BaseModel):
     category: str
     available_units: int
     total_inventory: int
+
+
+class NightAvailability(BaseModel):
+    date: date
+    available_units: int
+
+
+class CategoryAvailabilityCalendar(BaseModel):
+    category: str
+    total_inventory: int
+    nights: List[NightAvailability]
+
+
+class AvailabilityCalendarResponse(BaseModel):
+    from_date: date
+    to_date: date
+    categories: List[CategoryAvailabilityCalendar]
+
+
+class FlexibleStayOption(BaseModel):
+    check_in_date: date
+    check_out_date: date
+    available_units: int
+    total_price: int
+    per_night_average: int
+
+
+class FlexibleStaySearchResponse(BaseModel):
+    category: str
+    nights: int
+    options: List[FlexibleStayOption]
@@ -2,6 +2,6 @@
 Services package
 """
 
-from . import booking, pricing
+from . import booking, occupancy_ledger, pricing
 
-__all__ = ["booking", "pricing"]
+__all__ = ["booking", "occupancy_ledger", "pricing"]
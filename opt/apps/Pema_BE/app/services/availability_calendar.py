@@ -0,0 +1,234 @@
+"""
+Availability calendar service
+Per-night available units for every pricing category, computed in one pass over the
+occupancy ledger and cached in Redis per calendar month
+"""
+
+from sqlalchemy import select, and_, event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from datetime import date, timedelta
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import logging
+
+from app.core.config import settings
+from app.db.redis import cache, availability_calendar_cache_key
+from app.models import Room, RoomNightOccupancy
+from app.services.booking import BookingService
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = "availability:generation"
+GENERATION_TTL = 7 * 24 * 3600
+
+# Longest range served by one calendar request
+MAX_CALENDAR_DAYS = 366
+
+# category -> {"total_inventory": int, "available": [units per night],
+#              "rooms": {room id (str, as JSON keys are): [units per night for that room row]}}
+CategoryNights = Dict[str, dict]
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def next_month(day: date) -> date:
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def month_buckets(from_date: date, to_date: date) -> List[date]:
+    """First day of every calendar month touched by [from_date, to_date)"""
+    months = []
+    month = month_start(from_date)
+    while month < to_date:
+        months.append(month)
+        month = next_month(month)
+    return months
+
+
+def sliding_window_min(values: List[int], width: int) -> List[int]:
+    """Minimum of every window values[i:i + width], in O(len(values)) with a monotonic deque"""
+    minimums: List[int] = []
+    window: deque = deque()
+    for i, value in enumerate(values):
+        while window and values[window[-1]] >= value:
+            window.pop()
+        window.append(i)
+        if window[0] <= i - width:
+            window.popleft()
+        if i >= width - 1:
+            minimums.append(values[window[0]])
+    return minimums
+
+
+class AvailabilityCalendarService:
+    """Per-night availability by pricing category"""
+
+    def __init__(self, db: AsyncSession, cache_manager=cache):
+        self.db = db
+        self.cache = cache_manager
+
+    async def nightly_availability(self, from_date: date, to_date: date) -> CategoryNights:
+        """Available units per category for each night in [from_date, to_date).
+
+        One query for rooms and one for the ledger rows in range; nights are filled
+        in a single pass, so cost does not depend on the number of rooms per night.
+        """
+        days = (to_date - from_date).days
+        rooms = (await self.db.execute(
+            select(Room).where(and_(Room.is_active == True, Room.maintenance_mode == False))
+        )).scalars().all()
+        held = await self.db.execute(
+            select(RoomNightOccupancy.room_id, RoomNightOccupancy.night, RoomNightOccupancy.units_held).where(
+                and_(RoomNightOccupancy.night >= from_date, RoomNightOccupancy.night < to_date)
+            )
+        )
+
+        booking_service = BookingService(self.db)
+        categories: CategoryNights = {}
+        room_category: Dict[int, Tuple[str, int]] = {}
+        for room in rooms:
+            category = room.pricing_category or booking_service._infer_pricing_category(room)
+            inventory = room.inventory_count or 0
+            entry = categories.setdefault(category, {"total_inventory": 0, "available": [0] * days, "rooms": {}})
+            entry["total_inventory"] += inventory
+            entry["rooms"][str(room.id)] = [inventory] * days
+            room_category[room.id] = (category, inventory)
+            for i in range(days):
+                entry["available"][i] += inventory
+
+        for room_id, night, units in held.all():
+            if room_id not in room_category or not units:
+                continue
+            category, inventory = room_category[room_id]
+            i = (night - from_date).days
+            # A room row can never contribute less than zero units
+            taken = min(units, inventory)
+            categories[category]["available"][i] -= taken
+            categories[category]["rooms"][str(room_id)][i] -= taken
+        return categories
+
+    async def calendar(self, from_date: date, to_date: date, category: Optional[str] = None) -> CategoryNights:
+        """Nightly availability for [from_date, to_date), served from month buckets"""
+        months = month_buckets(from_date, to_date)
+        generation = await self.cache.get(GENERATION_KEY, 0)
+        buckets: Dict[date, CategoryNights] = {}
+        for month in months:
+            cached = await self.cache.get(availability_calendar_cache_key(generation, month.strftime("%Y-%m")))
+            if cached is not None:
+                buckets[month] = cached
+
+        missing = [month for month in months if month not in buckets]
+        if missing:
+            # One pass over the span of all missing months, then split into buckets
+            span_start, span_end = missing[0], next_month(missing[-1])
+            nights = await self.nightly_availability(span_start, span_end)
+            for month in missing:
+                offset, length = (month - span_start).days, (next_month(month) - month).days
+                buckets[month] = {
+                    name: {
+                        "total_inventory": entry["total_inventory"],
+                        "available": entry["available"][offset:offset + length],
+                        "rooms": {room: units[offset:offset + length] for room, units in entry["rooms"].items()},
+                    }
+                    for name, entry in nights.items()
+                }
+                await self.cache.set(
+                    availability_calendar_cache_key(generation, month.strftime("%Y-%m")),
+                    buckets[month],
+                    ttl=settings.AVAILABILITY_CALENDAR_CACHE_TTL_SECONDS,
+                )
+
+        names = sorted({name for bucket in buckets.values() for name in bucket if not category or name == category})
+        result: CategoryNights = {name: {"total_inventory": 0, "available": [], "rooms": {}} for name in names}
+        filled = 0
+        for month in months:
+            first = max(from_date, month)
+            last = min(to_date, next_month(month))
+            start, stop = (first - month).days, (last - month).days
+            for name in names:
+                # Buckets cached before a room change may lack a category or room; it had no units then
+                entry = buckets[month].get(name) or {"total_inventory": 0, "available": [0] * (stop - start), "rooms": {}}
+                result[name]["total_inventory"] = max(result[name]["total_inventory"], entry["total_inventory"])
+                result[name]["available"].extend(entry["available"][start:stop])
+                rooms = result[name]["rooms"]
+                for room, units in entry["rooms"].items():
+                    rooms.setdefault(room, [0] * filled).extend(units[start:stop])
+                for units in rooms.values():
+                    units.extend([0] * (filled + stop - start - len(units)))
+            filled += stop - start
+        return result
+
+    async def stay_windows(
+        self,
+        category: str,
+        nights: int,
+        from_date: date,
+        horizon_days: int,
+        rooms: int = 1,
+    ) -> List[Tuple[date, int]]:
+        """Check-in dates within the horizon where `rooms` units stay free for all `nights`.
+
+        A unit has to stay on one room row for the whole stay, so the sliding-window minimum
+        is taken per row and then summed; the category's nightly totals are only an upper
+        bound. Returns (check_in, units free for the whole stay) per feasible date.
+        """
+        to_date = from_date + timedelta(days=horizon_days + nights - 1)
+        calendar = await self.calendar(from_date, to_date, category)
+        if category not in calendar:
+            return []
+        per_room = [sliding_window_min(units, nights) for units in calendar[category]["rooms"].values()]
+        totals = [sum(column) for column in zip(*per_room)]
+        return [
+            (from_date + timedelta(days=i), units)
+            for i, units in enumerate(totals)
+            if units >= rooms
+        ]
+
+
+class AvailabilityCalendarCache:
+    """Generation counter shared by all workers; bumping it retires every cached month"""
+
+    def __init__(self, cache_manager=cache):
+        self.cache = cache_manager
+        self._pending: set = set()
+
+    async def invalidate(self) -> None:
+        await self.cache.increment(GENERATION_KEY, ttl=GENERATION_TTL)
+
+    def invalidate_soon(self) -> None:
+        """Schedule invalidation from sync code (ORM events) on the running loop"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        task = loop.create_task(self.invalidate())
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+
+# Global calendar cache invalidator
+availability_calendar_cache = AvailabilityCalendarCache()
+
+
+@event.listens_for(Session, "after_flush")
+def _track_calendar_inputs(session, flush_context):
+    """Rooms change inventory/categories; ledger writes are flagged by the occupancy ledger hook"""
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Room):
+            session.info["availability_changed"] = True
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_calendar_on_commit(session):
+    if session.info.pop("availability_changed", False):
+        availability_calendar_cache.invalidate_soon()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_calendar_inputs_on_rollback(session):
+    session.info.pop("availability_changed", None)
@@ -4,11 +4,13 @@ Booking service for business logic
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, or_, func
-from typing import Optional, List
+from typing import Dict, Optional, List, Tuple
 from datetime import date, datetime
+import asyncio
 import logging
+import time
 
-from app.models import Booking, Room, Program, User, BookingStatus
+from app.models import Booking, Room, Program, User, RoomNightOccupancy
 from app.core.exceptions import BookingError, ValidationError
 from app.core.config import settings
 from app.services.ids import IDSService
@@ -28,9 +30,14 @@ class BookingService:
         room_id: int,
         check_in_date: date,
         check_out_date: date,
-        exclude_booking_id: Optional[int] = None
+        exclude_booking_id: Optional[int] = None,
+        deadline: Optional[float] = None
     ) -> bool:
-        """Check if room is available for the given dates - IDS ONLY"""
+        """Check if room is available for the given dates - IDS ONLY
+
+        `deadline` is a time.monotonic() value bounding the IDS call; it defaults to
+        IDS_AVAILABILITY_DEADLINE_SECONDS from now.
+        """
 
         # Get room inventory
         room = await self._get_room(room_id)
@@ -58,7 +65,8 @@ class BookingService:
                 room_code=room_code,
                 check_in_date=check_in_date,
                 check_out_date=check_out_date,
-                rate_plan_code=rate_plan_code
+                rate_plan_code=rate_plan_code,
+                deadline=deadline or time.monotonic() + settings.IDS_AVAILABILITY_DEADLINE_SECONDS
             )
 
             # If IDS returns empty responses, it means IDS is unavailable - consider unavailable
@@ -95,25 +103,94 @@ class BookingService:
         room = await self._get_room(room_id)
         if not room:
             return 0
-        stmt = select(func.count()).select_from(Booking).where(
-            and_(
-                Booking.room_id == room_id,
-                Booking.status.in_(
-                    [
-                        BookingStatus.RESERVED.value,
-                        BookingStatus.CONFIRMED.value,
-                        BookingStatus.CHECKED_IN.value,
-                        BookingStatus.DOCTOR_APPROVED.value,
-                    ]
-                ),
-                Booking.check_in_date < check_out_date,
-                Booking.check_out_date > check_in_date,
+        peak = await self.db.execute(
+            select(func.max(RoomNightOccupancy.units_held)).where(
+                and_(
+                    RoomNightOccupancy.room_id == room_id,
+                    RoomNightOccupancy.night >= check_in_date,
+                    RoomNightOccupancy.night < check_out_date,
+                )
+            )
+        )
+        return max(0, (room.inventory_count or 0) - (peak.scalar() or 0))
+
+    def _peak_units_held(self, check_in_date: date, check_out_date: date):
+        """Subquery of the most units held on any night of the stay, per room (occupancy ledger)"""
+        return (
+            select(
+                RoomNightOccupancy.room_id,
+                func.max(RoomNightOccupancy.units_held).label("peak"),
+            )
+            .where(
+                and_(
+                    RoomNightOccupancy.night >= check_in_date,
+                    RoomNightOccupancy.night < check_out_date,
+                )
             )
+            .group_by(RoomNightOccupancy.room_id)
+            .subquery()
+        )
+
+    async def get_remaining_units_by_room(
+        self,
+        check_in_date: date,
+        check_out_date: date,
+        room_ids: Optional[List[int]] = None,
+    ) -> List[Tuple[Room, int]]:
+        """Remaining units for every active room over the date range in one grouped query.
+
+        Rooms are outer-joined to the peak units held over the stay's nights in the
+        occupancy ledger, so rooms without bookings come back with their full inventory.
+        Results are ordered by room id.
+        """
+        peak = self._peak_units_held(check_in_date, check_out_date)
+        stmt = (
+            select(Room, func.coalesce(peak.c.peak, 0))
+            .outerjoin(peak, peak.c.room_id == Room.id)
+            .where(and_(Room.is_active == True, Room.maintenance_mode == False))
+            .order_by(Room.id)
         )
+        if room_ids is not None:
+            stmt = stmt.where(Room.id.in_(room_ids))
         result = await self.db.execute(stmt)
-        overlapping = result.scalar() or 0
-        remaining = max(0, (room.inventory_count or 0) - overlapping)
-        return remaining
+        return [
+            (room, max(0, (room.inventory_count or 0) - held))
+            for room, held in result.all()
+        ]
+
+    async def get_remaining_units_by_category(
+        self,
+        check_in_date: date,
+        check_out_date: date,
+    ) -> Dict[str, List[Tuple[Room, int]]]:
+        """Remaining units per room, grouped by brochure pricing category."""
+        groups: Dict[str, List[Tuple[Room, int]]] = {}
+        for room, remaining in await self.get_remaining_units_by_room(check_in_date, check_out_date):
+            category = room.pricing_category or self._infer_pricing_category(room)
+            groups.setdefault(category, []).append((room, remaining))
+        return groups
+
+    async def get_category_availability(
+        self,
+        pricing_category: str,
+        check_in_date: date,
+        check_out_date: date,
+    ) -> List[Tuple[Room, int]]:
+        """Remaining units for the rooms of one pricing category.
+
+        Rooms whose stored pricing_category matches take precedence; inferred
+        categories are only used when no room carries the category explicitly.
+        """
+        units = await self.get_remaining_units_by_room(check_in_date, check_out_date)
+        direct = [(room, remaining) for room, remaining in units if room.pricing_category == pricing_category]
+        if direct:
+            return direct
+        logger.warning(f"No direct pricing_category matches for {pricing_category}, falling back to inference")
+        return [
+            (room, remaining)
+            for room, remaining in units
+            if (room.pricing_category or self._infer_pricing_category(room)) == pricing_category
+        ]
 
     async def find_rooms_by_pricing_category(self, pricing_category: str) -> List[Room]:
         """Return active rooms mapped to the given brochure pricing category."""
@@ -152,11 +229,9 @@ class BookingService:
         check_out_date: date
     ) -> int:
         """Count available rooms within a brochure pricing category for dates."""
-        rooms = await self.find_rooms_by_pricing_category(pricing_category)
+        units = await self.get_category_availability(pricing_category, check_in_date, check_out_date)
         total_remaining = 0
-        for room in rooms:
-            # For now, keep the individual queries but add logging to identify slow ones
-            remaining = await self.get_remaining_units(room.id, check_in_date, check_out_date)
+        for room, remaining in units:
             total_remaining += remaining
             logger.debug(f"Room {room.id} ({room.name}): {remaining} units remaining")
         logger.info(f"Total available units for {pricing_category}: {total_remaining}")
@@ -170,12 +245,11 @@ class BookingService:
         count: int = 1
     ) -> List[Room]:
         """Pick up to 'count' available rooms in the category for the given dates."""
-        rooms = await self.find_rooms_by_pricing_category(pricing_category)
+        units = await self.get_category_availability(pricing_category, check_in_date, check_out_date)
         picked: List[Room] = []
-        for room in rooms:
+        for room, remaining in units:
             if len(picked) >= count:
                 break
-            remaining = await self.get_remaining_units(room.id, check_in_date, check_out_date)
             while remaining > 0 and len(picked) < count:
                 picked.append(room)
                 remaining -= 1
@@ -209,14 +283,77 @@ class BookingService:
         result = await self.db.execute(stmt)
         rooms = result.scalars().all()
         
-        # Check availability for each room
-        available_rooms = []
+        availability = await self.check_availability_many(rooms, check_in_date, check_out_date)
+        return [room.id for room in rooms if availability.get(room.id)]
+
+    async def check_availability_many(
+        self,
+        rooms: List[Room],
+        check_in_date: date,
+        check_out_date: date,
+        deadline: Optional[float] = None
+    ) -> Dict[int, bool]:
+        """Check several already-loaded rooms against IDS in as few round trips as possible
+
+        Rooms are grouped by IDS rate plan so each OTA_HotelAvailQueryRQ carries many
+        RoomStayCandidates without crossing room codes with other rooms' rate plans. Groups
+        (and chunks of IDS_AVAILABILITY_BATCH_ROOMS) are queried concurrently, bounded by
+        IDS_AVAILABILITY_CONCURRENCY, under one shared deadline. Per room the result matches
+        check_availability: unavailable unless IDS returned data and every night is open.
+        """
+        result = {room.id: False for room in rooms}
+        if not settings.IDS_BASE_URL:
+            logger.error("IDS integration not configured - cannot check availability")
+            return result
+
+        ids_service = IDSService()
+        batches: Dict[str, List[Tuple[int, str]]] = {}
         for room in rooms:
-            if await self.check_availability(room.id, check_in_date, check_out_date):
-                available_rooms.append(room.id)
-        
-        return available_rooms
-    
+            if not room.code:
+                logger.error(f"Room {room.id} has no IDS code configured")
+                continue
+            rate_plan_code = ids_service._map_rate_plan_code(room.pricing_category or self._infer_pricing_category(room))
+            batches.setdefault(rate_plan_code, []).append((room.id, ids_service._map_room_code(room.code)))
+
+        size = max(1, settings.IDS_AVAILABILITY_BATCH_ROOMS)
+        queries = [
+            (rate_plan_code, members[start:start + size])
+            for rate_plan_code, members in batches.items()
+            for start in range(0, len(members), size)
+        ]
+        if not queries:
+            return result
+
+        deadline = deadline or time.monotonic() + settings.IDS_AVAILABILITY_DEADLINE_SECONDS
+        semaphore = asyncio.Semaphore(max(1, settings.IDS_AVAILABILITY_CONCURRENCY))
+
+        async def _query(rate_plan_code: str, members: List[Tuple[int, str]]) -> None:
+            query = AvailabilityQuery(
+                room_codes=list(dict.fromkeys(code for _, code in members)),
+                rate_plan_codes=[rate_plan_code],
+                start_date=check_in_date,
+                end_date=check_out_date
+            )
+            async with semaphore:
+                ids_responses = await ids_service.check_availability(query, deadline=deadline)
+
+            by_code: Dict[str, List[bool]] = {}
+            for resp in ids_responses:
+                by_code.setdefault(resp.room_code, []).append(resp.available)
+            for room_id, room_code in members:
+                nights = by_code.get(room_code)
+                if not nights:
+                    logger.error(f"No IDS responses for room code {room_code}")
+                    continue
+                result[room_id] = all(nights)
+
+        await asyncio.gather(*(_query(rate_plan_code, members) for rate_plan_code, members in queries))
+        logger.info(
+            f"Checked {len(rooms)} rooms against IDS in {len(queries)} availability queries "
+            f"for {check_in_date} to {check_out_date}"
+        )
+        return result
+
     async def validate_booking_dates(
         self,
         check_in_date: date,
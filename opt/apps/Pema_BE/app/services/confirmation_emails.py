@@ -0,0 +1,275 @@
+"""
+Booking confirmation email dispatcher
+LISTENs on the booking_confirmed channel (fed by the notify_booking_confirmation trigger)
+over a dedicated asyncpg connection and emails guests within seconds of confirmation; a
+low-frequency sweep catches anything missed while the listener was down. Every sender
+claims the booking's confirmation_email_sent flag first, so each guest gets one email
+even with several app instances listening
+"""
+
+from sqlalchemy import select, update, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Set
+import asyncio
+import json
+import logging
+import time
+
+from app.core.config import settings
+from app.core.latency import LatencyWindow
+from app.db.postgresql import AsyncSessionLocal
+from app.models import Booking, Room
+from app.models.booking import BookingStatus
+from app.services.email import EmailService
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "booking_confirmed"
+
+# Bookings created from a PayU payment; their email is an outbox step (see payment_outbox)
+PAYMENT_BOOKING_PREFIX = "PAY-"
+
+
+async def claim_confirmation_email(
+    db: AsyncSession,
+    booking_id: int,
+    include_payment_bookings: bool = True,
+    confirmed_only: bool = True,
+) -> bool:
+    """Atomically mark a booking's email as sent; False if someone else already did.
+
+    Commits the session. The payment outbox passes confirmed_only=False because a paid
+    booking may be reserved or awaiting medical review rather than confirmed.
+    """
+    conditions = [
+        Booking.id == booking_id,
+        or_(Booking.confirmation_email_sent.is_(False), Booking.confirmation_email_sent.is_(None)),
+    ]
+    if confirmed_only:
+        conditions.append(Booking.status == BookingStatus.CONFIRMED.value)
+    if not include_payment_bookings:
+        conditions.append(or_(
+            Booking.ids_booking_reference.is_(None),
+            ~Booking.ids_booking_reference.startswith(PAYMENT_BOOKING_PREFIX),
+        ))
+    result = await db.execute(
+        update(Booking).where(*conditions).values(confirmation_email_sent=True).returning(Booking.id)
+    )
+    claimed = result.scalar_one_or_none() is not None
+    await db.commit()
+    return claimed
+
+
+async def release_confirmation_email(db: AsyncSession, booking_id: int) -> None:
+    """Undo a claim after a failed send so the sweep retries it"""
+    await db.execute(update(Booking).where(Booking.id == booking_id).values(confirmation_email_sent=False))
+    await db.commit()
+
+
+def _pg_dsn() -> str:
+    return (
+        f"postgresql://{settings.POSTGRES_USER}:{settings.POSTGRES_PASSWORD}"
+        f"@{settings.POSTGRES_SERVER}:{settings.POSTGRES_PORT}/{settings.POSTGRES_DB}"
+    )
+
+
+class ConfirmationEmailDispatcher:
+    """NOTIFY-driven queue of confirmation emails with bounded send concurrency"""
+
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        concurrency: Optional[int] = None,
+        sweep_seconds: Optional[float] = None,
+        listen: Optional[bool] = None,
+    ):
+        self.session_factory = session_factory
+        self.concurrency = concurrency or settings.CONFIRMATION_EMAIL_CONCURRENCY
+        self.sweep_seconds = sweep_seconds or settings.CONFIRMATION_EMAIL_SWEEP_SECONDS
+        self.listen = settings.CONFIRMATION_EMAIL_LISTEN if listen is None else listen
+        self.queue: Optional[asyncio.Queue] = None
+        self._queued: Set[int] = set()
+        self._tasks: List[asyncio.Task] = []
+        self._connection = None
+        self.latency = LatencyWindow("confirmation_email")
+        self.notifications = 0
+        self.swept = 0
+        self.sent = 0
+        self.skipped = 0
+        self.failed = 0
+        self.listener_reconnects = 0
+
+    def enqueue(self, booking_id: int, from_notification: bool = False) -> bool:
+        if self.queue is None or booking_id in self._queued:
+            return False
+        self._queued.add(booking_id)
+        self.queue.put_nowait((booking_id, from_notification, time.monotonic()))
+        return True
+
+    def _on_notify(self, connection, pid: int, channel: str, payload: str) -> None:
+        """asyncpg listener callback; runs on the event loop, so it only queues"""
+        self.notifications += 1
+        try:
+            booking_id = int(json.loads(payload)["booking_id"])
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring malformed {channel} payload {payload!r}: {e}")
+            return
+        self.enqueue(booking_id, from_notification=True)
+
+    async def _listen_loop(self) -> None:
+        """Hold one LISTEN connection open, reconnecting with backoff; sweep after each reconnect"""
+        import asyncpg
+
+        delay = 1.0
+        while True:
+            try:
+                self._connection = await asyncpg.connect(_pg_dsn())
+                await self._connection.add_listener(CHANNEL, self._on_notify)
+                logger.info(f"Listening for {CHANNEL} notifications")
+                delay = 1.0
+                if self.listener_reconnects:
+                    # Notifications sent while we were disconnected are lost
+                    await self.sweep()
+                while not self._connection.is_closed():
+                    await asyncio.sleep(settings.CONFIRMATION_EMAIL_LISTEN_CHECK_SECONDS)
+                logger.warning(f"{CHANNEL} listener connection closed")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"{CHANNEL} listener error: {e}")
+            finally:
+                if self._connection is not None and not self._connection.is_closed():
+                    await self._connection.close()
+                self._connection = None
+            self.listener_reconnects += 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 60.0)
+
+    async def sweep(self) -> int:
+        """Queue confirmed bookings still without an email (the safety net for missed notifications)"""
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.CONFIRMATION_EMAIL_SWEEP_MIN_AGE_SECONDS)
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(Booking.id)
+                .where(
+                    Booking.status == BookingStatus.CONFIRMED.value,
+                    or_(Booking.confirmation_email_sent.is_(False), Booking.confirmation_email_sent.is_(None)),
+                    Booking.created_at < cutoff,
+                )
+                # Newest first: bookings whose email keeps failing are released back to the
+                # sweep, and oldest-first would let a batch of them starve every newer one
+                .order_by(Booking.created_at.desc())
+                .limit(settings.CONFIRMATION_EMAIL_SWEEP_BATCH)
+            )
+            booking_ids = list(result.scalars().all())
+        queued = sum(1 for booking_id in booking_ids if self.enqueue(booking_id))
+        self.swept += queued
+        if queued:
+            logger.info(f"Confirmation email sweep queued {queued} bookings")
+        return queued
+
+    async def _sweep_loop(self) -> None:
+        while True:
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.error(f"Confirmation email sweep failed: {e}")
+            await asyncio.sleep(self.sweep_seconds)
+
+    async def deliver(self, booking_id: int, from_notification: bool = False) -> bool:
+        """Claim and send one booking's confirmation email; True if this call sent it"""
+        async with self.session_factory() as db:
+            # Payment bookings are emailed by the payment outbox; only the sweep backs that up
+            if not await claim_confirmation_email(db, booking_id, include_payment_bookings=not from_notification):
+                self.skipped += 1
+                return False
+            booking = await db.get(Booking, booking_id)
+            room = await db.get(Room, booking.room_id)
+            guest_name = f"{booking.guest_first_name or ''} {booking.guest_last_name or ''}".strip() or "Valued Guest"
+            occupancy = booking.occupancy_details
+            if isinstance(occupancy, str):
+                occupancy = json.loads(occupancy)
+            try:
+                email_sent = await EmailService().send_deposit_confirmation_email(
+                    guest_email=booking.guest_email,
+                    guest_name=guest_name,
+                    check_in_date=booking.check_in_date,
+                    check_out_date=booking.check_out_date,
+                    room_name=room.name if room else "",
+                    room_count=booking.number_of_rooms or 1,
+                    adults=(occupancy or {}).get("adults_total", 2),
+                    caregiver=booking.caregiver_required,
+                    total_amount=booking.total_amount,
+                    deposit_amount=booking.deposit_amount or booking.total_amount,  # Fallback to total if no deposit
+                    confirmation_number=booking.confirmation_number,
+                )
+            except Exception as e:
+                logger.error(f"Confirmation email for booking {booking_id} raised: {e}")
+                email_sent = False
+            if not email_sent:
+                await release_confirmation_email(db, booking_id)
+                self.failed += 1
+                logger.error(f"Failed to send confirmation email for booking {booking_id}; the sweep will retry")
+                return False
+        self.sent += 1
+        logger.info(f"Confirmation email sent for booking {booking_id} ({'notify' if from_notification else 'sweep'})")
+        return True
+
+    async def _worker(self) -> None:
+        while True:
+            booking_id, from_notification, queued_at = await self.queue.get()
+            try:
+                # Let the confirming transaction finish its follow-up writes (confirmation number)
+                wait = queued_at + settings.CONFIRMATION_EMAIL_SETTLE_SECONDS - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                if await self.deliver(booking_id, from_notification):
+                    self.latency.record(time.monotonic() - queued_at)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Confirmation email worker error for booking {booking_id}: {e}")
+            finally:
+                self._queued.discard(booking_id)
+                self.queue.task_done()
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self.queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        self._tasks.append(asyncio.create_task(self._sweep_loop()))
+        if self.listen:
+            self._tasks.append(asyncio.create_task(self._listen_loop()))
+        logger.info(f"Started confirmation email dispatcher ({self.concurrency} senders, listen={self.listen})")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        self.queue = None
+        self._queued.clear()
+
+    def stats(self) -> dict:
+        return {
+            "listening": self._connection is not None and not self._connection.is_closed(),
+            "queued": len(self._queued),
+            "notifications": self.notifications,
+            "swept": self.swept,
+            "sent": self.sent,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "listener_reconnects": self.listener_reconnects,
+            "queue_to_sent": self.latency.stats(),
+        }
+
+
+# Global confirmation email dispatcher instance
+confirmation_email_dispatcher = ConfirmationEmailDispatcher()
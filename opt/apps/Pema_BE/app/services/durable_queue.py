@@ -0,0 +1,267 @@
+"""
+Durable work queue
+Rows in a QueueMessageMixin table are claimed oldest first with FOR UPDATE SKIP LOCKED, one
+open row at a time per ordering key, delivered by a pool of background workers, retried
+with capped exponential backoff and requeued by housekeeping when a worker dies mid-row.
+The IDS ingest queue and the payment outbox are subclasses
+"""
+
+from abc import ABC, abstractmethod
+from sqlalchemy import select, update, delete, func, exists, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+import asyncio
+import logging
+import time
+
+from app.core.config import settings
+from app.db.postgresql import AsyncSessionLocal
+from app.models.queue import QueueStatus
+
+logger = logging.getLogger(__name__)
+
+OPEN_STATUSES = (QueueStatus.PENDING.value, QueueStatus.PROCESSING.value)
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def aware(value: datetime) -> datetime:
+    """SQLite returns naive UTC timestamps"""
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+class QueueStats:
+    """Worker-side counters for this process"""
+
+    def __init__(self, done_label: str, latency_label: str):
+        self.done_label = done_label
+        self.latency_label = latency_label
+        self.done = 0
+        self.failed = 0
+        self.retried = 0
+        self.latency_seconds = 0.0
+        self.max_latency_seconds = 0.0
+        self.processing_seconds = 0.0
+
+    def record(self, latency: float, processing: float) -> None:
+        self.done += 1
+        self.latency_seconds += latency
+        self.max_latency_seconds = max(self.max_latency_seconds, latency)
+        self.processing_seconds += processing
+
+    def to_dict(self) -> dict:
+        return {
+            self.done_label: self.done,
+            "failed": self.failed,
+            "retried": self.retried,
+            f"avg_{self.latency_label}_ms": round(self.latency_seconds * 1000 / self.done, 1) if self.done else None,
+            f"max_{self.latency_label}_ms": round(self.max_latency_seconds * 1000, 1),
+            "avg_processing_ms": round(self.processing_seconds * 1000 / self.done, 1) if self.done else None,
+        }
+
+
+class DurableQueue(ABC):
+    """Claim/retry/housekeeping loop over one queue table plus its worker pool.
+
+    Subclasses name the table and its columns, the settings prefix ({prefix}_WORKERS,
+    _POLL_SECONDS, _MAX_ATTEMPTS, _MAX_BACKOFF_SECONDS, _STALE_SECONDS, _RETENTION_DAYS)
+    and implement deliver().
+    """
+
+    model: Any = None
+    key_column = ""  # rows sharing this value are delivered one at a time in id order
+    kind_column = ""
+    created_column = ""
+    settings_prefix = ""
+    label = ""  # log and worker name
+    done_label = "processed"
+    latency_label = "latency"
+    lag_label = "processing_lag_seconds"
+
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        workers: Optional[int] = None,
+        poll_seconds: Optional[float] = None,
+        max_attempts: Optional[int] = None,
+    ):
+        self.session_factory = session_factory
+        self.worker_count = workers or self._setting("WORKERS")
+        self.poll_seconds = poll_seconds or self._setting("POLL_SECONDS")
+        self.max_attempts = max_attempts or self._setting("MAX_ATTEMPTS")
+        self.stats_counters = QueueStats(self.done_label, self.latency_label)
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._last_housekeeping = 0.0
+
+    def _setting(self, name: str) -> Any:
+        # Read on use so runtime overrides apply
+        return getattr(settings, f"{self.settings_prefix}_{name}")
+
+    @abstractmethod
+    async def deliver(self, session: AsyncSession, message: Any) -> None:
+        """Apply one row in `session`; the queue commits on success and retries on any exception"""
+
+    def notify(self) -> None:
+        """Wake the workers after the staging transaction has committed"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _claim(self) -> Optional[Any]:
+        """Take the oldest due row whose key has nothing older still open"""
+        model = self.model
+        earlier = aliased(model)
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(model)
+                .where(and_(
+                    model.status == QueueStatus.PENDING.value,
+                    model.available_at <= utcnow(),
+                    ~exists().where(and_(
+                        getattr(earlier, self.key_column) == getattr(model, self.key_column),
+                        earlier.id < model.id,
+                        earlier.status.in_(OPEN_STATUSES),
+                    )),
+                ))
+                .order_by(model.id)
+                .limit(1)
+                .with_for_update(skip_locked=True, of=model)
+            )
+            message = result.scalar_one_or_none()
+            if message is None:
+                return None
+            message.status = QueueStatus.PROCESSING.value
+            message.started_at = utcnow()
+            message.attempts += 1
+            await session.commit()
+            await session.refresh(message)
+            session.expunge(message)
+            return message
+
+    async def process_next(self) -> bool:
+        """Claim and deliver one row; False when nothing is due"""
+        message = await self._claim()
+        if message is None:
+            return False
+
+        started = time.perf_counter()
+        error = None
+        async with self.session_factory() as session:
+            try:
+                await self.deliver(session, message)
+                await session.commit()
+            except Exception as e:
+                await session.rollback()
+                error = e
+        processing = time.perf_counter() - started
+
+        kind = getattr(message, self.kind_column)
+        values: Dict[str, Any] = {"processed_at": utcnow()}
+        if error is None:
+            values["status"] = QueueStatus.DONE.value
+            created = aware(getattr(message, self.created_column))
+            self.stats_counters.record((values["processed_at"] - created).total_seconds(), processing)
+        elif message.attempts < self.max_attempts:
+            # Stays at the head of its key; later rows wait behind it
+            delay = min(2 ** message.attempts, self._setting("MAX_BACKOFF_SECONDS"))
+            values.update(
+                status=QueueStatus.PENDING.value,
+                last_error=str(error)[:2000],
+                available_at=utcnow() + timedelta(seconds=delay),
+            )
+            self.stats_counters.retried += 1
+            logger.warning(f"{self.label} {kind} {message.id} failed (attempt {message.attempts}), retrying in {delay}s: {error}")
+        else:
+            values.update(status=QueueStatus.FAILED.value, last_error=str(error)[:2000])
+            self.stats_counters.failed += 1
+            logger.error(f"{self.label} {kind} {message.id} failed permanently after {message.attempts} attempts: {error}")
+
+        async with self.session_factory() as session:
+            await session.execute(update(self.model).where(self.model.id == message.id).values(**values))
+            await session.commit()
+        return True
+
+    async def housekeeping(self) -> None:
+        """Requeue rows orphaned by a crashed worker and drop old finished rows"""
+        model = self.model
+        now = utcnow()
+        async with self.session_factory() as session:
+            stale = await session.execute(
+                update(model)
+                .where(and_(
+                    model.status == QueueStatus.PROCESSING.value,
+                    model.started_at < now - timedelta(seconds=self._setting("STALE_SECONDS")),
+                ))
+                .values(status=QueueStatus.PENDING.value)
+            )
+            await session.execute(
+                delete(model).where(and_(
+                    model.status == QueueStatus.DONE.value,
+                    model.processed_at < now - timedelta(days=self._setting("RETENTION_DAYS")),
+                ))
+            )
+            await session.commit()
+            if stale.rowcount:
+                logger.warning(f"Requeued {stale.rowcount} stale {self.label} rows")
+
+    async def _worker(self, number: int) -> None:
+        while True:
+            try:
+                if await self.process_next():
+                    continue
+                if number == 0 and time.monotonic() - self._last_housekeeping > self._setting("STALE_SECONDS"):
+                    self._last_housekeeping = time.monotonic()
+                    await self.housekeeping()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"{self.label} worker {number} error: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+                self._wakeup.clear()
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker(number)) for number in range(self.worker_count)]
+        logger.info(f"Started {self.worker_count} {self.label} workers")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        self._wakeup = None
+
+    async def stats(self, db: AsyncSession) -> dict:
+        """Depth per kind/status and lag from the table, counters from this worker process"""
+        model = self.model
+        kind_column = getattr(model, self.kind_column)
+        depth = await db.execute(
+            select(kind_column, model.status, func.count())
+            .where(model.status != QueueStatus.DONE.value)
+            .group_by(kind_column, model.status)
+        )
+        oldest = await db.scalar(
+            select(func.min(getattr(model, self.created_column))).where(model.status.in_(OPEN_STATUSES))
+        )
+        queue: Dict[str, Dict[str, int]] = {}
+        for kind, status, count in depth.all():
+            queue.setdefault(kind, {})[status] = count
+        return {
+            "workers": len(self._tasks),
+            "queue": queue,
+            self.lag_label: round((utcnow() - aware(oldest)).total_seconds(), 1) if oldest else 0.0,
+            **self.stats_counters.to_dict(),
+        }
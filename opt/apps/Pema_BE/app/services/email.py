@@ -4,7 +4,6 @@ Email Service for sending emails using Google SMTP
 Muhammad once tried to email a cloud, but it just evaporated!
 """
 
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from typing import Optional, Dict, Any
@@ -12,6 +11,7 @@ import logging
 from datetime import date
 
 from app.core.config import settings
+from app.core.smtp_pool import get_smtp_transport
 from typing import Optional
 
 logger = logging.getLogger(__name__)
@@ -350,18 +350,15 @@ pemawellness.com
         if not self.username or not self.password:
             raise ValueError("Gmail credentials not configured. Set GMAIL_USERNAME and GMAIL_APP_PASSWORD in .env file.")
 
-        try:
-            server = smtplib.SMTP(self.smtp_server, self.smtp_port)
-            server.starttls()
-            server.login(self.username, self.password)
-
-            # Build recipient list including CC
-            recipients = [msg['To']]
-            if msg.get('CC'):
-                recipients.append(msg['CC'])
+        # Build recipient list including CC
+        recipients = [msg['To']]
+        if msg.get('CC'):
+            recipients.append(msg['CC'])
 
-            server.send_message(msg, to_addrs=recipients)
-            server.quit()
+        try:
+            # Pooled, already-authenticated session; the SMTP I/O runs off the event loop
+            transport = get_smtp_transport(self.smtp_server, self.smtp_port)
+            await transport.send(msg, recipients, self.username, self.password)
         except Exception as e:
-            logger.error(f"SMTP error: {e}")
+            logger.error(f"SMTP error: {e!r}")
             raise
@@ -0,0 +1,149 @@
+"""
+Booking estimate result cache
+Caches /bookings/estimate responses in Redis under a versioned key per normalized request
+"""
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from typing import Optional
+import asyncio
+import hashlib
+import json
+import logging
+
+from app.core.config import settings
+from app.db.redis import cache, estimate_cache_key
+from app.models import PricingBand, Room
+from app.schemas.booking import BookingEstimateRequest
+from app.services.pricing_index import pricing_band_index
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = "estimate:generation"
+HITS_KEY = "estimate:stats:hits"
+MISSES_KEY = "estimate:stats:misses"
+STATS_TTL = 7 * 24 * 3600
+
+
+def normalize_estimate_request(estimate_data: BookingEstimateRequest) -> dict:
+    """Canonical form of an estimate request; fields that cannot change the result are dropped"""
+    data = estimate_data.model_dump(mode="json")
+    if data.get("occupancy"):
+        data["occupancy"]["children_ages"] = sorted(data["occupancy"]["children_ages"])
+    caregiver = estimate_data.caregiver_required or (
+        estimate_data.occupancy.caregiver_required if estimate_data.occupancy else False
+    )
+    if not caregiver:
+        data["caregiver_stay_with_guest"] = False
+        data["caregiver_meal"] = None
+        data["caregiver_room_pricing_category"] = None
+    elif estimate_data.caregiver_stay_with_guest:
+        data["caregiver_room_pricing_category"] = None
+    return data
+
+
+def request_hash(estimate_data: BookingEstimateRequest) -> str:
+    canonical = json.dumps(normalize_estimate_request(estimate_data), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def settings_fingerprint() -> str:
+    """Business settings the estimate depends on; a config change yields new cache keys"""
+    relevant = {
+        "caregiver_stay_with_guest": settings.CAREGIVER_STAY_WITH_GUEST_PRICE_INR,
+        "caregiver_meal": settings.CAREGIVER_MEAL_PRICE_INR,
+        "caregiver_separate_room": settings.CAREGIVER_SEPARATE_ROOM_PRICES_INR,
+        "minimum_stay": settings.MINIMUM_STAY_NIGHTS,
+        "deposit": settings.DEPOSIT_AMOUNT_INR,
+    }
+    return hashlib.sha256(json.dumps(relevant, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+class EstimateCache:
+    """Redis-backed estimate cache with versioned invalidation"""
+
+    def __init__(self, cache_manager=cache):
+        self.cache = cache_manager
+        self.hits = 0
+        self.misses = 0
+        self._pending: set = set()
+
+    async def version(self, db: AsyncSession) -> str:
+        """Combine the room/band write generation, pricing band fingerprint and settings"""
+        await pricing_band_index.ensure_fresh(db)
+        generation = await self.cache.get(GENERATION_KEY, 0)
+        material = json.dumps([generation, pricing_band_index.fingerprint, settings_fingerprint()], default=str)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()[:16]
+
+    async def get(self, estimate_data: BookingEstimateRequest, db: AsyncSession) -> Optional[dict]:
+        """Return the cached response payload, recording a hit or miss"""
+        if not settings.ESTIMATE_CACHE_ENABLED:
+            return None
+        key = estimate_cache_key(await self.version(db), request_hash(estimate_data))
+        payload = await self.cache.get(key)
+        if payload is None:
+            self.misses += 1
+            await self.cache.increment(MISSES_KEY, ttl=STATS_TTL)
+            return None
+        self.hits += 1
+        await self.cache.increment(HITS_KEY, ttl=STATS_TTL)
+        return payload
+
+    async def set(self, estimate_data: BookingEstimateRequest, payload: dict, db: AsyncSession) -> None:
+        if not settings.ESTIMATE_CACHE_ENABLED:
+            return
+        key = estimate_cache_key(await self.version(db), request_hash(estimate_data))
+        await self.cache.set(key, payload, ttl=settings.ESTIMATE_CACHE_TTL_SECONDS)
+
+    async def invalidate(self) -> None:
+        """Move every worker to a new key space; old entries expire via TTL"""
+        await self.cache.increment(GENERATION_KEY, ttl=STATS_TTL)
+
+    def invalidate_soon(self) -> None:
+        """Schedule invalidation from sync code (ORM events) on the running loop"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        task = loop.create_task(self.invalidate())
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def stats(self) -> dict:
+        hits = await self.cache.get(HITS_KEY, 0)
+        misses = await self.cache.get(MISSES_KEY, 0)
+        total = hits + misses
+        return {
+            "enabled": settings.ESTIMATE_CACHE_ENABLED,
+            "generation": await self.cache.get(GENERATION_KEY, 0),
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / total, 4) if total else None,
+            "process_hits": self.hits,
+            "process_misses": self.misses,
+        }
+
+
+# Global estimate cache instance
+estimate_cache = EstimateCache()
+
+
+@event.listens_for(Session, "after_flush")
+def _track_estimate_inputs(session, flush_context):
+    """Remember that this transaction wrote rooms or pricing bands"""
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, (Room, PricingBand)):
+            session.info["estimate_inputs_changed"] = True
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_estimates_on_commit(session):
+    if session.info.pop("estimate_inputs_changed", False):
+        estimate_cache.invalidate_soon()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_estimate_inputs_on_rollback(session):
+    session.info.pop("estimate_inputs_changed", None)
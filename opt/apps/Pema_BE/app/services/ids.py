@@ -12,6 +12,7 @@ from typing import List, Optional, Dict, Any
 from uuid import uuid4
 import logging
 import base64
+import time
 
 # Import anext for async generators (Python 3.10+ builtin, import for compatibility)
 try:
@@ -30,8 +31,13 @@ except NameError:
                 raise
 
 from app.core.config import settings
-from app.core.exceptions import ValidationError, BookingError
+from app.core.exceptions import ValidationError, BookingError, CircuitOpenError, DeadlineExceededError
+from app.core.circuit_breaker import CircuitBreakerRegistry, remaining_budget
+from app.core.http_client import get_http_client
 from app.services.ids_adapter import IDSAdapterService
+from app.services.ids_singleflight import ids_availability_flight
+from app.services.room_codes import room_codes
+from app.services.room_type_catalogue import RoomTypeCatalogue
 from app.models.ids import (
     OTAHotelAvailNotifRQ, OTAHotelAvailNotifRS,
     OTAHotelRatePlanNotifRQ, OTAHotelRatePlanNotifRS,
@@ -52,6 +58,17 @@ from app.db.postgresql import get_db
 
 logger = logging.getLogger(__name__)
 
+# Global per-endpoint circuit breakers for outbound IDS calls
+ids_circuit_breakers = CircuitBreakerRegistry(
+    window_seconds=settings.IDS_BREAKER_WINDOW_SECONDS,
+    minimum_calls=settings.IDS_BREAKER_MIN_CALLS,
+    failure_rate_threshold=settings.IDS_BREAKER_FAILURE_RATE,
+    slow_call_seconds=settings.IDS_BREAKER_SLOW_CALL_SECONDS,
+    slow_call_rate_threshold=settings.IDS_BREAKER_SLOW_CALL_RATE,
+    open_seconds=settings.IDS_BREAKER_OPEN_SECONDS,
+    half_open_max_calls=settings.IDS_BREAKER_HALF_OPEN_CALLS,
+)
+
 
 class IDSService:
     """Service for IDS Next ARI integration"""
@@ -62,12 +79,18 @@ class IDSService:
         self.hotel_code = settings.IDS_HOTEL_CODE
         self.api_key = settings.IDS_API_KEY
         self.api_secret = settings.IDS_API_SECRET
-        self.rate_plan_mapping = settings.IDS_RATE_PLAN_MAPPING or {}
-        self.room_code_mapping = settings.IDS_ROOM_CODE_MAPPING or {}
+        self.rate_plan_mapping = room_codes.rate_plan_mapping
+        self.room_code_mapping = room_codes.room_code_mapping
         self.timeout = 30.0
 
-    async def _make_request(self, endpoint: str, xml_data: str, max_retries: int = 3) -> str:
-        """Make HTTP request to IDS API with retry logic"""
+    async def _make_request(self, endpoint: str, xml_data: str, max_retries: int = 3,
+                            deadline: Optional[float] = None) -> str:
+        """Make HTTP request to IDS API with retry logic.
+
+        Calls go through the endpoint's circuit breaker and fail fast with CircuitOpenError
+        while it is open. `deadline` is a time.monotonic() value: each attempt's timeout is
+        capped by the remaining budget and retries that cannot fit are skipped.
+        """
         if not self.base_url:
             raise ValidationError("IDS integration not configured")
 
@@ -110,27 +133,33 @@ class IDSService:
         }
 
         last_exception = None
+        client = get_http_client()
+        breaker = ids_circuit_breakers.get(endpoint)
 
         for attempt in range(max_retries):
+            budget = remaining_budget(deadline)
+            if budget is not None and budget <= 0:
+                raise DeadlineExceededError("IDS", endpoint)
+            if not breaker.allow():
+                raise CircuitOpenError("IDS", endpoint, breaker.retry_in())
+
+            timeout = self.timeout if budget is None else min(self.timeout, budget)
+            started = time.monotonic()
+            failed = True
             try:
-                async with httpx.AsyncClient(timeout=self.timeout) as client:
-                    response = await client.post(url, content=xml_data, headers=headers)
-                    response.raise_for_status()
-                    return response.text
+                response = await client.post(url, content=xml_data, headers=headers, timeout=timeout)
+                # 4xx means the PMS answered; only 5xx counts against the breaker
+                failed = response.status_code >= 500
+                response.raise_for_status()
+                return response.text
 
             except httpx.TimeoutException as exc:
                 last_exception = exc
                 logger.warning(f"IDS API timeout (attempt {attempt + 1}/{max_retries}): {exc}")
-                if attempt < max_retries - 1:
-                    await asyncio.sleep(2 ** attempt)  # Exponential backoff
-                    continue
 
             except httpx.RequestError as exc:
                 last_exception = exc
                 logger.error(f"IDS API request failed (attempt {attempt + 1}/{max_retries}): {exc}")
-                if attempt < max_retries - 1:
-                    await asyncio.sleep(2 ** attempt)
-                    continue
 
             except httpx.HTTPStatusError as exc:
                 last_exception = exc
@@ -139,12 +168,20 @@ class IDSService:
                 # Don't retry on client errors (4xx), but retry on server errors (5xx)
                 if 400 <= exc.response.status_code < 500:
                     break
-                elif attempt < max_retries - 1:
-                    await asyncio.sleep(2 ** attempt)
-                    continue
+
+            finally:
+                breaker.record(failed, time.monotonic() - started)
+
+            if attempt < max_retries - 1:
+                backoff = 2 ** attempt  # Exponential backoff
+                budget = remaining_budget(deadline)
+                if budget is not None and budget <= backoff:
+                    logger.warning(f"IDS {endpoint} deadline leaves no room for retry {attempt + 2}/{max_retries}")
+                    break
+                await asyncio.sleep(backoff)
 
         # If we get here, all retries failed
-        error_msg = f"IDS API communication failed after {max_retries} attempts"
+        error_msg = f"IDS API communication failed after {attempt + 1} attempts"
         if last_exception:
             error_msg += f": {str(last_exception)}"
 
@@ -643,11 +680,11 @@ class IDSService:
 
     def _map_room_code(self, internal_code: str) -> str:
         """Map internal room code to IDS InvTypeCode"""
-        return self.room_code_mapping.get(internal_code, internal_code)
+        return room_codes.to_ids_room_code(internal_code)
 
     def _map_rate_plan_code(self, internal_category: str) -> str:
         """Map internal category to IDS RatePlanCode"""
-        return self.rate_plan_mapping.get(internal_category, internal_category)
+        return room_codes.to_ids_rate_plan(internal_category)
 
     async def update_availability(self, updates: List[AvailabilityUpdate]) -> OTAHotelAvailNotifRS:
         """Send availability updates to IDS"""
@@ -1030,7 +1067,9 @@ class IDSService:
 
         return response
 
-    async def check_availability_simple(self, room_code: str, check_in_date: date, check_out_date: date, rate_plan_code: Optional[str] = None) -> List[AvailabilityResponse]:
+    async def check_availability_simple(self, room_code: str, check_in_date: date, check_out_date: date,
+                                        rate_plan_code: Optional[str] = None,
+                                        deadline: Optional[float] = None) -> List[AvailabilityResponse]:
         """Check availability for a single room - simplified interface"""
         try:
             # Use default rate plan if not specified
@@ -1044,14 +1083,30 @@ class IDSService:
                 end_date=check_out_date
             )
 
-            return await self.check_availability(query)
+            return await self.check_availability(query, deadline=deadline)
 
         except Exception as e:
             logger.error(f"IDS simple availability check failed for room {room_code}: {e}")
             return []
 
-    async def check_availability(self, query: AvailabilityQuery) -> List[AvailabilityResponse]:
-        """Check availability for given criteria by querying IDS"""
+    async def check_availability(self, query: AvailabilityQuery,
+                                 deadline: Optional[float] = None) -> List[AvailabilityResponse]:
+        """Check availability for given criteria by querying IDS.
+
+        `deadline` (time.monotonic()) bounds the whole call including retries. Identical
+        concurrent queries share one IDS request (see ids_singleflight).
+        """
+        if not settings.IDS_AVAILABILITY_SINGLEFLIGHT_ENABLED:
+            return await self._query_availability(query, deadline)
+        # The shared request is not bound to whichever caller started it; each waiter gives
+        # up at its own deadline, so a tight budget never cuts a patient caller's answer short
+        return await ids_availability_flight.run(
+            query, lambda: self._query_availability(query), deadline=deadline
+        )
+
+    async def _query_availability(self, query: AvailabilityQuery,
+                                  deadline: Optional[float] = None) -> List[AvailabilityResponse]:
+        """Send one OTA_HotelAvailQueryRQ; errors are logged and reported as an empty list"""
         try:
             logger.info(f"🔍 Checking availability from IDS: {len(query.room_codes)} rooms, "
                        f"{len(query.rate_plan_codes)} rate plans, "
@@ -1061,7 +1116,7 @@ class IDSService:
             xml_request = self._create_availability_query_xml(query)
 
             # Send to IDS availability endpoint
-            xml_response = await self._make_request("availability", xml_request)
+            xml_response = await self._make_request("availability", xml_request, deadline=deadline)
 
             # Parse IDS response
             responses = self._parse_availability_response(xml_response, query)
@@ -1163,9 +1218,10 @@ class IDSService:
                         # Create response for each date in range
                         current_date = original_query.start_date
                         while current_date <= original_query.end_date:
+                            # Responses keep IDS codes; callers compare against _map_room_code()
                             response = AvailabilityResponse(
-                                room_code=self._reverse_map_room_code(room_code),
-                                rate_plan_code=self._reverse_map_rate_plan_code(rate_plan_code),
+                                room_code=room_code,
+                                rate_plan_code=rate_plan_code,
                                 date=current_date,
                                 available=is_available,
                                 restriction_type=restriction_type,
@@ -1206,24 +1262,6 @@ class IDSService:
                     current_date += timedelta(days=1)
         return responses
 
-    def _reverse_map_room_code(self, ids_code: str) -> str:
-        """Reverse map IDS room codes back to internal codes"""
-        reverse_mapping = {v: k for k, v in {
-            'EXT': 'EXT',
-            'DLX': 'DLX',
-            'STD': 'STD',
-        }.items()}
-        return reverse_mapping.get(ids_code, ids_code)
-
-    def _reverse_map_rate_plan_code(self, ids_code: str) -> str:
-        """Reverse map IDS rate plan codes back to internal codes"""
-        reverse_mapping = {v: k for k, v in {
-            'RACK': 'RACK',
-            'BAR': 'BAR',
-            'CORP': 'CORP',
-        }.items()}
-        return reverse_mapping.get(ids_code, ids_code)
-
     async def sync_availability_from_ids(self):
         """Sync availability data from IDS"""
         # This would periodically fetch availability from IDS
@@ -1242,6 +1280,10 @@ class IDSService:
         # Implementation would depend on IDS API capabilities
 
     async def get_room_types(self) -> dict:
+        """Room type catalogue from IDS, served from the in-memory catalogue cache"""
+        return await ids_room_type_catalogue.get()
+
+    async def fetch_room_types(self) -> dict:
         """Get room types from IDS - Room Type Service (RN_HotelRatePlanRQ)
 
         Follows IDS Next ARI specification exactly:
@@ -1309,8 +1351,12 @@ Version="1.2" EchoToken="{str(uuid4())}">
 
 
 
-    async def create_booking(self, booking_data: dict) -> dict:
-        """Create a booking in IDS system using direct XML posting"""
+    async def create_booking(self, booking_data: dict, send_email: bool = True) -> dict:
+        """Create a booking in IDS system using direct XML posting.
+
+        With send_email=False the booking is only stored locally; the caller sends the
+        confirmation (the payment outbox does so as its own retried step).
+        """
         # Muhammad once said XML is like a puzzle - fun until you lose a piece!
         try:
             logger.info(f"DIRECT XML BOOKING METHOD CALLED: {booking_data.get('unique_id', 'unknown')}")
@@ -1351,8 +1397,6 @@ Version="1.2" EchoToken="{str(uuid4())}">
                 logger.warning(f"📄 XML EchoToken: {token_match}")
 
             try:
-                import httpx
-
                 ids_url = "https://idscmsync-main.idsnext.com/ReceiveResFromCM/CM10017"
                 auth_header = f"Basic {base64.b64encode(f'{self.api_key}:{self.api_secret}'.encode()).decode()}"
 
@@ -1367,63 +1411,56 @@ Version="1.2" EchoToken="{str(uuid4())}">
                 logger.info(f"📄 XML length: {len(xml_content)} chars")
                 logger.info("Exact content sent to IDS:\n%s", xml_content)
 
-                async with httpx.AsyncClient(timeout=30.0) as client:
-                    response = await client.post(ids_url, content=xml_content, headers=headers)
-
-                    logger.info(f"📥 IDS Response Status: {response.status_code}")
-                    logger.info(f"📄 IDS Response Body: {response.text[:500]}...")
-
-                    # Check for success
-                    if response.status_code == 200:
-                        # If it's a success response from IDS, it might be just <Success /> or full XML
-                        # For ReceiveResFromCM, we consider HTTP 200 as basic success of receipt
-                        
-                        # Log full response only for errors or if explicitly needed
-                        # logger.info(f" FULL IDS RESPONSE BODY: {response.text}")
+                client = get_http_client()
+                response = await client.post(ids_url, content=xml_content, headers=headers, timeout=30.0)
+
+                logger.info(f"📥 IDS Response Status: {response.status_code}")
+                logger.info(f"📄 IDS Response Body: {response.text[:500]}...")
+
+                # Check for success
+                if response.status_code == 200:
+                    # If it's a success response from IDS, it might be just <Success /> or full XML
+                    # For ReceiveResFromCM, we consider HTTP 200 as basic success of receipt
+                    
+                    # Log full response only for errors or if explicitly needed
+                    # logger.info(f" FULL IDS RESPONSE BODY: {response.text}")
+                    
+                    is_success = False
+                    if "<Success></Success>" in response.text or "<Success/>" in response.text:
+                        is_success = True
+                    elif "ResStatus=\"Commit\"" in response.text and "<Errors>" not in response.text:
+                        is_success = True
                         
-                        is_success = False
-                        if "<Success></Success>" in response.text or "<Success/>" in response.text:
-                            is_success = True
-                        elif "ResStatus=\"Commit\"" in response.text and "<Errors>" not in response.text:
-                            is_success = True
-                            
-                        if is_success:
-                            logger.info(f" BOOKING SUCCESSFUL: {booking_data.get('unique_id')}")
-
-                            # Store booking data locally and send confirmation email
-                            await self._store_booking_locally_and_send_email(booking_data, booking_data)
+                    if is_success:
+                        logger.info(f" BOOKING SUCCESSFUL: {booking_data.get('unique_id')}")
 
-                            return BookingCreateResponse(
-                                success=True,
-                                booking_reference=booking_data.get('unique_id'),
-                                status='confirmed',
-                                message="Booking created successfully in IDS"
-                            ).model_dump()
+                        # Store booking data locally and send confirmation email
+                        await self._store_booking_locally_and_send_email(booking_data, booking_data, send_email=send_email)
 
-                    # Check for specific errors
-                    elif "Attempted to perform an unauthorized operation" in response.text:
-                        logger.error(" IDS Authorization Error - booking operations not enabled")
                         return BookingCreateResponse(
-                            success=False,
-                            error="IDS booking operations not authorized. Please contact IDS support.",
-                            booking_reference=booking_data.get('unique_id')
+                            success=True,
+                            booking_reference=booking_data.get('unique_id'),
+                            status='confirmed',
+                            message="Booking created successfully in IDS"
                         ).model_dump()
 
-                    else:
-                        logger.error(f" IDS Booking Failed: HTTP {response.status_code}, Body: {response.text}")
-                        return BookingCreateResponse(
-                            success=False,
-                            error=f"IDS booking failed: HTTP {response.status_code} - {response.text[:200]}",
-                            booking_reference=booking_data.get('unique_id')
-                        ).model_dump()
+                # Check for specific errors
+                elif "Attempted to perform an unauthorized operation" in response.text:
+                    logger.error(" IDS Authorization Error - booking operations not enabled")
+                    return BookingCreateResponse(
+                        success=False,
+                        error="IDS booking operations not authorized. Please contact IDS support.",
+                        booking_reference=booking_data.get('unique_id')
+                    ).model_dump()
+
+                else:
+                    logger.error(f" IDS Booking Failed: HTTP {response.status_code}, Body: {response.text}")
+                    return BookingCreateResponse(
+                        success=False,
+                        error=f"IDS booking failed: HTTP {response.status_code} - {response.text[:200]}",
+                        booking_reference=booking_data.get('unique_id')
+                    ).model_dump()
 
-            except ImportError as ie:
-                logger.error(f" httpx import failed: {ie}")
-                return BookingCreateResponse(
-                    success=False,
-                    error=f"httpx import failed: {str(ie)}",
-                    booking_reference=booking_data.get('unique_id')
-                ).model_dump()
             except Exception as direct_error:
                 logger.error(f" Direct XML posting failed: {direct_error}")
                 return BookingCreateResponse(
@@ -1440,7 +1477,7 @@ Version="1.2" EchoToken="{str(uuid4())}">
                 booking_reference=booking_data.get("unique_id") if booking_data else None
             ).model_dump()
 
-    async def _store_booking_locally_and_send_email(self, booking_data, original_booking_data):
+    async def _store_booking_locally_and_send_email(self, booking_data, original_booking_data, send_email: bool = True):
         """Store booking locally and send confirmation email after successful IDS booking"""
         logger.warning(f"_store_booking_locally_and_send_email called with deposit_amount={booking_data.get('deposit_amount')}")
         try:
@@ -1493,8 +1530,14 @@ Version="1.2" EchoToken="{str(uuid4())}">
                 )
 
                 logger.info(f" Stored IDS booking locally: {booking_data.get('unique_id')} -> Local booking ID: {local_booking.id}")
-
-                # 2. Send confirmation email
+                if not send_email:
+                    return
+
+                # 2. Send confirmation email, unless the confirmation dispatcher already claimed it
+                from app.services.confirmation_emails import claim_confirmation_email, release_confirmation_email
+                if not await claim_confirmation_email(db, local_booking.id):
+                    logger.info(f"Confirmation email for booking {local_booking.id} already sent")
+                    return
                 email_service = EmailService()
 
                 # Get room name - try to find from local data or use room code as fallback
@@ -1530,6 +1573,7 @@ Version="1.2" EchoToken="{str(uuid4())}">
                     logger.info(f" Deposit confirmation email sent to {guest_info.get('email', '')}")
                 else:
                     logger.error(f" Failed to send deposit confirmation email to {guest_info.get('email', '')}")
+                    await release_confirmation_email(db, local_booking.id)
 
             finally:
                 # Close the database session
@@ -1893,3 +1937,7 @@ Version="1.2" EchoToken="{str(uuid4())}">
                 success=False,
                 error=str(e)
             ).model_dump()
+
+
+# Global IDS room type catalogue instance
+ids_room_type_catalogue = RoomTypeCatalogue("ids", lambda: IDSService().fetch_room_types())
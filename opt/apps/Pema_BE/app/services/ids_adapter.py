@@ -7,11 +7,14 @@ and the internal PMS JSON API format used by the property management system.
 
 import logging
 import re
-import httpx
 import json
 from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime
 
+from app.core.http_client import get_http_client
+from app.services.room_codes import room_codes
+from app.services.room_type_catalogue import RoomTypeCatalogue
+
 logger = logging.getLogger(__name__)
 
 
@@ -41,6 +44,11 @@ class IDSAdapterService:
         return f"Basic {encoded_credentials}"
 
     async def get_room_types(self) -> Dict[str, Any]:
+        """Room type catalogue built from the rooms table, served from the catalogue cache"""
+        return await adapter_room_type_catalogue.get()
+
+    @staticmethod
+    async def load_room_types() -> Dict[str, Any]:
         """
         Get room types from database - Real implementation
 
@@ -51,7 +59,7 @@ class IDSAdapterService:
             # Import database dependencies
             from sqlalchemy import select, and_, func
             from app.db.postgresql import AsyncSessionLocal
-            from app.models.room import Room, RoomCategory
+            from app.models.room import Room
             from app.services.booking import BookingService
 
             # Get database session
@@ -72,19 +80,7 @@ class IDSAdapterService:
                     # Infer pricing category if not set
                     pricing_category = getattr(room, "pricing_category", None) or booking_service._infer_pricing_category(room)
 
-                    # Create room type code mapping
-                    room_code_mapping = {
-                        RoomCategory.STANDARD: "STD",
-                        RoomCategory.PREMIUM_BALCONY: "PBQ",
-                        RoomCategory.PREMIUM_GARDEN: "PGT",
-                        RoomCategory.EXECUTIVE: "EXT",
-                        RoomCategory.EXECUTIVE_JUNIOR_SUITE: "EXQ",
-                        RoomCategory.EXECUTIVE_SUITE: "EXS",
-                        RoomCategory.ELEMENTAL_VILLA: "EVT",
-                        RoomCategory.PEMA_SUITE: "PES"
-                    }
-
-                    inv_type_code = room_code_mapping.get(pricing_category, pricing_category.replace(" ", "").upper()[:3])
+                    inv_type_code = room_codes.catalogue_code_for_category(pricing_category)
 
                     # Aggregate room types by pricing category
                     if inv_type_code not in room_types_map:
@@ -181,13 +177,13 @@ class IDSAdapterService:
                 "Authorization": self._get_auth_header()
             }
 
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(occupancy_url, headers=headers, json={})
-                response.raise_for_status()
-                data = response.json()
+            client = get_http_client()
+            response = await client.post(occupancy_url, headers=headers, json={}, timeout=self.timeout)
+            response.raise_for_status()
+            data = response.json()
 
-                logger.info(f"PMS occupancy data: {data}")
-                return data
+            logger.info(f"PMS occupancy data: {data}")
+            return data
 
         except Exception as e:
             logger.error(f"Failed to get occupancy data from PMS: {e}")
@@ -245,20 +241,20 @@ class IDSAdapterService:
                 "Authorization": self._get_auth_header()
             }
 
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(ids_url, content=xml_request, headers=headers)
+            client = get_http_client()
+            response = await client.post(ids_url, content=xml_request, headers=headers, timeout=self.timeout)
 
-                if response.status_code == 200:
-                    logger.info("Successfully sent booking notification to IDS")
-                    return {
-                        "success": True,
-                        "reservation_id": reservation_data.get('unique_id', f"IDS-{datetime.now().strftime('%Y%m%d%H%M%S')}"),
-                        "status": "Confirmed",
-                        "message": "Booking notification sent to IDS"
-                    }
-                else:
-                    logger.warning(f"IDS booking notification failed: {response.status_code} - {response.text}")
-                    return {"success": False, "error": f"IDS notification failed: {response.status_code}"}
+            if response.status_code == 200:
+                logger.info("Successfully sent booking notification to IDS")
+                return {
+                    "success": True,
+                    "reservation_id": reservation_data.get('unique_id', f"IDS-{datetime.now().strftime('%Y%m%d%H%M%S')}"),
+                    "status": "Confirmed",
+                    "message": "Booking notification sent to IDS"
+                }
+            else:
+                logger.warning(f"IDS booking notification failed: {response.status_code} - {response.text}")
+                return {"success": False, "error": f"IDS notification failed: {response.status_code}"}
 
         except Exception as e:
             logger.error(f"Failed to send booking to IDS: {e}")
@@ -512,21 +508,21 @@ class IDSAdapterService:
                 "Authorization": self._get_auth_header()
             }
 
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(ids_url, content=xml_request, headers=headers)
-
-                if response.status_code == 200:
-                    logger.info(f"Successfully sent cancellation notification to IDS for {booking_reference}")
-                    return {
-                        "success": True,
-                        "booking_reference": booking_reference,
-                        "status": "cancelled",
-                        "message": f"Cancellation notification sent to IDS for {booking_reference}",
-                        "reason": reason
-                    }
-                else:
-                    logger.warning(f"IDS cancellation notification failed: {response.status_code} - {response.text}")
-                    return {"success": False, "error": f"IDS cancellation failed: {response.status_code}"}
+            client = get_http_client()
+            response = await client.post(ids_url, content=xml_request, headers=headers, timeout=self.timeout)
+
+            if response.status_code == 200:
+                logger.info(f"Successfully sent cancellation notification to IDS for {booking_reference}")
+                return {
+                    "success": True,
+                    "booking_reference": booking_reference,
+                    "status": "cancelled",
+                    "message": f"Cancellation notification sent to IDS for {booking_reference}",
+                    "reason": reason
+                }
+            else:
+                logger.warning(f"IDS cancellation notification failed: {response.status_code} - {response.text}")
+                return {"success": False, "error": f"IDS cancellation failed: {response.status_code}"}
 
         except Exception as e:
             logger.error(f"Failed to send cancellation to IDS: {e}")
@@ -591,20 +587,20 @@ class IDSAdapterService:
                 "pmscode": "7167"  # Property code
             }
 
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(room_url, headers=headers, json=payload)
-
-                if response.status_code == 200:
-                    data = response.json()
-                    logger.info(f"PMS room enquiry result: {data}")
-                    return data
-                else:
-                    logger.warning(f"PMS room enquiry failed: {response.status_code} - {response.text}")
-                    return {
-                        "Status": "Error",
-                        "Description": f"Room enquiry failed: {response.status_code}",
-                        "StatusCode": str(response.status_code)
-                    }
+            client = get_http_client()
+            response = await client.post(room_url, headers=headers, json=payload, timeout=self.timeout)
+
+            if response.status_code == 200:
+                data = response.json()
+                logger.info(f"PMS room enquiry result: {data}")
+                return data
+            else:
+                logger.warning(f"PMS room enquiry failed: {response.status_code} - {response.text}")
+                return {
+                    "Status": "Error",
+                    "Description": f"Room enquiry failed: {response.status_code}",
+                    "StatusCode": str(response.status_code)
+                }
 
         except Exception as e:
             logger.error(f"Failed to check room status: {e}")
@@ -642,3 +638,7 @@ class IDSAdapterService:
                 "error": str(e),
                 "message": f"Failed to cancel reservation {booking_reference} on IDS"
             }
+
+
+# Global database room type catalogue instance
+adapter_room_type_catalogue = RoomTypeCatalogue("database", IDSAdapterService.load_room_types, from_rooms=True)
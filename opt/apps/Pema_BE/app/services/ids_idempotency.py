@@ -0,0 +1,82 @@
+"""
+Idempotency store for inbound IDS messages
+IDS re-sends a notification when our acknowledgement is late; the response to the first
+delivery is kept in Redis under (message type, EchoToken, payload hash) so a re-send is
+answered without parsing it or touching the booking/availability tables again
+"""
+
+from typing import Any, Optional, Union
+import hashlib
+import logging
+
+from app.core.config import settings
+from app.db.redis import cache, ids_idempotency_cache_key
+
+logger = logging.getLogger(__name__)
+
+HITS_KEY = "ids:idempotency:stats:hits:{}"
+BYTES_KEY = "ids:idempotency:stats:bytes:{}"
+STATS_TTL = 7 * 24 * 3600
+
+
+def payload_hash(body: Union[bytes, str]) -> str:
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    return hashlib.sha256(body).hexdigest()
+
+
+class IDSIdempotencyStore:
+    """Stored responses for delivered IDS notifications, with duplicate hit counters"""
+
+    def __init__(self, cache_manager=cache):
+        self.cache = cache_manager
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, message_type: str, echo_token: Optional[str], body: Union[bytes, str]) -> str:
+        return ids_idempotency_cache_key(message_type, echo_token or "-", payload_hash(body))
+
+    async def lookup(self, message_type: str, echo_token: Optional[str], body: Union[bytes, str]) -> Optional[Any]:
+        """Stored response for an already processed notification, or None"""
+        if not settings.IDS_IDEMPOTENCY_ENABLED:
+            return None
+        stored = await self.cache.get(self._key(message_type, echo_token, body))
+        if stored is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        await self.cache.increment(HITS_KEY.format(message_type), ttl=STATS_TTL)
+        await self.cache.increment(BYTES_KEY.format(message_type), amount=len(body), ttl=STATS_TTL)
+        logger.info(f"Duplicate IDS {message_type} notification {echo_token}: answered from idempotency store")
+        return stored["response"]
+
+    async def remember(self, message_type: str, echo_token: Optional[str], body: Union[bytes, str], response: Any) -> None:
+        """Keep the response of a successfully applied (or queued) notification"""
+        if not settings.IDS_IDEMPOTENCY_ENABLED:
+            return
+        await self.cache.set(
+            self._key(message_type, echo_token, body),
+            {"response": response},
+            ttl=settings.IDS_IDEMPOTENCY_TTL_SECONDS,
+        )
+
+    async def stats(self, message_types) -> dict:
+        duplicates = {}
+        for message_type in message_types:
+            hits = await self.cache.get(HITS_KEY.format(message_type), 0)
+            if hits:
+                duplicates[message_type] = {
+                    "hits": hits,
+                    "bytes_skipped": await self.cache.get(BYTES_KEY.format(message_type), 0),
+                }
+        return {
+            "enabled": settings.IDS_IDEMPOTENCY_ENABLED,
+            "ttl_seconds": settings.IDS_IDEMPOTENCY_TTL_SECONDS,
+            "duplicates": duplicates,
+            "process_hits": self.hits,
+            "process_misses": self.misses,
+        }
+
+
+# Global idempotency store instance
+ids_idempotency = IDSIdempotencyStore()
@@ -0,0 +1,93 @@
+"""
+Asynchronous IDS ingestion
+Webhooks store the parsed notification in ids_inbound_messages (one row per room type) and
+acknowledge at once; a pool of background workers applies the rows through IDSDataProcessor,
+strictly in arrival order within each room type and in parallel across room types
+"""
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict
+import logging
+
+from app.core.config import settings
+from app.models import IDSInboundMessage
+from app.services.durable_queue import DurableQueue
+from app.services.ids_notification_parser import AVAILABILITY, BOOKING, INVENTORY, ROOM_TYPE_DELTA
+
+logger = logging.getLogger(__name__)
+
+# Notification kind -> IDSDataProcessor method
+PROCESSOR_METHODS = {
+    INVENTORY: "process_inventory_data",
+    AVAILABILITY: "process_availability_data",
+    BOOKING: "process_booking_data",
+    ROOM_TYPE_DELTA: "process_room_type_delta",
+}
+
+# Notification kind -> list of messages that can be split by room type
+PARTITIONED_LISTS = {
+    INVENTORY: "inventories",
+    AVAILABILITY: "avail_status_messages",
+}
+
+
+def partition_notification(kind: str, parsed_data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Split a parsed notification into per-room-type payloads (in message order).
+
+    Bookings and room type deltas touch several room types per message, so they form
+    a single partition named after the message type.
+    """
+    list_key = PARTITIONED_LISTS.get(kind)
+    if list_key is None:
+        return {kind: parsed_data}
+
+    partitions: Dict[str, Dict[str, Any]] = {}
+    for message in parsed_data[list_key]:
+        sac = message.get("status_application_control") or {}
+        room_type = sac.get("inv_type_code") or kind
+        if room_type not in partitions:
+            partitions[room_type] = {**parsed_data, list_key: []}
+        partitions[room_type][list_key].append(message)
+    return partitions
+
+
+class IDSIngestQueue(DurableQueue):
+    """Durable inbound queue over ids_inbound_messages plus its worker pool"""
+
+    model = IDSInboundMessage
+    key_column = "partition_key"
+    kind_column = "message_type"
+    created_column = "received_at"
+    settings_prefix = "IDS_INGEST"
+    label = "IDS ingest"
+
+    async def enqueue(self, db: AsyncSession, kind: str, parsed_data: Dict[str, Any]) -> int:
+        """Store a parsed notification (committed before the webhook acknowledges)"""
+        rows = [
+            IDSInboundMessage(
+                message_type=kind,
+                echo_token=parsed_data.get("echo_token"),
+                partition_key=partition_key[:50],
+                payload=payload,
+            )
+            for partition_key, payload in partition_notification(kind, parsed_data).items()
+        ]
+        db.add_all(rows)
+        await db.commit()
+        self.notify()
+        logger.info(f"Queued {kind} notification {parsed_data.get('echo_token')} as {len(rows)} partition messages")
+        return len(rows)
+
+    async def deliver(self, session: AsyncSession, message: IDSInboundMessage) -> None:
+        from app.services.ids_processing import IDSDataProcessor
+
+        processor = IDSDataProcessor(session)
+        await getattr(processor, PROCESSOR_METHODS[message.message_type])(message.payload)
+
+    async def stats(self, db: AsyncSession) -> dict:
+        """Queue depth and lag from the table, latency counters from this worker process"""
+        return {"async_ingestion": settings.IDS_ASYNC_INGESTION, **await super().stats(db)}
+
+
+# Global ingest queue instance
+ids_ingest_queue = IDSIngestQueue()
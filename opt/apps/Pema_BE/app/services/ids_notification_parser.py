@@ -0,0 +1,312 @@
+"""
+Streaming parser for inbound IDS notifications
+One iterparse pass over the raw request body extracts the root attributes and every
+message; each message subtree is converted and released as soon as it closes, so a
+365-day inventory push never materializes as a full tree
+"""
+
+from io import BytesIO
+from typing import Any, Dict, List, Optional, Union
+import logging
+import time
+
+import defusedxml.ElementTree as ET
+
+logger = logging.getLogger(__name__)
+
+INVENTORY = "inventory"
+AVAILABILITY = "availability"
+BOOKING = "booking"
+ROOM_TYPE_DELTA = "room_type_delta"
+
+
+def _local(tag: str) -> str:
+    """Element name without its namespace"""
+    return tag.rsplit("}", 1)[-1]
+
+
+def _first(elem, name: str):
+    """First element named `name` in elem's subtree (elem included), in document order"""
+    for node in elem.iter():
+        if _local(node.tag) == name:
+            return node
+    return None
+
+
+def _inventory(elem) -> Optional[dict]:
+    sac = count = None
+    for node in elem.iter():
+        tag = _local(node.tag)
+        if tag == "StatusApplicationControl" and sac is None:
+            sac = node
+        elif tag == "InvCount" and count is None:
+            count = node
+    if sac is None or count is None:
+        return None
+    return {
+        "status_application_control": {
+            "start": sac.get("Start"),
+            "end": sac.get("End"),
+            "inv_type_code": sac.get("InvTypeCode"),  # Use InvTypeCode as per IDS spec
+            "rate_plan_code": sac.get("RatePlanCode"),
+            "meal_plan_code": sac.get("MealPlanCode"),
+        },
+        "inv_count": {
+            "count_type": count.get("CountType"),
+            "count": int(count.get("Count", 0)),
+        },
+    }
+
+
+def _avail_status_message(elem) -> dict:
+    sac = restriction = None
+    for node in elem.iter():
+        tag = _local(node.tag)
+        if tag == "StatusApplicationControl" and sac is None:
+            sac = node
+        elif tag == "RestrictionStatus" and restriction is None:
+            restriction = node
+    return {
+        "status_application_control": {
+            "start": sac.get("Start"),
+            "end": sac.get("End"),
+            "inv_type_code": sac.get("InvTypeCode"),
+            "rate_plan_code": sac.get("RatePlanCode"),
+            "meal_plan_code": sac.get("MealPlanCode"),
+        } if sac is not None else None,
+        "restriction_status": {
+            "status": restriction.get("Status"),
+            "restriction": restriction.get("Restriction"),
+            "min_los": restriction.get("MinLOS"),
+            "max_los": restriction.get("MaxLOS"),
+        } if restriction is not None else None,
+    }
+
+
+def _hotel_reservation(elem) -> dict:
+    """One pre-order walk; RoomStay/Service/ContactInfo scope the elements found beneath them"""
+    reservation: Dict[str, Any] = {"room_stays": [], "services": []}
+
+    def walk(parent, room_stay, service, guest_name, contact):
+        for node in parent:
+            tag = _local(node.tag)
+            if tag == "UniqueID" and "unique_id" not in reservation:
+                reservation["unique_id"] = {"type": node.get("Type"), "id": node.get("ID")}
+            elif tag == "RoomStay":
+                room_stay = {"room_types": [], "rate_plans": [], "guest_counts": []}
+                reservation["room_stays"].append(room_stay)
+                walk(node, room_stay, None, None, None)
+                continue
+            elif tag == "Service":
+                service = {"service_type": node.get("ServiceType"), "service_code": node.get("ServiceCode")}
+                reservation["services"].append(service)
+                walk(node, None, service, None, None)
+                continue
+            elif room_stay is not None:
+                if tag == "RoomType":
+                    room_stay["room_types"].append({"room_type_code": node.get("RoomTypeCode")})
+                elif tag == "RatePlan":
+                    room_stay["rate_plans"].append({"rate_plan_code": node.get("RatePlanCode")})
+                elif tag == "TimeSpan" and "time_span" not in room_stay:
+                    room_stay["time_span"] = {"start_date": node.get("StartDate"), "end_date": node.get("EndDate")}
+                elif tag == "GuestCount":
+                    room_stay["guest_counts"].append({
+                        "age_qualifying_code": node.get("AgeQualifyingCode"),
+                        "count": int(node.get("Count", 0)),
+                    })
+                elif tag == "Total" and "total" not in room_stay:
+                    room_stay["total"] = {
+                        "amount_after_tax": node.get("AmountAfterTax"),
+                        "currency_code": node.get("CurrencyCode"),
+                    }
+            elif service is not None:
+                if tag == "GuestName" and "guest_name" not in service:
+                    service["guest_name"] = {"given_name": None, "surname": None}
+                    walk(node, None, service, service["guest_name"], contact)
+                    continue
+                if guest_name is not None and tag in ("GivenName", "Surname"):
+                    key = "given_name" if tag == "GivenName" else "surname"
+                    if guest_name[key] is None:
+                        guest_name[key] = node.text or ""
+                elif tag == "ContactInfo" and "contact_info" not in service:
+                    service["contact_info"] = {"phones": [], "emails": []}
+                    walk(node, None, service, guest_name, service["contact_info"])
+                    continue
+                elif contact is not None and tag == "Phone":
+                    contact["phones"].append({"phone_number": node.get("PhoneNumber")})
+                elif contact is not None and tag == "Email":
+                    contact["emails"].append({"email": node.text})
+            walk(node, room_stay, service, guest_name, contact)
+
+    walk(elem, None, None, None, None)
+    return reservation
+
+
+def _room_type(elem) -> dict:
+    description = _first(elem, "RoomDescription")
+    return {
+        "inv_type_code": elem.get("InvTypeCode"),
+        "name": elem.get("Name"),
+        "base_occupancy": elem.get("BaseOccupancy"),
+        "max_occupancy": elem.get("MaxOccupancy"),
+        "quantity": int(elem.get("Quantity", 0)),
+        "is_room_active": elem.get("IsRoomActive") == "1",
+        "room_description": (description.text or "") if description is not None else "",
+    }
+
+
+def _rate_plan(elem) -> dict:
+    return {
+        "rate_plan_code": elem.get("RatePlanCode"),
+        "rate_plan_category": elem.get("RatePlanCategory"),
+        "rate_plan_status_type": elem.get("RatePlanStatusType"),
+        "rate_plan_name": elem.get("RatePlanName"),
+        "description": elem.get("Description"),
+        "inv_type_code": elem.get("InvTypeCode"),
+        "meal_plan_code": elem.get("MealPlanCode"),
+        "meal_plan_desc": elem.get("MealPlanDesc"),
+        "start": elem.get("Start"),
+        "end": elem.get("End"),
+        "currency_code": elem.get("CurrencyCode"),
+    }
+
+
+def _inclusion(elem) -> dict:
+    return {"meal_plan_code": elem.get("MealPlanCode"), "meal_plan_desc": elem.get("MealPlanDesc")}
+
+
+# kind -> root attributes to keep, container element carrying HotelCode, message element -> (result key, builder)
+NOTIFICATION_SPECS: Dict[str, dict] = {
+    INVENTORY: {
+        "root": {"echo_token": "EchoToken"},
+        "hotel_code_from": "Inventories",
+        "messages": {"Inventory": ("inventories", _inventory)},
+    },
+    AVAILABILITY: {
+        "root": {"echo_token": "EchoToken"},
+        "hotel_code_from": "AvailStatusMessages",
+        "messages": {"AvailStatusMessage": ("avail_status_messages", _avail_status_message)},
+    },
+    BOOKING: {
+        "root": {"echo_token": "EchoToken", "message_content_code": "MessageContentCode"},
+        "hotel_code_from": None,
+        "messages": {"HotelReservation": ("hotel_reservations", _hotel_reservation)},
+    },
+    ROOM_TYPE_DELTA: {
+        "root": {"echo_token": "EchoToken"},
+        "hotel_code_from": "HotelCriteria",
+        "messages": {
+            "RoomType": ("room_types", _room_type),
+            "RatePlan": ("rate_plans", _rate_plan),
+            "Inclusion": ("inclusions", _inclusion),
+        },
+    },
+}
+
+
+class NotificationParseStats:
+    """Per-notification-kind parse counters for this worker"""
+
+    def __init__(self):
+        self._kinds: Dict[str, Dict[str, float]] = {}
+
+    def record(self, kind: str, messages: int, size: int, seconds: float) -> None:
+        entry = self._kinds.setdefault(kind, {"notifications": 0, "messages": 0, "bytes": 0, "seconds": 0.0, "max_seconds": 0.0})
+        entry["notifications"] += 1
+        entry["messages"] += messages
+        entry["bytes"] += size
+        entry["seconds"] += seconds
+        entry["max_seconds"] = max(entry["max_seconds"], seconds)
+
+    def stats(self) -> Dict[str, dict]:
+        return {
+            kind: {
+                "notifications": entry["notifications"],
+                "messages": entry["messages"],
+                "bytes": entry["bytes"],
+                "avg_ms": round(entry["seconds"] * 1000 / entry["notifications"], 3),
+                "max_ms": round(entry["max_seconds"] * 1000, 3),
+                "avg_us_per_message": round(entry["seconds"] * 1e6 / entry["messages"], 2) if entry["messages"] else None,
+            }
+            for kind, entry in self._kinds.items()
+        }
+
+    def clear(self) -> None:
+        self._kinds.clear()
+
+
+# Global parse statistics
+notification_parse_stats = NotificationParseStats()
+
+
+def _source(body: Union[bytes, str]) -> BytesIO:
+    return BytesIO(body.encode("utf-8") if isinstance(body, str) else body)
+
+
+def read_root_attributes(body: Union[bytes, str]) -> Dict[str, str]:
+    """Attributes of the document element; stops at the first start tag"""
+    try:
+        for _, elem in ET.iterparse(_source(body), events=("start",)):
+            return dict(elem.attrib)
+    except ET.ParseError as e:
+        raise ValueError(f"Invalid XML format: {e}")
+    return {}
+
+
+def parse_notification(body: Union[bytes, str], kind: str) -> Dict[str, Any]:
+    """Parse an inbound IDS notification of `kind` in a single streaming pass.
+
+    Callers authenticate first from `read_root_attributes`, which stops at the root element.
+    Raises ValueError for malformed XML or message content.
+    """
+    spec = NOTIFICATION_SPECS[kind]
+    messages = spec["messages"]
+    result: Dict[str, Any] = {key: None for key in spec["root"]}
+    if spec["hotel_code_from"]:
+        result["hotel_code"] = None
+    for list_key, _ in messages.values():
+        result[list_key] = []
+
+    started = time.perf_counter()
+    parsed = 0
+    stack: List[Any] = []
+    open_messages = 0
+    try:
+        for event, elem in ET.iterparse(_source(body), events=("start", "end")):
+            tag = _local(elem.tag)
+            if event == "start":
+                if not stack:
+                    for key, attribute in spec["root"].items():
+                        result[key] = elem.get(attribute)
+                elif tag == spec["hotel_code_from"] and result["hotel_code"] is None:
+                    result["hotel_code"] = elem.get("HotelCode")
+                if tag in messages:
+                    open_messages += 1
+                stack.append(elem)
+                continue
+
+            stack.pop()
+            if tag not in messages:
+                continue
+            open_messages -= 1
+            list_key, build = messages[tag]
+            item = build(elem)
+            if item is not None:
+                result[list_key].append(item)
+                parsed += 1
+            if open_messages == 0:
+                # Release the finished message so memory stays bounded by one message
+                elem.clear()
+                if stack:
+                    stack[-1].remove(elem)
+    except ET.ParseError as e:
+        logger.error(f"XML parsing error for {kind} notification: {e}")
+        raise ValueError(f"Invalid XML format: {e}")
+    except (TypeError, ValueError, AttributeError) as e:
+        logger.error(f"Error parsing {kind} notification: {e}")
+        raise ValueError(f"Failed to parse {kind} data: {e}")
+
+    elapsed = time.perf_counter() - started
+    notification_parse_stats.record(kind, parsed, len(body), elapsed)
+    logger.info(f"Parsed {kind} notification: {parsed} messages in {elapsed * 1000:.2f} ms")
+    return result
@@ -7,9 +7,10 @@ These are the production implementations that would replace the TODO comments in
 
 import logging
 from typing import Dict, Any, List
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import update, insert, select
+from sqlalchemy import update, insert, select, func
+from sqlalchemy.dialects import postgresql, sqlite
 
 from app.models.room import Room
 from app.models.pricing import PricingBand
@@ -17,9 +18,14 @@ from app.models.booking import Booking
 from app.models.contact import ContactUs
 from app.models.medical_form import MedicalForm
 from app.models.notification import Notification
+from app.services.room_codes import room_codes
+from app.services.room_type_catalogue import invalidate_room_type_catalogues
 
 logger = logging.getLogger(__name__)
 
+# Rows per INSERT ... ON CONFLICT statement (keeps bind parameters well under driver limits)
+INVENTORY_UPSERT_CHUNK_ROWS = 2000
+
 
 class IDSDataProcessor:
     """Processes parsed IDS XML data and updates the local database"""
@@ -36,28 +42,36 @@ class IDSDataProcessor:
         """
         logger.info(f"Processing {len(parsed_data['inventories'])} inventory items")
 
+        rows = []
         for inventory in parsed_data['inventories']:
             sac = inventory['status_application_control']
             inv_count = inventory['inv_count']
 
-            # Map IDS codes to internal codes
-            room_code = self._map_room_code(sac['inv_type_code'])
-            rate_plan_code = self._map_rate_plan_code(sac['rate_plan_code'])
+            # Inventory is stored under IDS codes; _inventory_rows resolves the category
+            room_code = sac['inv_type_code']
+            rate_plan_code = sac['rate_plan_code']
 
             try:
-                # Update room inventory in database
-                await self._update_room_inventory(
+                rows.extend(self._inventory_rows(
                     room_code=room_code,
                     rate_plan_code=rate_plan_code,
                     start_date=sac['start'],
                     end_date=sac['end'],
                     available_count=inv_count['count']
-                )
+                ))
+            except (TypeError, ValueError) as e:
+                logger.error(f"Skipping invalid inventory item for {room_code}/{rate_plan_code}: {e}")
 
-                logger.info(f"Updated inventory: {room_code}/{rate_plan_code} = {inv_count['count']} rooms")
+        # The whole notification is applied in one transaction
+        try:
+            written = await self._upsert_room_availability(rows)
+            await self.db.commit()
+        except Exception as e:
+            logger.error(f"Failed to apply inventory notification: {e}")
+            await self.db.rollback()
+            raise
 
-            except Exception as e:
-                logger.error(f"Failed to update inventory for {room_code}/{rate_plan_code}: {e}")
+        logger.info(f"Updated inventory: {written} room-type nights from {len(parsed_data['inventories'])} items")
 
     async def process_availability_data(self, parsed_data: Dict[str, Any]) -> None:
         """
@@ -73,9 +87,8 @@ class IDSDataProcessor:
             restriction = message['restriction_status']
 
             if sac:
-                # Map IDS codes to internal codes
-                room_code = self._map_room_code(sac['inv_type_code'])
-                rate_plan_code = self._map_rate_plan_code(sac['rate_plan_code'])
+                room_code = sac['inv_type_code']
+                rate_plan_code = sac['rate_plan_code']
 
                 try:
                     # Update availability restrictions
@@ -153,6 +166,8 @@ class IDSDataProcessor:
                 except Exception as e:
                     logger.error(f"Failed to update rate plan {rate_plan['rate_plan_code']}: {e}")
 
+            # The PMS catalogue changed; room rows written above invalidate the local one on commit
+            invalidate_room_type_catalogues()
             logger.info("Successfully processed room type delta updates")
 
         except Exception as e:
@@ -172,14 +187,7 @@ class IDSDataProcessor:
 
         try:
             # Map IDS room type codes to our internal categories
-            room_category_mapping = {
-                'STD': RoomCategory.STANDARD,
-                'EXT': RoomCategory.EXECUTIVE,
-                'DLX': RoomCategory.PREMIUM_GARDEN,  # Could be DELUXE
-                'SUI': RoomCategory.PEMA_SUITE,      # Could be SUITE
-            }
-
-            category = room_category_mapping.get(room_type_data['inv_type_code'], RoomCategory.STANDARD)
+            category = room_codes.category_for_ids_code(room_type_data['inv_type_code']) or RoomCategory.STANDARD.value
 
             # Check if room type exists
             stmt = select(Room).where(Room.code == room_type_data['inv_type_code'])
@@ -190,7 +198,7 @@ class IDSDataProcessor:
                 # Update existing room
                 update_data = {
                     'name': room_type_data['name'],
-                    'category': category.value,
+                    'category': category,
                     'inventory_count': room_type_data['quantity'],
                     'is_active': room_type_data['is_room_active'],
                     'description': room_type_data['room_description']
@@ -231,110 +239,68 @@ class IDSDataProcessor:
         # TODO: Implement actual rate plan updates in pricing tables
         # This would involve updating PricingBand records or similar
 
-    def _map_room_code(self, ids_room_code: str) -> str:
-        """Map IDS room codes to internal room codes"""
-        # This would typically be a lookup table or configuration
-        mapping = {
-            'EXT': 'EXT',  # Executive Room
-            'DLX': 'DLX',  # Deluxe Room
-            'STD': 'STD',  # Standard Room
-        }
-        return mapping.get(ids_room_code, ids_room_code)
-
-    def _map_rate_plan_code(self, ids_rate_code: str) -> str:
-        """Map IDS rate plan codes to internal rate plan codes"""
-        # This would typically be a lookup table or configuration
-        mapping = {
-            'RACK': 'RACK',  # Rack Rate
-            'BAR': 'BAR',   # Best Available Rate
-            'CORP': 'CORP', # Corporate Rate
-        }
-        return mapping.get(ids_rate_code, ids_rate_code)
-
-    async def _update_room_inventory(self, room_code: str, rate_plan_code: str,
-                                   start_date: str, end_date: str, available_count: int) -> None:
-        """Update room inventory in database for room types"""
-        from app.models.availability import RoomAvailability
-        from app.models.room import Room, RoomCategory
-        from datetime import datetime, timedelta
-        from sqlalchemy import select, update, insert
-
-        try:
-            # Parse dates
-            start = datetime.strptime(start_date, '%Y-%m-%d').date()
-            end = datetime.strptime(end_date, '%Y-%m-%d').date()
-
-            # Map IDS room codes to room categories
-            category_mapping = {
-                'STD': RoomCategory.STANDARD.value,
-                'EXT': RoomCategory.EXECUTIVE.value,
-                'EXQ': RoomCategory.EXECUTIVE.value,
-                'PBQ': RoomCategory.PREMIUM_BALCONY.value,
-                'PBT': RoomCategory.PREMIUM_BALCONY.value,
-                'PGT': RoomCategory.PREMIUM_GARDEN.value,
-                'STQ': RoomCategory.STANDARD.value,
-                'STT': RoomCategory.STANDARD.value,
-                'SUI': RoomCategory.EXECUTIVE_SUITE.value,
+    def _inventory_rows(self, room_code: str, rate_plan_code: str,
+                        start_date: str, end_date: str, available_count: int) -> List[Dict[str, Any]]:
+        """Per-date room_availability rows for one IDS inventory range (empty if the room code is unmapped)"""
+        # Parse dates
+        start = datetime.strptime(start_date, '%Y-%m-%d').date()
+        end = datetime.strptime(end_date, '%Y-%m-%d').date()
+
+        # Inventory uses its own alias table (see room_codes.INVENTORY_CODE_CATEGORIES)
+        storage_room_code = room_codes.storage_code_for_inventory(room_code)
+        if not storage_room_code:
+            logger.warning(f"No inventory storage mapping for IDS room code: {room_code}")
+            return []
+
+        logger.info(f"Storing availability for IDS code {room_code} as room code {storage_room_code}")
+
+        # ONE record per date per room type; NULLs never collide in the unique key, so a
+        # missing rate plan is stored as ''
+        return [
+            {
+                'room_code': storage_room_code,
+                'date': start + timedelta(days=offset),
+                'rate_plan_code': rate_plan_code or '',
+                'available_count': available_count,
             }
+            for offset in range((end - start).days + 1)
+        ]
 
-            # Get the category for this room code
-            room_category = category_mapping.get(room_code)
-            if not room_category:
-                logger.warning(f"No category mapping found for IDS room code: {room_code}")
-                return
+    async def _upsert_room_availability(self, rows: List[Dict[str, Any]]) -> int:
+        """INSERT ... ON CONFLICT (room_code, date, rate_plan_code) DO UPDATE, without committing.
 
-            # Map category to room code for storage
-            room_code_mapping = {
-                'Standard': 'STD',
-                'Executive': 'EXT',
-                'Premium Balcony': 'PBQ',
-                'Premium Garden': 'PGT',
-                'Executive Suite': 'SUI'
-            }
-
-            storage_room_code = room_code_mapping.get(room_category)
-            if not storage_room_code:
-                logger.warning(f"No storage room code mapping for category {room_category}")
-                return
-
-            logger.info(f"Storing availability for IDS code {room_code} as room code {storage_room_code} (category: {room_category})")
-
-            # Update availability for each date in the range - ONE record per date per room type
-            current_date = start
-            while current_date <= end:
-                # Check if availability record exists for this room code and date
-                stmt = select(RoomAvailability).where(
-                    RoomAvailability.room_code == storage_room_code,
-                    RoomAvailability.date == current_date,
-                    RoomAvailability.rate_plan_code == rate_plan_code
-                )
-                result = await self.db.execute(stmt)
-                existing_availability = result.scalar_one_or_none()
-
-                if existing_availability:
-                    # Update existing record
-                    await self.db.execute(
-                        update(RoomAvailability).where(RoomAvailability.id == existing_availability.id).values(
-                            available_count=available_count,
-                            source="ids_sync",
-                            updated_at=datetime.now()
-                        )
-                    )
-                else:
-                    # Create new availability record
-                    new_availability = RoomAvailability(
-                        room_code=storage_room_code,
-                        date=current_date,
-                        available_count=available_count,
-                        rate_plan_code=rate_plan_code,
-                        source="ids_sync"
-                    )
-                    self.db.add(new_availability)
+        Later rows win over earlier rows for the same key (one statement may not touch a row twice).
+        """
+        from app.models.availability import RoomAvailability
 
-                current_date += timedelta(days=1)
+        latest = {(row['room_code'], row['date'], row['rate_plan_code']): row for row in rows}
+        if not latest:
+            return 0
+        table = RoomAvailability.__table__
+        dialect = postgresql if self.db.get_bind().dialect.name == "postgresql" else sqlite
+        values = [{**row, 'source': 'ids_sync'} for row in latest.values()]
+        for offset in range(0, len(values), INVENTORY_UPSERT_CHUNK_ROWS):
+            stmt = dialect.insert(table).values(values[offset:offset + INVENTORY_UPSERT_CHUNK_ROWS])
+            await self.db.execute(stmt.on_conflict_do_update(
+                index_elements=['room_code', 'date', 'rate_plan_code'],
+                set_={
+                    'available_count': stmt.excluded.available_count,
+                    'source': stmt.excluded.source,
+                    'updated_at': func.now(),
+                },
+            ))
+        return len(values)
 
+    async def _update_room_inventory(self, room_code: str, rate_plan_code: str,
+                                   start_date: str, end_date: str, available_count: int) -> None:
+        """Update room inventory in database for one room type and date range (one statement)"""
+        try:
+            rows = self._inventory_rows(room_code, rate_plan_code, start_date, end_date, available_count)
+            if not rows:
+                return
+            await self._upsert_room_availability(rows)
             await self.db.commit()
-            logger.info(f"Updated inventory for room type {storage_room_code} (IDS code {room_code}): "
+            logger.info(f"Updated inventory for room type {rows[0]['room_code']} (IDS code {room_code}): "
                        f"{start_date} to {end_date} = {available_count} rooms available")
 
         except Exception as e:
@@ -0,0 +1,251 @@
+"""
+IDS push queue
+Coalesces outbound inventory and availability pushes: updates arriving within a short
+window are expanded to per-day cells, superseded cells are dropped, and consecutive
+days with identical values are merged back into ranges before one OTA request per batch
+"""
+
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import logging
+
+from app.core.config import settings
+from app.core.exceptions import ValidationError
+from app.models.ids import AvailabilityUpdate
+
+logger = logging.getLogger(__name__)
+
+INVENTORY = "inventory"
+AVAILABILITY = "availability"
+
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+
+def _as_date(value: Any) -> date:
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value))
+
+
+def _expand_days(start: date, end: date, day_of_week: Optional[Dict[str, bool]]) -> Iterable[date]:
+    """Days in [start, end] (OTA ranges are inclusive) that the weekday flags apply to"""
+    day = start
+    while day <= end:
+        if not day_of_week or day_of_week.get(WEEKDAYS[day.weekday()], True):
+            yield day
+        day += timedelta(days=1)
+
+
+def _ranges(cells: Dict[Tuple, Any]) -> List[Tuple[Tuple, date, date, Any]]:
+    """Merge per-day cells {(*key, day): value} into (key, start, end, value) runs of equal values"""
+    runs: List[Tuple[Tuple, date, date, Any]] = []
+    for cell in sorted(cells, key=lambda c: (tuple(str(part) for part in c[:-1]), c[-1])):
+        key, day, value = cell[:-1], cell[-1], cells[cell]
+        if runs:
+            last_key, start, end, last_value = runs[-1]
+            if last_key == key and last_value == value and end + timedelta(days=1) == day:
+                runs[-1] = (key, start, day, value)
+                continue
+        runs.append((key, day, day, value))
+    return runs
+
+
+def normalize_inventory_update(update: dict) -> dict:
+    """Validate one inventory update dict and coerce its dates"""
+    try:
+        normalized = {
+            "room_code": update["room_code"],
+            "rate_plan_code": update["rate_plan_code"],
+            "meal_plan_code": update.get("meal_plan_code") or "CP",
+            "start_date": _as_date(update["start_date"]),
+            "end_date": _as_date(update["end_date"]),
+            "available_count": int(update["available_count"]),
+            "day_of_week": update.get("day_of_week"),
+        }
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValidationError(f"Invalid inventory update {update!r}: {e}")
+    if normalized["end_date"] < normalized["start_date"]:
+        raise ValidationError(f"Inventory update ends before it starts: {update!r}")
+    return normalized
+
+
+def compact_inventory_updates(updates: List[dict]) -> List[dict]:
+    """Last write wins per (room, rate plan, meal plan, day); equal consecutive counts become one range"""
+    cells: Dict[Tuple, int] = {}
+    for update in updates:
+        key = (update["room_code"], update["rate_plan_code"], update.get("meal_plan_code") or "CP")
+        for day in _expand_days(update["start_date"], update["end_date"], update.get("day_of_week")):
+            cells[key + (day,)] = update["available_count"]
+    return [
+        {
+            "room_code": room_code,
+            "rate_plan_code": rate_plan_code,
+            "meal_plan_code": meal_plan_code,
+            "start_date": start,
+            "end_date": end,
+            "available_count": count,
+        }
+        for (room_code, rate_plan_code, meal_plan_code), start, end, count in _ranges(cells)
+    ]
+
+
+def compact_availability_updates(updates: List[AvailabilityUpdate]) -> List[AvailabilityUpdate]:
+    """Last write wins per (room, rate plan, meal plan, restriction type, day).
+
+    Restriction types are independent controls (closing to arrival does not reopen a
+    master close), so each type keeps its own cells. The first unique_id of a run is kept
+    for tracking.
+    """
+    cells: Dict[Tuple, Tuple] = {}
+    unique_ids: Dict[Tuple, Optional[str]] = {}
+    for update in updates:
+        key = (update.room_code, update.rate_plan_code, update.meal_plan_code, update.restriction_type)
+        value = (update.restriction_status, update.min_los, update.max_los)
+        for day in _expand_days(update.start_date, update.end_date, update.day_of_week):
+            cells[key + (day,)] = value
+            unique_ids[key + (day,)] = update.unique_id
+    return [
+        AvailabilityUpdate(
+            room_code=room_code,
+            rate_plan_code=rate_plan_code,
+            meal_plan_code=meal_plan_code,
+            start_date=start,
+            end_date=end,
+            restriction_type=restriction_type,
+            restriction_status=status,
+            min_los=min_los,
+            max_los=max_los,
+            unique_id=unique_ids[(room_code, rate_plan_code, meal_plan_code, restriction_type, start)],
+        )
+        for (room_code, rate_plan_code, meal_plan_code, restriction_type), start, end, (status, min_los, max_los)
+        in _ranges(cells)
+    ]
+
+
+class _Batch:
+    def __init__(self):
+        self.updates: List[Any] = []
+        self.waiters: List[asyncio.Future] = []
+
+
+def _has_errors(response: Any) -> bool:
+    return getattr(response, "errors", None) is not None
+
+
+class IDSPushQueue:
+    """Per-kind batching of outbound IDS pushes; callers await the response of their batch"""
+
+    def __init__(
+        self,
+        window_seconds: Optional[float] = None,
+        max_messages: Optional[int] = None,
+        service_factory: Optional[Callable[[], Any]] = None,
+    ):
+        self.window_seconds = settings.IDS_PUSH_COALESCE_SECONDS if window_seconds is None else window_seconds
+        self.max_messages = max_messages or settings.IDS_PUSH_MAX_MESSAGES_PER_REQUEST
+        self._service_factory = service_factory
+        self._batches: Dict[str, _Batch] = {}
+        self._timers: Dict[str, asyncio.Task] = {}
+        self.updates_received = 0
+        self.messages_sent = 0
+        self.requests_sent = 0
+        self.batches_flushed = 0
+
+    def _service(self):
+        if self._service_factory is None:
+            from app.services.ids import IDSService
+            return IDSService()
+        return self._service_factory()
+
+    async def push_inventory(self, updates: List[dict]):
+        """Queue inventory count updates; returns the OTAHotelInvCountNotifRS of the batch"""
+        return await self._enqueue(INVENTORY, [normalize_inventory_update(update) for update in updates])
+
+    async def push_availability(self, updates: List[AvailabilityUpdate]):
+        """Queue availability/restriction updates; returns the OTAHotelAvailNotifRS of the batch"""
+        return await self._enqueue(AVAILABILITY, list(updates))
+
+    async def _enqueue(self, kind: str, updates: List[Any]):
+        self.updates_received += len(updates)
+        if self.window_seconds <= 0:
+            return await self._send(kind, updates)
+
+        loop = asyncio.get_running_loop()
+        batch = self._batches.setdefault(kind, _Batch())
+        waiter = loop.create_future()
+        batch.updates.extend(updates)
+        batch.waiters.append(waiter)
+        if kind not in self._timers:
+            self._timers[kind] = loop.create_task(self._flush_later(kind))
+        return await asyncio.shield(waiter)
+
+    async def _flush_later(self, kind: str) -> None:
+        await asyncio.sleep(self.window_seconds)
+        await self.flush(kind)
+
+    async def flush(self, kind: str) -> None:
+        """Send everything queued for `kind` now and resolve its waiters"""
+        timer = self._timers.pop(kind, None)
+        if timer is not None and timer is not asyncio.current_task():
+            timer.cancel()
+        batch = self._batches.pop(kind, None)
+        if batch is None:
+            return
+        self.batches_flushed += 1
+        try:
+            response = await self._send(kind, batch.updates)
+        except Exception as e:
+            logger.error(f"IDS {kind} push failed for {len(batch.updates)} queued updates: {e}")
+            for waiter in batch.waiters:
+                if not waiter.done():
+                    waiter.set_exception(e)
+            return
+        for waiter in batch.waiters:
+            if not waiter.done():
+                waiter.set_result(response)
+
+    async def drain(self) -> None:
+        """Flush every pending batch (called on shutdown)"""
+        for kind in list(self._batches):
+            await self.flush(kind)
+
+    async def _send(self, kind: str, updates: List[Any]):
+        """Compact and send; large batches are split into several requests.
+
+        Returns the first response carrying errors, otherwise the last response.
+        """
+        if kind == INVENTORY:
+            messages = compact_inventory_updates(updates)
+        else:
+            messages = compact_availability_updates(updates)
+        if not messages:
+            raise ValidationError(f"IDS {kind} push covers no days")
+        service = self._service()
+        send = service.update_inventory if kind == INVENTORY else service.update_availability
+        logger.info(f"IDS {kind} push: {len(updates)} updates compacted to {len(messages)} messages")
+
+        response = None
+        for offset in range(0, len(messages), self.max_messages):
+            chunk = messages[offset:offset + self.max_messages]
+            chunk_response = await send(chunk)
+            self.requests_sent += 1
+            self.messages_sent += len(chunk)
+            if response is None or not _has_errors(response):
+                response = chunk_response
+        return response
+
+    def stats(self) -> dict:
+        return {
+            "window_seconds": self.window_seconds,
+            "max_messages_per_request": self.max_messages,
+            "pending_updates": {kind: len(batch.updates) for kind, batch in self._batches.items()},
+            "updates_received": self.updates_received,
+            "messages_sent": self.messages_sent,
+            "requests_sent": self.requests_sent,
+            "batches_flushed": self.batches_flushed,
+        }
+
+
+# Global push queue instance
+ids_push_queue = IDSPushQueue()
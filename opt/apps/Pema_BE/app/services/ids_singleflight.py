@@ -0,0 +1,141 @@
+"""
+Single-flight coalescing for IDS availability queries
+Concurrent callers asking IDS the same question (room codes, rate plans, dates) share one
+in-flight OTA_HotelAvailQueryRQ; successful answers are optionally kept for a short TTL
+so bursts of identical searches reach the PMS once
+"""
+
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import time
+
+from app.core.circuit_breaker import remaining_budget
+from app.core.config import settings
+from app.models.ids import AvailabilityQuery, AvailabilityResponse
+
+logger = logging.getLogger(__name__)
+
+MAX_CACHED_QUERIES = 1024
+
+AvailabilityKey = Tuple[Tuple[str, ...], Tuple[str, ...], str, str]
+
+
+def availability_query_key(query: AvailabilityQuery) -> AvailabilityKey:
+    """Normalized form of a query; order and duplicates of codes do not change the request"""
+    return (
+        tuple(sorted(set(query.room_codes))),
+        tuple(sorted(set(query.rate_plan_codes))),
+        query.start_date.isoformat(),
+        query.end_date.isoformat(),
+    )
+
+
+class AvailabilitySingleFlight:
+    """In-process request coalescing plus a short-lived result cache"""
+
+    def __init__(self, ttl_seconds: Optional[float] = None):
+        self._ttl_seconds = ttl_seconds
+        self._in_flight: Dict[AvailabilityKey, asyncio.Task] = {}
+        self._results: Dict[AvailabilityKey, Tuple[float, List[AvailabilityResponse]]] = {}
+        self.calls = 0
+        self.upstream = 0
+        self.coalesced = 0
+        self.cache_hits = 0
+        self.peak_waiters = 0
+        self._waiters: Dict[AvailabilityKey, int] = {}
+
+    @property
+    def ttl_seconds(self) -> float:
+        return settings.IDS_AVAILABILITY_CACHE_TTL_SECONDS if self._ttl_seconds is None else self._ttl_seconds
+
+    def _cached(self, key: AvailabilityKey) -> Optional[List[AvailabilityResponse]]:
+        entry = self._results.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._results[key]
+            return None
+        return entry[1]
+
+    def _store(self, key: AvailabilityKey, responses: List[AvailabilityResponse]) -> None:
+        # Empty lists are how check_availability reports IDS errors; never cache an outage
+        if not responses or self.ttl_seconds <= 0:
+            return
+        now = time.monotonic()
+        if len(self._results) >= MAX_CACHED_QUERIES:
+            self._results = {k: v for k, v in self._results.items() if v[0] > now}
+            while len(self._results) >= MAX_CACHED_QUERIES:
+                self._results.pop(next(iter(self._results)))
+        self._results[key] = (now + self.ttl_seconds, responses)
+
+    async def run(
+        self,
+        query: AvailabilityQuery,
+        fetch: Callable[[], Awaitable[List[AvailabilityResponse]]],
+        deadline: Optional[float] = None,
+    ) -> List[AvailabilityResponse]:
+        """Answer `query` from the cache, an identical in-flight request, or `fetch()`.
+
+        The upstream request runs as its own task, so a caller that gives up (deadline or
+        cancellation) does not cancel it for the others waiting on the same answer.
+        """
+        self.calls += 1
+        key = availability_query_key(query)
+
+        cached = self._cached(key)
+        if cached is not None:
+            self.cache_hits += 1
+            return list(cached)
+
+        task = self._in_flight.get(key)
+        if task is None:
+            self.upstream += 1
+            task = asyncio.ensure_future(fetch())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        else:
+            self.coalesced += 1
+
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        self.peak_waiters = max(self.peak_waiters, self._waiters[key])
+        try:
+            budget = remaining_budget(deadline)
+            if budget is None:
+                responses = await asyncio.shield(task)
+            else:
+                responses = await asyncio.wait_for(asyncio.shield(task), timeout=max(0.0, budget))
+        except asyncio.TimeoutError:
+            logger.warning(f"IDS availability query {key} still in flight at caller deadline")
+            return []
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+        return list(responses)
+
+    def _finished(self, key: AvailabilityKey, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled() and task.exception() is None:
+            self._store(key, task.result())
+
+    def stats(self) -> dict:
+        return {
+            "enabled": settings.IDS_AVAILABILITY_SINGLEFLIGHT_ENABLED,
+            "cache_ttl_seconds": self.ttl_seconds,
+            "calls": self.calls,
+            "upstream_requests": self.upstream,
+            "coalesced": self.coalesced,
+            "cache_hits": self.cache_hits,
+            "in_flight": len(self._in_flight),
+            "peak_waiters": self.peak_waiters,
+            "cached_queries": len(self._results),
+        }
+
+    def reset(self) -> None:
+        self._results.clear()
+
+
+# Global availability single-flight instance
+ids_availability_flight = AvailabilitySingleFlight()
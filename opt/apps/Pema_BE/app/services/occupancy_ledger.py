@@ -0,0 +1,181 @@
+"""
+Per-night occupancy ledger
+Keeps room_night_occupancy in step with bookings: every flush that moves a booking into or out of
+an active status (or changes its room/dates while active) applies +1/-1 deltas per night in the
+same transaction, so availability for a stay is the peak units held over its nights.
+"""
+
+from sqlalchemy import select, delete, func, event, inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from collections import Counter
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+
+from app.models import Booking, BookingStatus, RoomNightOccupancy
+
+logger = logging.getLogger(__name__)
+
+# Booking statuses that hold a room unit for their dates
+ACTIVE_BOOKING_STATUSES = [
+    BookingStatus.RESERVED.value,
+    BookingStatus.CONFIRMED.value,
+    BookingStatus.CHECKED_IN.value,
+    BookingStatus.DOCTOR_APPROVED.value,
+]
+
+LedgerKey = Tuple[int, date]
+Span = Tuple[int, date, date]
+
+_TRACKED_ATTRS = ("status", "room_id", "check_in_date", "check_out_date")
+
+
+def _nights(check_in: date, check_out: date) -> Iterable[date]:
+    night = check_in
+    while night < check_out:
+        yield night
+        night += timedelta(days=1)
+
+
+def _held_span(status, room_id, check_in, check_out) -> Optional[Span]:
+    """Room and nights a booking holds, or None when it holds nothing"""
+    status = getattr(status, "value", status)
+    if status not in ACTIVE_BOOKING_STATUSES or room_id is None or not check_in or not check_out:
+        return None
+    return (room_id, check_in, check_out)
+
+
+def _add_span(deltas: Counter, span: Optional[Span], units: int) -> None:
+    if span is None:
+        return
+    room_id, check_in, check_out = span
+    for night in _nights(check_in, check_out):
+        deltas[(room_id, night)] += units
+
+
+def _committed_value(booking: Booking, attr: str):
+    """Attribute value as of the last flush/load, before pending changes"""
+    history = inspect(booking).attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return getattr(booking, attr)
+
+
+def _committed_span(booking: Booking) -> Optional[Span]:
+    return _held_span(*(_committed_value(booking, attr) for attr in _TRACKED_ATTRS))
+
+
+def _current_span(booking: Booking) -> Optional[Span]:
+    return _held_span(*(getattr(booking, attr) for attr in _TRACKED_ATTRS))
+
+
+def booking_deltas(session: Session) -> Counter:
+    """Per-night unit deltas implied by the bookings pending in a flush"""
+    deltas: Counter = Counter()
+    for obj in session.new:
+        if isinstance(obj, Booking):
+            _add_span(deltas, _current_span(obj), 1)
+    for obj in session.dirty:
+        if isinstance(obj, Booking):
+            old, new = _committed_span(obj), _current_span(obj)
+            if old != new:
+                _add_span(deltas, old, -1)
+                _add_span(deltas, new, 1)
+    for obj in session.deleted:
+        if isinstance(obj, Booking):
+            _add_span(deltas, _committed_span(obj), -1)
+    return Counter({key: units for key, units in deltas.items() if units})
+
+
+def _upsert_statement(dialect_name: str, rows: List[dict]):
+    """INSERT ... ON CONFLICT (room_id, night) DO UPDATE adding the delta"""
+    dialect = postgresql if dialect_name == "postgresql" else sqlite
+    stmt = dialect.insert(RoomNightOccupancy.__table__).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=["room_id", "night"],
+        set_={
+            "units_held": RoomNightOccupancy.__table__.c.units_held + stmt.excluded.units_held,
+            "updated_at": func.now(),
+        },
+    )
+
+
+def apply_deltas(connection, deltas: Dict[LedgerKey, int]) -> None:
+    """Apply per-night deltas on the given (sync) connection"""
+    if not deltas:
+        return
+    rows = [
+        {"room_id": room_id, "night": night, "units_held": units}
+        for (room_id, night), units in sorted(deltas.items())
+    ]
+    connection.execute(_upsert_statement(connection.dialect.name, rows))
+
+
+class OccupancyLedgerService:
+    """Rebuild and verify the occupancy ledger against bookings"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def expected_units(self) -> Counter:
+        """Units held per (room_id, night), derived from active bookings"""
+        stmt = select(Booking.room_id, Booking.check_in_date, Booking.check_out_date).where(
+            Booking.status.in_(ACTIVE_BOOKING_STATUSES)
+        )
+        result = await self.db.execute(stmt)
+        expected: Counter = Counter()
+        for room_id, check_in, check_out in result.all():
+            _add_span(expected, (room_id, check_in, check_out), 1)
+        return expected
+
+    async def ledger_units(self) -> Counter:
+        stmt = select(RoomNightOccupancy.room_id, RoomNightOccupancy.night, RoomNightOccupancy.units_held)
+        result = await self.db.execute(stmt)
+        return Counter({(room_id, night): units for room_id, night, units in result.all() if units})
+
+    async def rebuild(self) -> int:
+        """Regenerate the ledger from bookings; returns the number of room-nights written"""
+        expected = await self.expected_units()
+        await self.db.execute(delete(RoomNightOccupancy))
+        if expected:
+            await self.db.execute(
+                RoomNightOccupancy.__table__.insert(),
+                [
+                    {"room_id": room_id, "night": night, "units_held": units}
+                    for (room_id, night), units in sorted(expected.items())
+                ],
+            )
+        await self.db.commit()
+        logger.info(f"Occupancy ledger rebuilt: {len(expected)} room-nights")
+        return len(expected)
+
+    async def find_inconsistencies(self, limit: Optional[int] = None) -> List[dict]:
+        """Room-nights where the ledger disagrees with bookings"""
+        expected = await self.expected_units()
+        actual = await self.ledger_units()
+        mismatches = []
+        for room_id, night in sorted(set(expected) | set(actual)):
+            key = (room_id, night)
+            if expected[key] != actual[key]:
+                mismatches.append({
+                    "room_id": room_id,
+                    "night": night.isoformat(),
+                    "expected": expected[key],
+                    "ledger": actual[key],
+                })
+        if mismatches:
+            logger.warning(f"Occupancy ledger has {len(mismatches)} inconsistent room-nights")
+        return mismatches[:limit] if limit else mismatches
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_booking_changes(session, flush_context):
+    """Write ledger deltas for the bookings in this flush, inside the same transaction"""
+    deltas = booking_deltas(session)
+    if deltas:
+        apply_deltas(session.connection(), deltas)
+        session.info["availability_changed"] = True
@@ -0,0 +1,305 @@
+"""
+Payment outbox
+The PayU webhook records the verified callback as an outbox row and returns; a pool of
+background workers then settles the payment, pushes the booking to IDS and sends the
+confirmation email, with retries and exponential backoff, one row at a time per aggregate
+(PayU txnid, payment until the booking exists, or booking)
+"""
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+import logging
+
+from app.core.exceptions import ExternalServiceError
+from app.core.latency import LatencyWindow
+from app.models import Booking, OutboxMessage, Payment, Room
+from app.services.confirmation_emails import claim_confirmation_email, release_confirmation_email
+from app.services.durable_queue import DurableQueue
+from app.services.ids import IDSService
+from app.services.room_codes import room_codes
+
+logger = logging.getLogger(__name__)
+
+PAYU_SETTLEMENT = "payu_settlement"
+IDS_BOOKING = "ids_booking"
+CONFIRMATION_EMAIL = "confirmation_email"
+
+
+async def _booking_by_ids_reference(db: AsyncSession, reference: str) -> Optional[Booking]:
+    result = await db.execute(select(Booking).where(Booking.ids_booking_reference == reference))
+    return result.scalar_one_or_none()
+
+
+async def create_booking_from_payment(payment: Payment, db: AsyncSession) -> Optional[Booking]:
+    """
+    Creates a booking in the local DB and IDS system from payment details.
+    This is used when a payment is successful but has no associated booking_id.
+
+    Safe to retry: a booking already stored for this payment is linked instead of being
+    sent to IDS again. Raises ExternalServiceError when IDS rejects or cannot be reached.
+    """
+    if not payment.booking_details:
+        logger.error(f"Payment {payment.id} has no booking_details, cannot create booking.")
+        return None
+
+    details = payment.booking_details
+    check_in = details.get("check_in_date")
+    check_out = details.get("check_out_date")
+
+    if not all([check_in, check_out, details.get("room_category")]):
+        logger.error(f"Payment {payment.id} booking_details are incomplete. Missing dates or room category.")
+        return None
+    
+    # Prepare IDS booking data if parameters are present
+    if details.get("room_category") and details.get("ids_rate_plan_code"):
+        # Map room category to IDS room code
+        ids_room_code = room_codes.pms_code_for_category(details.get("room_category"))
+
+        # Extract financial details from estimate response
+        estimate_response = details.get("estimate_response", {})
+        price_breakdown = estimate_response.get("price_breakdown", {})
+        
+        # Get correct total amount from estimate (subtotal) or fallback to details amount
+        total_amount = float(price_breakdown.get("subtotal", details.get("amount", payment.amount)))
+
+        # Get correct deposit amount from estimate or fallback to payment amount
+        deposit_val = estimate_response.get("deposit_required", payment.amount)
+        try:
+            deposit_amount = float(deposit_val)
+        except (ValueError, TypeError):
+            deposit_amount = float(payment.amount)
+
+        ids_booking_data = {
+            "unique_id": f"PAY-{payment.reference_number}",
+            "check_in_date": check_in,  # Keep as string for IDS adapter
+            "check_out_date": check_out,  # Keep as string for IDS adapter
+            "adults": details.get("occupancy_details", {}).get("adults", 1),
+            "children": details.get("occupancy_details", {}).get("children", 0),
+            "room_code": ids_room_code,
+            "rate_plan_code": details.get("ids_rate_plan_code"),
+            "total_amount": total_amount,
+            "deposit_amount": deposit_amount,
+            "currency_code": "INR",
+            "guest_info": {
+                "first_name": details.get("guest_first_name", "Guest"),
+                "last_name": details.get("ids_guest_last_name") or "",
+                "email": details.get("guest_email", "guest@example.com"),
+                "phone": details.get("guest_phone", "NA"),
+                "country": "India",  # Default to India or get from details if available
+                "other_guests": details.get("ids_other_guests")
+            },
+            "special_requests": details.get("ids_special_requests"),
+            "estimate_details": estimate_response
+        }
+    else:
+        # Fallback logic if IDS parameters are missing (though frontend should provide them now)
+        room_code = room_codes.pms_code_for_category(details["room_category"])
+        
+        occupancy = details.get("occupancy_details", {"adults": 1, "children": 0})
+        
+        # Extract financial details from estimate response
+        estimate_response = details.get("estimate_response", {})
+        price_breakdown = estimate_response.get("price_breakdown", {})
+        
+        # Get correct total amount from estimate (subtotal) or fallback to payment amount
+        total_amount = float(price_breakdown.get("subtotal", payment.amount))
+        
+        # Get correct deposit amount from estimate or fallback to payment amount
+        # deposit_required can be string "100000.00" or float
+        deposit_val = estimate_response.get("deposit_required", payment.amount)
+        try:
+            deposit_amount = float(deposit_val)
+        except (ValueError, TypeError):
+            deposit_amount = float(payment.amount)
+            
+        ids_booking_data = {
+            "unique_id": f"PAY-{payment.reference_number}",
+            "check_in_date": check_in,  # Keep as string for IDS adapter
+            "check_out_date": check_out,  # Keep as string for IDS adapter
+            "adults": occupancy.get("adults", 1),
+            "children": occupancy.get("children", 0),
+            "room_code": room_code,
+            "rate_plan_code": "BAR", # Fallback
+            "total_amount": total_amount,
+            "deposit_amount": deposit_amount,
+            "guest_info": {
+                "first_name": details.get("guest_first_name", "Guest"),
+                "last_name": "",
+                "email": details.get("guest_email", "guest@example.com"),
+                "phone": details.get("guest_phone", "NA"),
+            },
+            "estimate_details": estimate_response
+        }
+
+    # A previous attempt may have stored the booking before failing to link it
+    local_booking = await _booking_by_ids_reference(db, ids_booking_data["unique_id"])
+    if local_booking is None:
+        # Only create booking if IDS succeeds - no fallback bookings
+        ids_result = await IDSService().create_booking(ids_booking_data, send_email=False)
+        if not ids_result.get("success"):
+            raise ExternalServiceError("IDS", f"booking creation failed for payment {payment.id}: {ids_result.get('error')}")
+        logger.info(f"Successfully created IDS booking {ids_result.get('booking_reference')} for payment {payment.id}")
+
+        # IDSService.create_booking -> _store_booking_locally -> creates Booking
+        local_booking = await _booking_by_ids_reference(db, ids_booking_data["unique_id"])
+
+    if local_booking:
+        payment.booking_id = local_booking.id
+        local_booking.paid_amount = payment.amount
+        # Status is already set to confirmed in IDS storage service
+        db.add(local_booking)
+        logger.info(f"Linked payment {payment.id} to booking {local_booking.id}")
+    return local_booking
+
+
+async def send_payment_confirmation_email(booking: Booking, payment: Payment, db: AsyncSession) -> bool:
+    """Deposit confirmation for a paid booking; True once the guest has it.
+
+    The booking's confirmation_email_sent flag is claimed before sending, like every other
+    sender, so the dispatcher sweep and an outbox retry never both email the guest; a claim
+    held by someone else counts as sent. Commits the session.
+    """
+    from app.services.email import EmailService
+
+    room = (await db.execute(select(Room).where(Room.id == booking.room_id))).scalar()
+    if not room:
+        logger.warning(f"Booking {booking.id} has no room; confirmation email skipped")
+        return False
+
+    if not await claim_confirmation_email(db, booking.id, confirmed_only=False):
+        logger.info(f"Confirmation email for booking {booking.id} already sent; skipping")
+        return True
+
+    guest_name = f"{booking.guest_first_name or ''} {booking.guest_last_name or ''}".strip()
+    if not guest_name:
+        guest_name = "Valued Guest"
+
+    try:
+        email_sent = await EmailService().send_deposit_confirmation_email(
+            guest_email=booking.guest_email,
+            guest_name=guest_name,
+            check_in_date=booking.check_in_date,
+            check_out_date=booking.check_out_date,
+            room_name=room.name,
+            room_count=booking.number_of_rooms or 1,
+            adults=booking.occupancy_details.get("adults_total", 1) if booking.occupancy_details else 1,
+            caregiver=booking.caregiver_required,
+            total_amount=booking.total_amount,  # Already in rupees
+            deposit_amount=payment.amount,  # Already in rupees
+            confirmation_number=booking.confirmation_number
+        )
+    except Exception:
+        await release_confirmation_email(db, booking.id)
+        raise
+    if not email_sent:
+        await release_confirmation_email(db, booking.id)
+        return False
+    logger.info(f"Confirmation email sent successfully to {booking.guest_email} for booking {booking.id}")
+    return True
+
+
+async def settle_payu_callback(db: AsyncSession, payment: Payment, callback: Dict[str, Any]) -> bool:
+    """Apply one PayU callback to its payment and stage the follow-up steps.
+
+    Callbacks for the same txnid are settled one at a time, so a duplicate surl/furl POST
+    sees the first one's result: a payment that already succeeded is not credited twice,
+    and a late failure callback does not undo it. Returns False when nothing changed.
+    """
+    status = (callback.get("status") or "").lower()
+    if payment.status == "success":
+        logger.info(f"Payment {payment.id} already settled; ignoring duplicate {status or 'unknown'} callback")
+        return False
+
+    received_at = callback.get("received_at")
+    payment.payment_intent_id = callback.get("mihpayid")
+    payment.raw_response = callback.get("data")
+    payment.completed_at = datetime.fromisoformat(received_at) if received_at else datetime.utcnow()
+    payment.status = "success" if status == "success" else "failed"
+    if payment.status != "success":
+        return True
+
+    if payment.booking_id:
+        # If booking already exists, just update payment amount
+        booking = await db.get(Booking, payment.booking_id)
+        if booking:
+            booking.paid_amount += payment.amount
+            # Update booking status based on payment type
+            if payment.payment_type == "deposit" and booking.doctor_review_required:
+                booking.status = "pending_medical"
+            elif booking.paid_amount >= booking.total_amount:
+                booking.status = "reserved"
+            payment_outbox.add(db, CONFIRMATION_EMAIL, f"booking:{booking.id}", {"payment_id": payment.id})
+    else:
+        # If no booking exists, create it via IDS first, then email the guest
+        aggregate_key = f"payment:{payment.id}"
+        payment_outbox.add(db, IDS_BOOKING, aggregate_key, {"payment_id": payment.id})
+        payment_outbox.add(db, CONFIRMATION_EMAIL, aggregate_key, {"payment_id": payment.id})
+    return True
+
+
+async def _deliver_payu_settlement(db: AsyncSession, payload: Dict[str, Any]) -> None:
+    payment = await db.get(Payment, payload["payment_id"])
+    if payment is None:
+        logger.error(f"Payment {payload['payment_id']} vanished before its PayU callback was settled")
+        return
+    await settle_payu_callback(db, payment, payload)
+
+
+async def _deliver_ids_booking(db: AsyncSession, payload: Dict[str, Any]) -> None:
+    payment = await db.get(Payment, payload["payment_id"])
+    if payment is None or payment.booking_id:
+        return
+    await create_booking_from_payment(payment, db)
+
+
+async def _deliver_confirmation_email(db: AsyncSession, payload: Dict[str, Any]) -> None:
+    payment = await db.get(Payment, payload["payment_id"])
+    if payment is None or not payment.booking_id:
+        # The IDS booking step gave up; there is nothing to confirm
+        logger.warning(f"Payment {payload['payment_id']} has no booking; confirmation email skipped")
+        return
+    booking = await db.get(Booking, payment.booking_id)
+    if booking is None:
+        return
+    if not await send_payment_confirmation_email(booking, payment, db):
+        raise ExternalServiceError("Email", f"confirmation email for booking {booking.id} was not sent")
+
+
+# Outbox kind -> delivery function (runs in its own session, committed on success)
+HANDLERS: Dict[str, Callable[[AsyncSession, Dict[str, Any]], Awaitable[None]]] = {
+    PAYU_SETTLEMENT: _deliver_payu_settlement,
+    IDS_BOOKING: _deliver_ids_booking,
+    CONFIRMATION_EMAIL: _deliver_confirmation_email,
+}
+
+
+class PaymentOutbox(DurableQueue):
+    """Durable outbox over outbox_messages plus its worker pool"""
+
+    model = OutboxMessage
+    key_column = "aggregate_key"
+    kind_column = "kind"
+    created_column = "created_at"
+    settings_prefix = "OUTBOX"
+    label = "Outbox"
+    done_label = "delivered"
+    latency_label = "delivery_lag"
+    lag_label = "outbox_lag_seconds"
+
+    def add(self, db: AsyncSession, kind: str, aggregate_key: str, payload: Dict[str, Any]) -> OutboxMessage:
+        """Stage an outbox row in the caller's transaction; it is delivered once that commits"""
+        message = OutboxMessage(kind=kind, aggregate_key=aggregate_key[:64], payload=payload)
+        db.add(message)
+        return message
+
+    async def deliver(self, session: AsyncSession, message: OutboxMessage) -> None:
+        await HANDLERS[message.kind](session, message.payload)
+
+
+# Global payment outbox instance
+payment_outbox = PaymentOutbox()
+
+# Global PayU webhook response-time window (receipt to response)
+payu_webhook_latency = LatencyWindow("payu_webhook")
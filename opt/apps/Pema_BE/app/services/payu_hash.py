@@ -0,0 +1,189 @@
+"""
+PayU response hash verification
+Builds candidate reverse-hash sequences lazily (salt x field sources x blank layout x
+additionalCharges prefix), tries the variants that matched before first, and stops at the
+first constant-time match instead of SHA-512ing the whole cartesian product per callback
+"""
+
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple
+import hashlib
+import hmac
+import itertools
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Blank layouts seen from PayU: UDFs spelled out, or 10/11 empty fields in their place
+CLASSIC = "classic"
+BLANK10 = "blank10"
+BLANK11 = "blank11"
+LAYOUTS = (CLASSIC, BLANK10, BLANK11)
+
+FIELD_AXES = ("email", "firstname", "productinfo", "amount")
+UDF_AXES = ("udf1", "udf2", "udf3", "udf4", "udf5")
+
+# A variant is one choice per axis: (axis, index into that axis's options)
+Variant = Tuple[Tuple[str, object], ...]
+
+# How many candidate hashes to keep for the failure log
+SAMPLE_SIZE = 3
+
+
+def _format_amount(value: str) -> str:
+    if value in (None, ""):
+        return ""
+    try:
+        return f"{float(value):.2f}"
+    except (TypeError, ValueError):
+        return str(value)
+
+
+def _options(values: Optional[Sequence[str]]) -> List[Tuple[int, str]]:
+    """Distinct values with the index of their first occurrence; the index is the stable label"""
+    seen: Set[str] = set()
+    options = []
+    for index, value in enumerate(values or [""]):
+        value = value or ""
+        if value not in seen:
+            seen.add(value)
+            options.append((index, value))
+    return options
+
+
+def describe_variant(variant: Variant) -> str:
+    return ",".join(f"{axis}={choice}" for axis, choice in variant)
+
+
+@dataclass
+class HashVerification:
+    valid: bool
+    matched_hash: Optional[str] = None
+    variant: Optional[str] = None
+    tried: int = 0
+    sample: List[str] = field(default_factory=list)
+
+
+class PayUResponseHashVerifier:
+    """Lazy, history-ordered search for the PayU response hash layout"""
+
+    def __init__(self):
+        self.variant_hits: Counter = Counter()
+        self.axis_hits: Dict[str, Counter] = {}
+        self.verifications = 0
+        self.matches = 0
+        self.hashes_computed = 0
+
+    def _ordered(self, axis: str, options: List[Tuple[object, str]]) -> List[Tuple[object, str]]:
+        """Options for one axis, most historically successful first (stable otherwise)"""
+        hits = self.axis_hits.get(axis)
+        if not hits:
+            return options
+        return sorted(options, key=lambda option: -hits[option[0]])
+
+    @staticmethod
+    def _sequence(choice: Dict[str, str], status: str, txnid: str, key: str) -> str:
+        tail = f"{choice['email']}|{choice['firstname']}|{choice['productinfo']}|{choice['amount']}|{txnid}|{key}"
+        layout = choice["layout"]
+        if layout == CLASSIC:
+            udfs = "|".join(choice[axis] for axis in reversed(UDF_AXES))
+            seq = f"{choice['salt']}|{status}|||||{udfs}|{tail}"
+        else:
+            blanks = "|" * (10 if layout == BLANK10 else 11)
+            seq = f"{choice['salt']}|{status}{blanks}{tail}"
+        if choice["charges"]:
+            seq = f"{choice['charges']}|{seq}"
+        return seq
+
+    def candidates(
+        self,
+        *,
+        salts: Sequence[str],
+        status: str,
+        txnid: str,
+        key: str,
+        fields: Dict[str, Sequence[str]],
+        additional_charges: Optional[str] = None,
+    ) -> Iterator[Tuple[Variant, str]]:
+        """Yield (variant, sha512 hex) pairs: previous winners first, then the rest of the product"""
+        axes: Dict[str, List[Tuple[object, str]]] = {
+            "layout": [(layout, layout) for layout in LAYOUTS],
+            "charges": [(False, "")] + ([(True, additional_charges)] if additional_charges else []),
+            "salt": _options(salts),
+        }
+        for axis in FIELD_AXES + UDF_AXES:
+            values = fields.get(axis)
+            if axis == "amount":
+                values = [_format_amount(value) for value in (values or [""])]
+            axes[axis] = _options(values)
+        values_by_axis = {axis: dict(options) for axis, options in axes.items()}
+
+        def _axes_for(layout: str) -> Tuple[str, ...]:
+            # Blank layouts do not carry UDFs, so their UDF choices would only repeat hashes
+            base = ("layout", "charges", "salt") + FIELD_AXES
+            return base + UDF_AXES if layout == CLASSIC else base
+
+        def _hash(variant: Variant) -> str:
+            choice = {axis: values_by_axis[axis][label] for axis, label in variant}
+            self.hashes_computed += 1
+            return hashlib.sha512(self._sequence(choice, status, txnid, key).encode()).hexdigest().lower()
+
+        tried: Set[Variant] = set()
+        for variant, _ in self.variant_hits.most_common():
+            if all(label in values_by_axis[axis] for axis, label in variant):
+                tried.add(variant)
+                yield variant, _hash(variant)
+
+        for layout, _ in self._ordered("layout", axes["layout"]):
+            names = _axes_for(layout)
+            ordered = [[(layout, layout)]] + [self._ordered(axis, axes[axis]) for axis in names[1:]]
+            for combo in itertools.product(*ordered):
+                variant = tuple((axis, option[0]) for axis, option in zip(names, combo))
+                if variant not in tried:
+                    yield variant, _hash(variant)
+
+    def record(self, variant: Variant) -> None:
+        self.variant_hits[variant] += 1
+        for axis, label in variant:
+            self.axis_hits.setdefault(axis, Counter())[label] += 1
+
+    def verify(self, posted_hashes: Sequence[Optional[str]], **kwargs) -> HashVerification:
+        """Compare candidates against every posted hash (v1/v2) and stop at the first match"""
+        self.verifications += 1
+        posted = [value.lower().encode() for value in posted_hashes if value]
+        result = HashVerification(valid=False)
+        if not posted:
+            return result
+
+        for variant, candidate in self.candidates(**kwargs):
+            result.tried += 1
+            if len(result.sample) < SAMPLE_SIZE:
+                result.sample.append(candidate)
+            encoded = candidate.encode()
+            # Compare against every posted hash so timing does not depend on which one matched
+            matched = [value for value in posted if hmac.compare_digest(encoded, value)]
+            if matched:
+                self.record(variant)
+                self.matches += 1
+                result.valid = True
+                result.matched_hash = matched[0].decode()
+                result.variant = describe_variant(variant)
+                logger.info(f"PayU response hash matched variant {result.variant} after {result.tried} candidates")
+                return result
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "verifications": self.verifications,
+            "matches": self.matches,
+            "hashes_computed": self.hashes_computed,
+            "top_variants": [
+                {"variant": describe_variant(variant), "matches": hits}
+                for variant, hits in self.variant_hits.most_common(5)
+            ],
+        }
+
+
+# Global PayU response hash verifier instance
+payu_hash_verifier = PayUResponseHashVerifier()
@@ -4,12 +4,14 @@ Pricing service for calculating booking prices
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, or_
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from datetime import date
 import logging
 
 from app.models import Program, Room, PricingBand
 from app.core.config import settings
+from app.services.pricing_index import pricing_band_index
+from app.services.rate_calendar import StayRates, rate_calendar
 
 logger = logging.getLogger(__name__)
 
@@ -36,24 +38,118 @@ class PricingService:
         adults_distribution: Optional[list[int]] = None
     ) -> Dict:
         """Calculate total price for booking"""
+        results = await self.calculate_prices_batch(
+            room_id=room_id,
+            nights=nights,
+            scenarios=[{
+                "adults": adults,
+                "children": children,
+                "children_ages": children_ages,
+                "teens_13_18": teens_13_18,
+                "caregiver_required": caregiver_required,
+                "caregiver_stay_with_guest": caregiver_stay_with_guest,
+                "caregiver_meal": caregiver_meal,
+                "adults_distribution": adults_distribution,
+            }],
+            program_id=program_id,
+            check_in_date=check_in_date,
+        )
+        return results[0]
+
+    async def calculate_prices_batch(
+        self,
+        room_id: int,
+        nights: int,
+        scenarios: List[Dict],
+        program_id: Optional[int] = None,
+        check_in_date: Optional[date] = None,
+        room: Optional[Room] = None
+    ) -> List[Dict]:
+        """Price several occupancy/caregiver scenarios for one room and stay.
 
-        logger.info(f"Pricing calculation started: room_id={room_id}, adults={adults}, nights={nights}")
+        Each scenario is a dict of calculate_price keyword arguments (adults, children,
+        children_ages, teens_13_18, caregiver_*). The room and pricing band are resolved
+        once for the whole batch; pass an already-loaded room to skip the room query.
+        Breakdowns are returned in scenario order.
+        """
+
+        logger.info(f"Pricing calculation started: room_id={room_id}, scenarios={len(scenarios)}, nights={nights}")
 
         # Get room; program is optional (decided later by doctor)
-        room = await self._get_room(room_id)
+        if room is None:
+            room = await self._get_room(room_id)
         if not room:
             raise ValueError("Room not found")
         program = await self._get_program(program_id) if program_id else None
 
         logger.info(f"Room and program loaded: room={room.name}, program={program.title if program else None}")
-        
-        # Decide adult count including teens (charged at adult rates)
-        effective_adults = adults + max(0, teens_13_18)
 
-        # Try pricing bands first
+        # Rates depend only on program, room, stay length and dates, so they are shared by all scenarios
         logger.info(f"Looking for pricing band: program_id={program_id}, room_id={room_id}, nights={nights}")
         pricing_band = await self._find_pricing_band(program_id, room_id, nights, check_in_date)
-        logger.info(f"Pricing band found: {pricing_band.id if pricing_band else None}")
+        stay_rates = None
+        if check_in_date is not None:
+            # Price each night from its own season; falls back to the check-in band outside the calendar
+            stay_rates = rate_calendar.stay_rates(program_id, room_id, check_in_date, nights)
+        logger.info(
+            f"Pricing band found: {pricing_band.id if pricing_band else None}, "
+            f"calendar bands: {stay_rates.band_ids if stay_rates else None}"
+        )
+
+        return [
+            self._price_scenario(room, pricing_band, nights, stay_rates=stay_rates, **scenario)
+            for scenario in scenarios
+        ]
+
+    async def price_check_ins(
+        self,
+        room: Room,
+        nights: int,
+        check_in_dates: List[date],
+        adults: int,
+        children: int = 0
+    ) -> List[int]:
+        """Base stay price for each candidate check-in date (no caregiver/child meal extras).
+
+        Uses the nightly rate calendar, so each date costs a few prefix-sum lookups;
+        dates it cannot price fall back to the check-in band or the room's own rates.
+        """
+        await pricing_band_index.ensure_fresh(self.db)
+        prices: List[int] = []
+        for check_in in check_in_dates:
+            stay_rates = rate_calendar.stay_rates(None, room.id, check_in, nights)
+            if stay_rates is not None:
+                prices.append(stay_rates.base_price(room, adults, children))
+                continue
+            pricing_band = pricing_band_index.lookup(None, room.id, nights, check_in)
+            if pricing_band:
+                prices.append(pricing_band.calculate_price(nights, adults, children))
+            else:
+                prices.append(room.get_price_for_occupancy(adults, children) * nights)
+        return prices
+
+    def _price_scenario(
+        self,
+        room: Room,
+        pricing_band: Optional[PricingBand],
+        nights: int,
+        adults: int,
+        stay_rates: Optional[StayRates] = None,
+        children: int = 0,
+        children_ages: Optional[list[int]] = None,
+        teens_13_18: int = 0,
+        caregiver_required: bool = False,
+        caregiver_stay_with_guest: bool = False,
+        caregiver_meal: Optional[str] = None,
+        adults_distribution: Optional[list[int]] = None
+    ) -> Dict:
+        """Build the price breakdown for one scenario from a resolved room and band.
+
+        When nightly calendar rates are given they take precedence over the single band.
+        """
+
+        # Decide adult count including teens (charged at adult rates)
+        effective_adults = adults + max(0, teens_13_18)
 
         # Use the room's stored pricing category
         pricing_category = room.pricing_category
@@ -62,8 +158,15 @@ class PricingService:
         price_source = "not_set"
         rooms_breakdown: list[dict] = []
         per_night_rate = None
+        pricing_band_id = pricing_band.id if pricing_band else None
 
-        if pricing_band:
+        if stay_rates is not None:
+            price_source = stay_rates.price_source
+            pricing_band_id = stay_rates.pricing_band_id
+            base_price = stay_rates.base_price(room, effective_adults, children)
+            per_night_rate = stay_rates.per_night_rate(room, effective_adults, children)
+
+        elif pricing_band:
             price_source = "band"
             base_price = pricing_band.calculate_price(nights, effective_adults, children)
             # For display, estimate per-night rate if possible
@@ -157,7 +260,7 @@ class PricingService:
             "program_fee": program_fee,
             "total_price": total_price,
             "nights": nights,
-            "pricing_band_id": pricing_band.id if pricing_band else None,
+            "pricing_band_id": pricing_band_id,
             "price_source": price_source,
             "per_night_rate_used": per_night_rate,
             "rooms_breakdown": rooms_breakdown
@@ -186,83 +289,13 @@ class PricingService:
     ) -> Optional[PricingBand]:
         """Find most specific applicable pricing band"""
         
-        # Priority order:
+        # Priority order (resolved in memory by the pricing band index):
         # 1. Specific program + room
         # 2. Specific program only
         # 3. Specific room only
         # 4. Global pricing band
-        
-        queries = []
-        if program_id is not None:
-            queries.append(
-                select(PricingBand).where(
-                    and_(
-                        PricingBand.program_id == program_id,
-                        PricingBand.room_id == room_id,
-                        PricingBand.is_active == True,
-                        PricingBand.min_nights <= nights,
-                        or_(PricingBand.max_nights.is_(None), PricingBand.max_nights >= nights)
-                    )
-                )
-            )
-            queries.append(
-                select(PricingBand).where(
-                    and_(
-                        PricingBand.program_id == program_id,
-                        PricingBand.room_id.is_(None),
-                        PricingBand.is_active == True,
-                        PricingBand.min_nights <= nights,
-                        or_(PricingBand.max_nights.is_(None), PricingBand.max_nights >= nights)
-                    )
-                )
-            )
-        queries.append(
-            select(PricingBand).where(
-                and_(
-                    PricingBand.program_id.is_(None),
-                    PricingBand.room_id == room_id,
-                    PricingBand.is_active == True,
-                    PricingBand.min_nights <= nights,
-                    or_(PricingBand.max_nights.is_(None), PricingBand.max_nights >= nights)
-                )
-            )
-        )
-        queries.append(
-            select(PricingBand).where(
-                and_(
-                    PricingBand.program_id.is_(None),
-                    PricingBand.room_id.is_(None),
-                    PricingBand.is_active == True,
-                    PricingBand.min_nights <= nights,
-                    or_(PricingBand.max_nights.is_(None), PricingBand.max_nights >= nights)
-                )
-            )
-        )
-        
-        # Add seasonal filters if check_in_date is provided
-        if check_in_date:
-            for i, query in enumerate(queries):
-                queries[i] = query.where(
-                    or_(
-                        PricingBand.valid_from.is_(None),
-                        PricingBand.valid_from <= check_in_date
-                    )
-                ).where(
-                    or_(
-                        PricingBand.valid_until.is_(None),
-                        PricingBand.valid_until >= check_in_date
-                    )
-                )
-        
-        # Execute queries in priority order
-        for query in queries:
-            query = query.order_by(PricingBand.priority.desc(), PricingBand.created_at.desc())
-            result = await self.db.execute(query)
-            pricing_band = result.scalar()
-            if pricing_band:
-                return pricing_band
-        
-        return None
+        await pricing_band_index.ensure_fresh(self.db)
+        return pricing_band_index.lookup(program_id, room_id, nights, check_in_date)
     
     async def get_starting_price(self, program_id: int) -> Optional[int]:
         """Get starting price for a program"""
@@ -0,0 +1,215 @@
+"""
+Process-local pricing band index
+Resolves pricing bands in memory instead of running the program/room query cascade per price
+"""
+
+from sqlalchemy import select, func, event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from bisect import bisect_right
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+import asyncio
+import logging
+import time
+
+from app.models import PricingBand
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+IndexKey = Tuple[Optional[int], Optional[int]]
+
+
+class _BandList:
+    """Bands for one (program_id, room_id) key, sorted by min_nights for range pruning"""
+
+    def __init__(self, bands: List[PricingBand]):
+        self.bands = sorted(bands, key=lambda b: b.min_nights)
+        self.min_nights = [b.min_nights for b in self.bands]
+
+    def resolve(self, nights: int, check_in: Optional[datetime]) -> Optional[PricingBand]:
+        """Return the highest-precedence band covering the stay length and check-in date"""
+        best = None
+        # Only bands starting at or below the requested length can apply
+        for band in self.bands[:bisect_right(self.min_nights, nights)]:
+            if band.max_nights is not None and band.max_nights < nights:
+                continue
+            if check_in is not None:
+                if band.valid_from is not None and band.valid_from > check_in:
+                    continue
+                if band.valid_until is not None and band.valid_until < check_in:
+                    continue
+            if best is None or _precedence(band) > _precedence(best):
+                best = band
+        return best
+
+
+def _precedence(band: PricingBand) -> tuple:
+    """Same ordering as the SQL cascade: priority desc, then newest first"""
+    created = band.created_at
+    if created is not None and created.tzinfo is not None:
+        created = created.replace(tzinfo=None)
+    return (band.priority or 0, created or datetime.min)
+
+
+def _snapshot(row) -> PricingBand:
+    """Detached copy of a pricing band row that is safe to share across sessions"""
+    return PricingBand(**{column.key: row._mapping[column] for column in PricingBand.__table__.columns})
+
+
+class PricingBandIndex:
+    """Versioned in-memory index of active pricing bands keyed by (program_id, room_id)"""
+
+    def __init__(self, refresh_seconds: Optional[int] = None):
+        self.refresh_seconds = refresh_seconds
+        self.version = 0
+        self._entries: Dict[IndexKey, _BandList] = {}
+        self._fingerprint: Optional[tuple] = None
+        self._loaded = False
+        self._dirty = False
+        self._invalidations = 0
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+
+    def load_bands(self, bands: Iterable[PricingBand], fingerprint: Optional[tuple] = None) -> None:
+        """Replace the index contents with the given active bands"""
+        grouped: Dict[IndexKey, List[PricingBand]] = {}
+        for band in bands:
+            if not band.is_active:
+                continue
+            grouped.setdefault((band.program_id, band.room_id), []).append(band)
+        self._entries = {key: _BandList(items) for key, items in grouped.items()}
+        self._fingerprint = fingerprint
+        self._loaded = True
+        self._dirty = False
+        self._checked_at = time.monotonic()
+        self.version += 1
+        self.reloads += 1
+        logger.info(f"Pricing band index loaded: version={self.version}, keys={len(self._entries)}")
+
+    @property
+    def fingerprint(self) -> Optional[tuple]:
+        """Table fingerprint of the loaded bands; identical across workers for the same data"""
+        return self._fingerprint
+
+    def invalidate(self) -> None:
+        """Mark the index stale; the next lookup reloads it"""
+        self._invalidations += 1
+        self._dirty = True
+
+    async def ensure_fresh(self, db: AsyncSession) -> None:
+        """Reload when invalidated, never loaded, or the table fingerprint changed"""
+        if self._loaded and not self._dirty and not self._refresh_due():
+            self.hits += 1
+            return
+        self.misses += 1
+        async with self._lock:
+            if self._loaded and not self._dirty:
+                if not self._refresh_due():
+                    return
+                fingerprint = await self._fetch_fingerprint(db)
+                self._checked_at = time.monotonic()
+                if fingerprint == self._fingerprint:
+                    return
+            await self.reload(db)
+
+    async def reload(self, db: AsyncSession) -> None:
+        """Load all active pricing bands in one query"""
+        seen = self._invalidations
+        fingerprint = await self._fetch_fingerprint(db)
+        result = await db.execute(select(PricingBand.__table__).where(PricingBand.is_active == True))
+        self.load_bands([_snapshot(row) for row in result], fingerprint=fingerprint)
+        # An invalidation that raced with the query keeps the index stale
+        self._dirty = self._invalidations != seen
+
+    def lookup(
+        self,
+        program_id: Optional[int],
+        room_id: int,
+        nights: int,
+        check_in_date: Optional[date] = None
+    ) -> Optional[PricingBand]:
+        """Resolve the most specific band: program+room, program, room, then global"""
+        check_in = datetime.combine(check_in_date, datetime.min.time()) if check_in_date else None
+        for key in self._cascade(program_id, room_id):
+            entry = self._entries.get(key)
+            if entry is None:
+                continue
+            band = entry.resolve(nights, check_in)
+            if band is not None:
+                return band
+        return None
+
+    def candidates(self, program_id: Optional[int], room_id: int) -> List[PricingBand]:
+        """All indexed bands that may apply to a room, most specific key first"""
+        bands: List[PricingBand] = []
+        for key in self._cascade(program_id, room_id):
+            entry = self._entries.get(key)
+            if entry is not None:
+                bands.extend(entry.bands)
+        return bands
+
+    def stats(self) -> dict:
+        """Counters for monitoring index effectiveness"""
+        return {
+            "version": self.version,
+            "loaded": self._loaded,
+            "stale": self._dirty,
+            "keys": len(self._entries),
+            "bands": sum(len(entry.bands) for entry in self._entries.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "reloads": self.reloads,
+        }
+
+    def _cascade(self, program_id: Optional[int], room_id: int) -> List[IndexKey]:
+        keys: List[IndexKey] = []
+        if program_id is not None:
+            keys.append((program_id, room_id))
+            keys.append((program_id, None))
+        keys.append((None, room_id))
+        keys.append((None, None))
+        return keys
+
+    def _refresh_due(self) -> bool:
+        interval = self.refresh_seconds if self.refresh_seconds is not None else settings.PRICING_INDEX_REFRESH_SECONDS
+        if interval <= 0:
+            return False
+        return time.monotonic() - self._checked_at >= interval
+
+    async def _fetch_fingerprint(self, db: AsyncSession) -> tuple:
+        """Cheap change detector for edits made outside this process (SQL scripts, other workers)"""
+        result = await db.execute(
+            select(func.count(PricingBand.id), func.max(PricingBand.id), func.max(PricingBand.updated_at))
+        )
+        count, max_id, last_updated = result.one()
+        return (count, max_id, str(last_updated) if last_updated is not None else None)
+
+
+# Global pricing band index instance
+pricing_band_index = PricingBandIndex()
+
+
+@event.listens_for(Session, "after_flush")
+def _track_pricing_band_changes(session, flush_context):
+    """Remember that this transaction wrote pricing bands"""
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, PricingBand):
+            session.info["pricing_bands_changed"] = True
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    """Invalidate the index once pricing band writes are committed"""
+    if session.info.pop("pricing_bands_changed", False):
+        pricing_band_index.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_on_rollback(session):
+    session.info.pop("pricing_bands_changed", None)
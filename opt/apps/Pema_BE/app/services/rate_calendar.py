@@ -0,0 +1,269 @@
+"""
+Nightly rate calendar
+Precomputes per-night rates from the pricing band index with prefix sums, so a stay that
+crosses season boundaries is priced night by night with two array lookups per rate component
+"""
+
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from app.models import PricingBand, Room
+from app.models.pricing import PricingType
+from app.core.config import settings
+from app.services.pricing_index import PricingBandIndex, pricing_band_index
+
+logger = logging.getLogger(__name__)
+
+CalendarKey = Tuple[Optional[int], int]
+
+# Rates are stored scaled by 100 with the band discount already applied, so sums stay integral
+SCALE = 100
+
+# Per-night components, indexed by occupancy: single, double, per extra adult, per child
+COMPONENTS = ("single", "double", "extra_adult", "child")
+
+
+def _band_signature(band: PricingBand) -> tuple:
+    """Fields that change nightly rates; equal signatures mean the band priced nights identically"""
+    return (
+        band.program_id, band.room_id, band.min_nights, band.max_nights, band.pricing_type,
+        band.price_single, band.price_double, band.price_extra_adult, band.price_child,
+        band.discount_percentage, band.priority, band.valid_from, band.valid_until, band.created_at,
+    )
+
+
+def _scaled_rates(band: PricingBand) -> Tuple[int, int, int, int]:
+    keep = SCALE - (band.discount_percentage or 0)
+    return (
+        band.price_single * keep,
+        band.price_double * keep,
+        (band.price_extra_adult or 0) * keep,
+        (band.price_child or 0) * keep,
+    )
+
+
+def _ceil_div(value: int, divisor: int) -> int:
+    return -((-value) // divisor)
+
+
+@dataclass
+class StayRates:
+    """Summed nightly rates for one stay, as read from the calendar"""
+
+    nights: int
+    sums: Tuple[int, int, int, int]
+    uncovered_nights: int
+    band_ids: List[int] = field(default_factory=list)
+
+    @property
+    def pricing_band_id(self) -> Optional[int]:
+        return self.band_ids[0] if self.band_ids else None
+
+    @property
+    def price_source(self) -> str:
+        if not self.band_ids:
+            return "room_default"
+        if len(self.band_ids) == 1 and not self.uncovered_nights:
+            return "band"
+        return "calendar"
+
+    def base_price(self, room: Room, adults: int, children: int = 0) -> int:
+        """Stay price matching PricingBand.calculate_price per night; nights without a band use room rates"""
+        single, double, extra_adult, child = self.sums
+        scaled = single if adults == 1 else double
+        if adults > 2:
+            scaled += (adults - 2) * extra_adult
+        if children > 0:
+            scaled += children * child
+        scaled += self.uncovered_nights * room.get_price_for_occupancy(adults, children) * SCALE
+        # PricingBand.calculate_price rounds the discount down, i.e. the price up
+        return max(0, _ceil_div(scaled, SCALE))
+
+    def per_night_rate(self, room: Room, adults: int, children: int = 0) -> Optional[int]:
+        """Average nightly rate over the stay, for display and caregiver guest pricing"""
+        if self.nights <= 0:
+            return None
+        single, double, _, _ = self.sums
+        scaled = single if adults <= 1 else double
+        scaled += self.uncovered_nights * room.get_price_for_occupancy(adults, children) * SCALE
+        return _ceil_div(scaled, SCALE) // self.nights
+
+
+class _Tier:
+    """Nightly rates for one stay-length tier; every length in the tier resolves the same bands"""
+
+    def __init__(self, min_nights: int, days: int):
+        self.min_nights = min_nights
+        self.bands: List[Optional[PricingBand]] = [None] * days
+        self.prefix: List[List[int]] = [[0] * (days + 1) for _ in COMPONENTS]
+        self.uncovered: List[int] = [0] * (days + 1)
+        self.packages: List[int] = [0] * (days + 1)
+
+    def rebuild_prefix(self, start: int) -> None:
+        """Recompute cumulative sums from day index `start` to the end of the horizon"""
+        for i in range(start, len(self.bands)):
+            band = self.bands[i]
+            rates = (0, 0, 0, 0)
+            if band is not None and band.pricing_type != PricingType.PER_PACKAGE.value:
+                rates = _scaled_rates(band)
+            for prefix, rate in zip(self.prefix, rates):
+                prefix[i + 1] = prefix[i] + rate
+            self.uncovered[i + 1] = self.uncovered[i] + (band is None)
+            is_package = band is not None and band.pricing_type == PricingType.PER_PACKAGE.value
+            self.packages[i + 1] = self.packages[i] + is_package
+
+
+class RoomRateCalendar:
+    """Rate calendar for one (program_id, room_id) from `start` over `days` nights"""
+
+    def __init__(self, program_id: Optional[int], room_id: int, start: date, days: int):
+        self.program_id = program_id
+        self.room_id = room_id
+        self.start = start
+        self.days = days
+        self.index_version: Optional[int] = None
+        self.bands: Dict[int, PricingBand] = {}
+        self.breakpoints: List[int] = []
+        self.tiers: List[_Tier] = []
+
+    def build(self, index: PricingBandIndex) -> None:
+        """Resolve every night of every tier from scratch"""
+        bands = index.candidates(self.program_id, self.room_id)
+        self.breakpoints = _breakpoints(bands)
+        self.tiers = [_Tier(min_nights, self.days) for min_nights in self.breakpoints]
+        for tier in self.tiers:
+            self._resolve_days(index, tier, 0, self.days)
+            tier.rebuild_prefix(0)
+        self.bands = {band.id: band for band in bands}
+        self.index_version = index.version
+
+    def refresh(self, index: PricingBandIndex) -> int:
+        """Bring the calendar up to the index version; returns the number of nights re-resolved"""
+        bands = {band.id: band for band in index.candidates(self.program_id, self.room_id)}
+        changed: List[PricingBand] = []
+        for band_id in set(bands) | set(self.bands):
+            old, new = self.bands.get(band_id), bands.get(band_id)
+            if old is None or new is None or _band_signature(old) != _band_signature(new):
+                changed.extend(band for band in (old, new) if band is not None)
+        if not changed:
+            self.index_version = index.version
+            return 0
+        if _breakpoints(list(bands.values())) != self.breakpoints:
+            self.build(index)
+            return self.days * len(self.tiers)
+
+        # Only nights inside the old or new validity window of a changed band can resolve differently
+        first, last = self.days, 0
+        for band in changed:
+            first = min(first, self._day_index(band.valid_from, default=0))
+            last = max(last, self._day_index(band.valid_until, default=self.days - 1) + 1)
+        first, last = max(0, first), min(self.days, last)
+        for tier in self.tiers:
+            self._resolve_days(index, tier, first, last)
+            tier.rebuild_prefix(first)
+        self.bands = bands
+        self.index_version = index.version
+        return max(0, last - first) * len(self.tiers)
+
+    def stay_rates(self, check_in: date, nights: int) -> Optional[StayRates]:
+        """Sum nightly rates for [check_in, check_in + nights); None when outside the horizon
+        or when a night falls under a per-package band, which cannot be split by night"""
+        first = (check_in - self.start).days
+        last = first + nights
+        if nights <= 0 or first < 0 or last > self.days:
+            return None
+        tier = self.tiers[bisect_right(self.breakpoints, nights) - 1]
+        if tier.packages[last] != tier.packages[first]:
+            return None
+        band_ids: List[int] = []
+        for band in tier.bands[first:last]:
+            if band is not None and (not band_ids or band_ids[-1] != band.id):
+                band_ids.append(band.id)
+        return StayRates(
+            nights=nights,
+            sums=tuple(prefix[last] - prefix[first] for prefix in tier.prefix),
+            uncovered_nights=tier.uncovered[last] - tier.uncovered[first],
+            band_ids=band_ids,
+        )
+
+    def _resolve_days(self, index: PricingBandIndex, tier: _Tier, first: int, last: int) -> None:
+        for i in range(first, last):
+            night = self.start + timedelta(days=i)
+            tier.bands[i] = index.lookup(self.program_id, self.room_id, tier.min_nights, night)
+
+    def _day_index(self, moment: Optional[datetime], default: int) -> int:
+        if moment is None:
+            return default
+        day = moment.date() if isinstance(moment, datetime) else moment
+        return (day - self.start).days
+
+
+def _breakpoints(bands: List[PricingBand]) -> List[int]:
+    """Stay lengths at which the set of length-eligible bands changes"""
+    points = {1}
+    for band in bands:
+        points.add(max(1, band.min_nights))
+        if band.max_nights is not None:
+            points.add(band.max_nights + 1)
+    return sorted(points)
+
+
+class RateCalendar:
+    """Per-room rate calendars kept in step with the pricing band index"""
+
+    def __init__(self, index: PricingBandIndex = pricing_band_index, horizon_days: Optional[int] = None):
+        self.index = index
+        self.horizon_days = horizon_days
+        self._calendars: Dict[CalendarKey, RoomRateCalendar] = {}
+        self.builds = 0
+        self.refreshes = 0
+        self.nights_resolved = 0
+
+    def stay_rates(
+        self,
+        program_id: Optional[int],
+        room_id: int,
+        check_in: date,
+        nights: int,
+        today: Optional[date] = None
+    ) -> Optional[StayRates]:
+        """Price a stay from the calendar; the caller must have refreshed the index"""
+        return self.calendar(program_id, room_id, today=today).stay_rates(check_in, nights)
+
+    def calendar(self, program_id: Optional[int], room_id: int, today: Optional[date] = None) -> RoomRateCalendar:
+        """Calendar for a room, built on first use and updated incrementally on index changes"""
+        today = today or date.today()
+        key = (program_id, room_id)
+        calendar = self._calendars.get(key)
+        if calendar is None or calendar.start != today:
+            calendar = RoomRateCalendar(program_id, room_id, today, self._horizon())
+            calendar.build(self.index)
+            self._calendars[key] = calendar
+            self.builds += 1
+            self.nights_resolved += calendar.days * len(calendar.tiers)
+        elif calendar.index_version != self.index.version:
+            self.nights_resolved += calendar.refresh(self.index)
+            self.refreshes += 1
+        return calendar
+
+    def clear(self) -> None:
+        self._calendars.clear()
+
+    def stats(self) -> dict:
+        return {
+            "calendars": len(self._calendars),
+            "horizon_days": self._horizon(),
+            "builds": self.builds,
+            "refreshes": self.refreshes,
+            "nights_resolved": self.nights_resolved,
+        }
+
+    def _horizon(self) -> int:
+        return self.horizon_days if self.horizon_days is not None else settings.RATE_CALENDAR_HORIZON_DAYS
+
+
+# Global rate calendar instance
+rate_calendar = RateCalendar()
@@ -0,0 +1,167 @@
+"""
+Room and rate plan code registry
+One precompiled set of lookup tables for IDS room codes, room categories and the codes
+stored in room_availability, shared by the outbound (bookings, availability queries,
+catalogue) and inbound (inventory, room type deltas) paths; reload() re-reads the
+environment and .env and rebuilds it without a restart
+"""
+
+from typing import Dict, FrozenSet, Optional
+import logging
+
+from app.core.config import Settings, settings
+from app.models.room import RoomCategory
+
+logger = logging.getLogger(__name__)
+
+# Category -> PMS InvTypeCode sent with bookings and shown in the public room list
+PMS_ROOM_CODES: Dict[str, str] = {
+    RoomCategory.STANDARD.value: "STT",
+    RoomCategory.PREMIUM_BALCONY.value: "PBT",
+    RoomCategory.PREMIUM_GARDEN.value: "PGT",
+    RoomCategory.EXECUTIVE.value: "EXT",
+    RoomCategory.GARDEN_EXECUTIVE_SUITE.value: "GES",
+    RoomCategory.EXECUTIVE_JUNIOR_SUITE.value: "SUI",
+    RoomCategory.ELEMENTAL_VILLA.value: "PEV",
+    RoomCategory.PEMA_SUITE.value: "PES",
+}
+
+# Inbound IDS codes whose category differs from (or is missing in) the inverse of PMS_ROOM_CODES
+IDS_CODE_CATEGORIES: Dict[str, str] = {
+    "STD": RoomCategory.STANDARD.value,
+    "STQ": RoomCategory.STANDARD.value,
+    "STT": RoomCategory.STANDARD.value,
+    "EXT": RoomCategory.EXECUTIVE.value,
+    "EXQ": RoomCategory.EXECUTIVE.value,
+    "PBQ": RoomCategory.PREMIUM_BALCONY.value,
+    "PBT": RoomCategory.PREMIUM_BALCONY.value,
+    "PGT": RoomCategory.PREMIUM_GARDEN.value,
+    "DLX": RoomCategory.PREMIUM_GARDEN.value,
+    "SUI": RoomCategory.EXECUTIVE_JUNIOR_SUITE.value,
+}
+
+# Inbound IDS inventory codes accepted into room_availability. Narrower than the table above:
+# DLX is a room type delta alias only, and its counts must never overwrite real PGT rows
+INVENTORY_CODE_CATEGORIES: Dict[str, str] = {
+    "STD": RoomCategory.STANDARD.value,
+    "STQ": RoomCategory.STANDARD.value,
+    "STT": RoomCategory.STANDARD.value,
+    "EXT": RoomCategory.EXECUTIVE.value,
+    "EXQ": RoomCategory.EXECUTIVE.value,
+    "PBQ": RoomCategory.PREMIUM_BALCONY.value,
+    "PBT": RoomCategory.PREMIUM_BALCONY.value,
+    "PGT": RoomCategory.PREMIUM_GARDEN.value,
+    "SUI": RoomCategory.EXECUTIVE_JUNIOR_SUITE.value,
+}
+
+# Category -> room_code stored in room_availability
+STORAGE_ROOM_CODES: Dict[str, str] = {
+    RoomCategory.STANDARD.value: "STD",
+    RoomCategory.EXECUTIVE.value: "EXT",
+    RoomCategory.PREMIUM_BALCONY.value: "PBQ",
+    RoomCategory.PREMIUM_GARDEN.value: "PGT",
+    RoomCategory.EXECUTIVE_JUNIOR_SUITE.value: "SUI",
+}
+
+# Category -> InvTypeCode in the room type catalogue built from the rooms table
+CATALOGUE_ROOM_CODES: Dict[str, str] = {
+    RoomCategory.STANDARD.value: "STD",
+    RoomCategory.PREMIUM_BALCONY.value: "PBQ",
+    RoomCategory.PREMIUM_GARDEN.value: "PGT",
+    RoomCategory.EXECUTIVE.value: "EXT",
+    RoomCategory.EXECUTIVE_JUNIOR_SUITE.value: "EXQ",
+    RoomCategory.EXECUTIVE_SUITE.value: "EXS",
+    RoomCategory.ELEMENTAL_VILLA.value: "EVT",
+    RoomCategory.PEMA_SUITE.value: "PES",
+}
+
+
+class _CodeTables:
+    """Immutable snapshot of every table; reload() swaps the whole snapshot at once"""
+
+    def __init__(self, room_codes: Dict[str, str], rate_plans: Dict[str, str], pms_codes: Dict[str, str]):
+        self.room_codes = room_codes
+        self.rate_plans = rate_plans
+        self.ids_room_codes: FrozenSet[str] = frozenset(room_codes.values())
+        self.ids_rate_plans: FrozenSet[str] = frozenset(rate_plans.values())
+        self.pms_codes = pms_codes
+        # Every code we send resolves back to its category; explicit inbound aliases win
+        self.categories = {code: category for category, code in pms_codes.items()}
+        self.categories.update(IDS_CODE_CATEGORIES)
+
+
+class RoomCodeRegistry:
+    """O(1) code lookups in both directions, built from settings and rebuilt by reload()"""
+
+    def __init__(self):
+        self.version = 0
+        self._load(settings)
+
+    def _load(self, source: Settings) -> None:
+        self._tables = _CodeTables(
+            dict(source.IDS_ROOM_CODE_MAPPING or {}),
+            dict(source.IDS_RATE_PLAN_MAPPING or {}),
+            {**PMS_ROOM_CODES, **(source.IDS_CATEGORY_ROOM_CODES or {})},
+        )
+        self.version += 1
+        logger.info(f"Room code registry loaded (version {self.version})")
+
+    def reload(self) -> None:
+        """Rebuild from a fresh Settings(); the process-wide settings object never re-reads the environment"""
+        self._load(Settings())
+
+    @property
+    def room_code_mapping(self) -> Dict[str, str]:
+        return self._tables.room_codes
+
+    @property
+    def rate_plan_mapping(self) -> Dict[str, str]:
+        return self._tables.rate_plans
+
+    def to_ids_room_code(self, code: str) -> str:
+        """Internal room code -> IDS InvTypeCode; codes that already are IDS codes pass through"""
+        tables = self._tables
+        if code in tables.ids_room_codes:
+            return code
+        return tables.room_codes.get(code, code)
+
+    def to_ids_rate_plan(self, category: str) -> str:
+        """Pricing category -> IDS RatePlanCode; codes that already are IDS codes pass through"""
+        tables = self._tables
+        if category in tables.ids_rate_plans:
+            return category
+        return tables.rate_plans.get(category, category)
+
+    def pms_code_for_category(self, category: str, default: Optional[str] = None) -> Optional[str]:
+        return self._tables.pms_codes.get(category, category if default is None else default)
+
+    def category_for_ids_code(self, code: str) -> Optional[str]:
+        return self._tables.categories.get(code)
+
+    def storage_code_for_category(self, category: str) -> Optional[str]:
+        return STORAGE_ROOM_CODES.get(category)
+
+    def storage_code_for_inventory(self, code: str) -> Optional[str]:
+        """room_availability room_code for an inbound IDS inventory code; None if it is not stored"""
+        category = INVENTORY_CODE_CATEGORIES.get(code)
+        return STORAGE_ROOM_CODES.get(category) if category else None
+
+    def catalogue_code_for_category(self, category: str) -> str:
+        return CATALOGUE_ROOM_CODES.get(category) or category.replace(" ", "").upper()[:3]
+
+    def snapshot(self) -> dict:
+        tables = self._tables
+        return {
+            "version": self.version,
+            "room_code_mapping": tables.room_codes,
+            "rate_plan_mapping": tables.rate_plans,
+            "pms_room_codes": tables.pms_codes,
+            "ids_code_categories": tables.categories,
+            "inventory_code_categories": INVENTORY_CODE_CATEGORIES,
+            "storage_room_codes": STORAGE_ROOM_CODES,
+            "catalogue_room_codes": CATALOGUE_ROOM_CODES,
+        }
+
+
+# Global room code registry instance
+room_codes = RoomCodeRegistry()
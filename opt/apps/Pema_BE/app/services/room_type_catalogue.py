@@ -0,0 +1,190 @@
+"""
+Room-type catalogue cache
+Keeps the room type / rate plan catalogue (from the PMS or built from the rooms table) in
+memory; reads are served from memory, refreshes happen in the background, deltas and room
+writes invalidate it, and a failed refresh keeps serving the last good catalogue
+"""
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import logging
+import time
+
+from app.core.config import settings
+from app.models import Room
+
+logger = logging.getLogger(__name__)
+
+Loader = Callable[[], Awaitable[Dict[str, Any]]]
+
+
+class RoomTypeCatalogue:
+    """TTL cache around one catalogue loader, with serve-stale-on-error.
+
+    `from_rooms` marks catalogues built from the rooms table; committed Room writes
+    invalidate those.
+    """
+
+    def __init__(self, name: str, loader: Loader, from_rooms: bool = False):
+        self.name = name
+        self.loader = loader
+        self.from_rooms = from_rooms
+        self._value: Optional[Dict[str, Any]] = None
+        self._loaded_at = 0.0
+        self._generation = 0
+        self._loaded_generation = 0
+        self._failed_at = 0.0
+        self._last_failure: Optional[Dict[str, Any]] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._loop_task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.refreshes = 0
+        self.errors = 0
+        self.stale_served = 0
+        room_type_catalogues.append(self)
+
+    def _stale(self) -> bool:
+        return (
+            self._loaded_generation != self._generation
+            or time.monotonic() - self._loaded_at >= settings.ROOM_TYPE_CATALOGUE_TTL_SECONDS
+        )
+
+    def _backing_off(self) -> bool:
+        return time.monotonic() - self._failed_at < settings.ROOM_TYPE_CATALOGUE_RETRY_SECONDS
+
+    async def get(self) -> Dict[str, Any]:
+        """Current catalogue; only the very first call (or one after failures) waits for the loader"""
+        if self._value is None:
+            if self._last_failure is not None and self._backing_off():
+                return self._last_failure
+            return await self.refresh()
+        self.hits += 1
+        if self._stale() and not self._backing_off():
+            self._refresh_in_background()
+        return self._value
+
+    async def refresh(self) -> Dict[str, Any]:
+        """Reload now; concurrent refreshes share one loader call"""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(self._load())
+        return await asyncio.shield(self._refresh_task)
+
+    def _refresh_in_background(self) -> None:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(self._load())
+
+    async def _load(self) -> Dict[str, Any]:
+        generation = self._generation
+        started = time.perf_counter()
+        try:
+            result = await self.loader()
+        except Exception as e:
+            result = {"success": False, "error": str(e), "room_types": [], "rate_plans": [], "inclusions": []}
+
+        if result.get("success"):
+            self._value = result
+            self._loaded_at = time.monotonic()
+            self._loaded_generation = generation
+            self._failed_at = 0.0
+            self._last_failure = None
+            self.refreshes += 1
+            logger.info(
+                f"Room type catalogue {self.name} refreshed in {(time.perf_counter() - started) * 1000:.0f}ms: "
+                f"{len(result.get('room_types', []))} room types, {len(result.get('rate_plans', []))} rate plans"
+            )
+            return result
+
+        self.errors += 1
+        self._failed_at = time.monotonic()
+        self._last_failure = result
+        if self._value is not None:
+            self.stale_served += 1
+            logger.warning(f"Room type catalogue {self.name} refresh failed, serving stale copy: {result.get('error')}")
+            return self._value
+        logger.error(f"Room type catalogue {self.name} load failed: {result.get('error')}")
+        return result
+
+    def invalidate(self) -> None:
+        """Mark the catalogue stale and reload it in the background if a loop is running"""
+        self._generation += 1
+        self._failed_at = 0.0
+        if self._value is None:
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._refresh_in_background()
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.ROOM_TYPE_CATALOGUE_TTL_SECONDS)
+            # Keep catalogues that are in use warm; never-read ones stay unloaded
+            if self._value is not None:
+                try:
+                    await self.refresh()
+                except Exception as e:
+                    logger.error(f"Room type catalogue {self.name} background refresh error: {e}")
+
+    def start(self) -> None:
+        if self._loop_task is None:
+            self._loop_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        for task in (self._loop_task, self._refresh_task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._loop_task = None
+        self._refresh_task = None
+
+    def stats(self) -> dict:
+        return {
+            "loaded": self._value is not None,
+            "stale": self._value is not None and self._stale(),
+            "age_seconds": round(time.monotonic() - self._loaded_at, 1) if self._value is not None else None,
+            "hits": self.hits,
+            "refreshes": self.refreshes,
+            "errors": self.errors,
+            "stale_served": self.stale_served,
+            "last_error": self._last_failure.get("error") if self._last_failure else None,
+        }
+
+
+# Every catalogue instance, for lifespan start/stop, invalidation and status
+room_type_catalogues: List[RoomTypeCatalogue] = []
+
+
+def invalidate_room_type_catalogues(from_rooms_only: bool = False) -> None:
+    for catalogue in room_type_catalogues:
+        if catalogue.from_rooms or not from_rooms_only:
+            catalogue.invalidate()
+
+
+def room_type_catalogue_stats() -> Dict[str, dict]:
+    return {catalogue.name: catalogue.stats() for catalogue in room_type_catalogues}
+
+
+@event.listens_for(Session, "after_flush")
+def _track_room_writes(session, flush_context):
+    """Remember that this transaction wrote rooms"""
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Room):
+            session.info["room_catalogue_changed"] = True
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_catalogues_on_commit(session):
+    if session.info.pop("room_catalogue_changed", False):
+        invalidate_room_type_catalogues(from_rooms_only=True)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_room_writes_on_rollback(session):
+    session.info.pop("room_catalogue_changed", None)
@@ -0,0 +1,38 @@
+"""
+Rebuild or verify the per-night occupancy ledger from bookings.
+
+    PYTHONPATH=. python scripts/rebuild_occupancy_ledger.py          # regenerate room_night_occupancy
+    PYTHONPATH=. python scripts/rebuild_occupancy_ledger.py --check  # report mismatches only (exit 1 if any)
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+
+from app.db.postgresql import AsyncSessionLocal
+from app.services.occupancy_ledger import OccupancyLedgerService
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def main(check_only: bool) -> int:
+    async with AsyncSessionLocal() as db:
+        service = OccupancyLedgerService(db)
+        if check_only:
+            mismatches = await service.find_inconsistencies()
+            for mismatch in mismatches[:50]:
+                logger.warning(f"Mismatch: {mismatch}")
+            logger.info(f"Occupancy ledger check: {len(mismatches)} inconsistent room-nights")
+            return 1 if mismatches else 0
+        written = await service.rebuild()
+        logger.info(f"Occupancy ledger rebuilt with {written} room-nights")
+        return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", action="store_true", help="only report inconsistencies")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.check)))
@@ -31,6 +31,29 @@ TestSessionLocal = async_sessionmaker(
 )
 
 
+def run_async(coro):
+    """Run a coroutine to completion on the shared test event loop."""
+    return asyncio.get_event_loop().run_until_complete(coro)
+
+
+class DictCache:
+    """In-memory stand-in for CacheManager."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    async def set(self, key, value, ttl=3600):
+        self.data[key] = value
+        return True
+
+    async def increment(self, key, amount=1, ttl=3600):
+        self.data[key] = self.data.get(key, 0) + amount
+        return self.data[key]
+
+
 @pytest.fixture(scope="session")
 def event_loop():
     """Create an instance of the default event loop for the test session."""
@@ -0,0 +1,68 @@
+"""
+Batched IDS availability for the alternative-room search
+"""
+
+import asyncio
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.models.ids import AvailabilityResponse
+from app.models.room import Room
+from app.services import booking as booking_module
+from app.services.booking import BookingService
+from tests.conftest import TestSessionLocal, run_async
+
+
+def _room(name, code, pricing_category):
+    return Room(
+        name=name, code=code, category=pricing_category, pricing_category=pricing_category,
+        occupancy_max_adults=2, occupancy_max_children=2, occupancy_max_total=4,
+        price_per_night_single=1000, price_per_night_double=1500, inventory_count=2,
+        is_active=True, maintenance_mode=False,
+    )
+
+
+def test_alternatives_use_one_query_per_rate_plan(client: TestClient, monkeypatch):
+    monkeypatch.setattr(settings, "IDS_BASE_URL", "http://ids.test")
+    check_in, check_out = date(2026, 11, 1), date(2026, 11, 3)
+    closed = {"EXQ"}
+    queries = []
+
+    async def _check_availability(self, query, deadline=None):
+        queries.append((sorted(query.room_codes), query.rate_plan_codes, deadline))
+        await asyncio.sleep(0)
+        return [
+            AvailabilityResponse(
+                room_code=code, rate_plan_code=query.rate_plan_codes[0],
+                date=check_in + timedelta(days=offset), available=code not in closed or offset == 0,
+            )
+            for code in query.room_codes if code != "MISSING"
+            for offset in range(2)
+        ]
+
+    monkeypatch.setattr(booking_module.IDSService, "check_availability", _check_availability)
+
+    async def _flow():
+        async with TestSessionLocal() as session:
+            session.add_all([
+                _room("Exec 1", "EXK", "Executive"),
+                _room("Exec 2", "EXQ", "Executive"),
+                _room("Suite", "STE", "Executive Suite"),
+                _room("Unmapped", "MISSING", "Executive Suite"),
+                _room("No code", None, "Executive"),
+            ])
+            await session.commit()
+            service = BookingService(session)
+            alternatives = await service.get_alternative_rooms(1, check_in, check_out, adults=2)
+            names = {room.id: room.name for room in (await session.execute(Room.__table__.select())).all()}
+        return [names[room_id] for room_id in alternatives]
+
+    assert run_async(_flow()) == ["Exec 1", "Suite"]
+    assert sorted(q[:2] for q in queries) == [
+        (["EXK", "EXQ"], ["Executive"]),
+        (["MISSING", "STE"], ["Executive Suite"]),
+    ]
+    # Both queries share the search's single deadline
+    assert queries[0][2] is not None and queries[0][2] == queries[1][2]
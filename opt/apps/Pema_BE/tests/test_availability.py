@@ -0,0 +1,75 @@
+"""
+Set-based room availability tests
+"""
+
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+
+from app.models import Booking, BookingStatus
+from app.services.booking import BookingService
+from tests.conftest import TestSessionLocal, run_async
+
+
+def _add_bookings(room_id, stays):
+    async def _create():
+        async with TestSessionLocal() as session:
+            for check_in, nights, status in stays:
+                session.add(Booking(
+                    room_id=room_id,
+                    check_in_date=check_in,
+                    check_out_date=check_in + timedelta(days=nights),
+                    nights=nights,
+                    occupancy_details={"adults": 2},
+                    status=status,
+                    total_amount=0,
+                    deposit_amount=0,
+                    balance_amount=0,
+                ))
+            await session.commit()
+    run_async(_create())
+
+
+class TestAvailabilityEngine:
+    def test_overlapping_active_bookings_reduce_units(self, client: TestClient, test_room, test_suite_room):
+        check_in = date.today() + timedelta(days=30)
+        _add_bookings(test_room.id, [
+            (check_in, 3, BookingStatus.CONFIRMED.value),
+            (check_in - timedelta(days=3), 3, BookingStatus.CONFIRMED.value),  # back-to-back, no overlap
+            (check_in + timedelta(days=1), 3, BookingStatus.CANCELLED.value),
+        ])
+
+        async def _query():
+            async with TestSessionLocal() as session:
+                service = BookingService(session)
+                by_room = await service.get_remaining_units_by_room(check_in, check_in + timedelta(days=3))
+                count = await service.count_available_rooms_by_category(
+                    "Premium Garden", check_in, check_in + timedelta(days=3)
+                )
+                picked = await service.pick_available_rooms_by_category(
+                    "Premium Garden", check_in, check_in + timedelta(days=3), count=10
+                )
+                return {room.id: units for room, units in by_room}, count, picked
+
+        by_room, count, picked = run_async(_query())
+
+        assert by_room[test_room.id] == 4
+        assert by_room[test_suite_room.id] == test_suite_room.inventory_count
+        assert count == 4
+        assert len(picked) == 4
+
+    def test_room_availability_endpoint_groups_by_category(self, client: TestClient, test_room):
+        check_in = date.today() + timedelta(days=40)
+        _add_bookings(test_room.id, [(check_in, 4, BookingStatus.RESERVED.value)])
+
+        response = client.get(
+            "/api/v1/room-availability",
+            params={
+                "check_in_date": f"{check_in.isoformat()}T00:00:00",
+                "check_out_date": f"{(check_in + timedelta(days=4)).isoformat()}T00:00:00",
+            },
+        )
+
+        assert response.status_code == 200
+        garden = next(item for item in response.json() if item["category"] == "Premium Garden")
+        assert garden == {"category": "Premium Garden", "available_units": 4, "total_inventory": 5}
@@ -0,0 +1,144 @@
+"""
+Availability calendar endpoint and month-bucket cache tests
+"""
+
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+
+from app.models import Booking, BookingStatus, Room
+from app.services.availability_calendar import AvailabilityCalendarService, month_buckets, sliding_window_min
+from tests.conftest import TestSessionLocal, run_async, DictCache
+
+
+def _confirm_stay(room_id, check_in, nights):
+    async def _create():
+        async with TestSessionLocal() as session:
+            session.add(Booking(
+                room_id=room_id,
+                check_in_date=check_in,
+                check_out_date=check_in + timedelta(days=nights),
+                nights=nights,
+                occupancy_details={"adults": 2},
+                status=BookingStatus.CONFIRMED.value,
+                total_amount=0,
+                deposit_amount=0,
+                balance_amount=0,
+            ))
+            await session.commit()
+    run_async(_create())
+
+
+def test_month_buckets_cover_range():
+    assert month_buckets(date(2026, 1, 30), date(2026, 3, 1)) == [date(2026, 1, 1), date(2026, 2, 1)]
+
+
+class TestAvailabilityCalendar:
+    def test_calendar_reports_units_per_night(self, client: TestClient, test_room, test_suite_room):
+        start = date.today() + timedelta(days=15)
+        _confirm_stay(test_room.id, start + timedelta(days=1), 2)
+
+        response = client.get(
+            "/api/v1/availability/calendar",
+            params={"from": start.isoformat(), "to": (start + timedelta(days=4)).isoformat(), "category": "Premium Garden"},
+        )
+
+        assert response.status_code == 200
+        categories = response.json()["categories"]
+        assert [c["category"] for c in categories] == ["Premium Garden"]
+        assert [n["available_units"] for n in categories[0]["nights"]] == [5, 4, 4, 5]
+        assert categories[0]["nights"][0]["date"] == start.isoformat()
+
+    def test_calendar_rejects_ranges_over_a_year(self, client: TestClient):
+        start = date.today()
+        response = client.get(
+            "/api/v1/availability/calendar",
+            params={"from": start.isoformat(), "to": (start + timedelta(days=400)).isoformat()},
+        )
+        assert response.status_code == 400
+
+    def test_cached_months_are_reused(self, client: TestClient, test_room):
+        start = date.today().replace(day=1) + timedelta(days=40)
+        fake_cache = DictCache()
+
+        async def _calendars():
+            async with TestSessionLocal() as session:
+                service = AvailabilityCalendarService(session, cache_manager=fake_cache)
+                first = await service.calendar(start, start + timedelta(days=10))
+
+                async def _no_query(*args):
+                    raise AssertionError("cached months should not be recomputed")
+
+                service.nightly_availability = _no_query
+                second = await service.calendar(start, start + timedelta(days=10))
+                return first, second
+
+        first, second = run_async(_calendars())
+        assert first == second
+        assert first["Premium Garden"]["available"] == [5] * 10
+
+
+def test_sliding_window_min():
+    assert sliding_window_min([3, 1, 4, 1, 5, 9, 2], 3) == [1, 1, 1, 1, 2]
+    assert sliding_window_min([2, 2], 3) == []
+
+
+class TestFlexibleSearch:
+    def test_skips_full_nights_and_sorts_by_price(self, client: TestClient, test_room):
+        start = date.today() + timedelta(days=20)
+        for _ in range(5):
+            _confirm_stay(test_room.id, start + timedelta(days=4), 1)
+
+        response = client.get(
+            "/api/v1/availability/flexible",
+            params={"category": "Premium Garden", "nights": 3, "from": start.isoformat(),
+                    "horizon_days": 8, "sort": "earliest", "limit": 10},
+        )
+
+        assert response.status_code == 200
+        options = response.json()["options"]
+        # Night start+4 is sold out, so check-ins start+2 .. start+4 cannot fit 3 nights
+        offsets = [(date.fromisoformat(o["check_in_date"]) - start).days for o in options]
+        assert offsets == [0, 1, 5, 6, 7]
+        assert options[0]["total_price"] == 107000 * 3
+
+    def test_unknown_category_is_404(self, client: TestClient, test_room):
+        response = client.get("/api/v1/availability/flexible", params={"category": "Nowhere", "nights": 3})
+        assert response.status_code == 404
+
+    def test_stays_must_fit_on_one_room_row(self, client: TestClient):
+        start = date.today().replace(day=1) + timedelta(days=70)
+
+        async def _rows():
+            async with TestSessionLocal() as session:
+                rows = [
+                    Room(
+                        name=f"Lake Cottage {n}", category="Lake Cottage", pricing_category="Lake Cottage",
+                        occupancy_max_adults=2, occupancy_max_children=0, occupancy_max_total=2,
+                        price_per_night_single=1000, price_per_night_double=1500, inventory_count=1,
+                    )
+                    for n in (1, 2)
+                ]
+                session.add_all(rows)
+                await session.commit()
+                return [row.id for row in rows]
+
+        first, second = run_async(_rows())
+        # Row 1 is free on nights 0-1 and row 2 on nights 2-3; the category shows 1 unit every night
+        _confirm_stay(first, start + timedelta(days=2), 2)
+        _confirm_stay(second, start, 2)
+
+        async def _windows():
+            async with TestSessionLocal() as session:
+                service = AvailabilityCalendarService(session, cache_manager=DictCache())
+                calendar = await service.calendar(start, start + timedelta(days=4), "Lake Cottage")
+                return (
+                    calendar["Lake Cottage"]["available"],
+                    await service.stay_windows("Lake Cottage", 4, start, 1),
+                    await service.stay_windows("Lake Cottage", 2, start, 3),
+                )
+
+        nightly, four_nights, two_nights = run_async(_windows())
+        assert nightly == [1, 1, 1, 1]
+        assert four_nights == []
+        assert two_nights == [(start, 1), (start + timedelta(days=2), 1)]
@@ -0,0 +1,131 @@
+"""
+Circuit breaker and IDS latency budget tests
+"""
+
+import time
+
+import httpx
+import pytest
+
+from app.core import circuit_breaker
+from app.core.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from app.core.exceptions import BookingError, CircuitOpenError, DeadlineExceededError
+from app.services import ids as ids_module
+from app.services.ids import IDSService, ids_circuit_breakers
+
+from tests.conftest import run_async
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitBreaker:
+    def test_opens_on_failure_rate_then_probes_half_open(self, monkeypatch):
+        clock = _Clock()
+        monkeypatch.setattr(circuit_breaker.time, "monotonic", clock)
+        breaker = CircuitBreaker("availability", minimum_calls=4, failure_rate_threshold=0.5, open_seconds=30)
+
+        for failed in (False, True, False):
+            breaker.record(failed, 0.1)
+        assert breaker.state == CLOSED
+        breaker.record(True, 0.1)
+
+        assert breaker.state == OPEN and not breaker.allow()
+        assert breaker.snapshot()["rejected"] == 1
+
+        clock.now += 30
+        assert breaker.state == HALF_OPEN
+        assert breaker.allow() and not breaker.allow()
+        breaker.record(True, 0.1)
+        assert breaker.state == OPEN and breaker.times_opened == 2
+
+        clock.now += 30
+        assert breaker.allow()
+        breaker.record(False, 0.1)
+        assert breaker.state == CLOSED and breaker.snapshot()["calls_in_window"] == 0
+
+    def test_slow_calls_trip_and_old_calls_leave_the_window(self, monkeypatch):
+        clock = _Clock()
+        monkeypatch.setattr(circuit_breaker.time, "monotonic", clock)
+        breaker = CircuitBreaker("booking", window_seconds=60, minimum_calls=3, slow_call_seconds=2.0)
+
+        breaker.record(False, 3.0)
+        breaker.record(False, 3.0)
+        clock.now += 61
+        breaker.record(False, 3.0)
+        assert breaker.state == CLOSED and breaker.snapshot()["calls_in_window"] == 1
+
+        breaker.record(False, 2.5)
+        breaker.record(False, 2.5)
+        assert breaker.state == OPEN
+
+
+class TestMakeRequest:
+    @pytest.fixture
+    def service(self, monkeypatch):
+        ids_circuit_breakers.reset()
+        monkeypatch.setattr(ids_module.asyncio, "sleep", _no_sleep)
+        service = IDSService()
+        service.base_url = "http://ids.test"
+        service.api_url = "http://ids.test/api"
+        service.api_key, service.api_secret = "ids", "secret"
+        yield service
+        ids_circuit_breakers.reset()
+
+    def _client(self, monkeypatch, handler):
+        calls = []
+
+        def _handle(request):
+            calls.append(request.extensions.get("timeout", {}).get("read"))
+            return handler(request)
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(_handle))
+        monkeypatch.setattr(ids_module, "get_http_client", lambda: client)
+        return calls
+
+    def test_open_breaker_fails_fast_without_calling_ids(self, service, monkeypatch):
+        calls = self._client(monkeypatch, lambda request: httpx.Response(503, text="down"))
+        breaker = ids_circuit_breakers.get("availability")
+        breaker.minimum_calls = 3
+
+        with pytest.raises(BookingError):
+            run_async(service._make_request("availability", "<x/>", max_retries=3))
+        assert len(calls) == 3 and breaker.state == OPEN
+
+        with pytest.raises(CircuitOpenError) as exc_info:
+            run_async(service._make_request("availability", "<x/>"))
+        assert len(calls) == 3
+        assert exc_info.value.details["details"]["endpoint"] == "availability"
+        # Other endpoints keep their own breaker
+        assert ids_circuit_breakers.get("booking").state == CLOSED
+
+    def test_client_errors_do_not_count_as_failures(self, service, monkeypatch):
+        self._client(monkeypatch, lambda request: httpx.Response(400, text="bad"))
+
+        for _ in range(6):
+            with pytest.raises(BookingError):
+                run_async(service._make_request("booking", "<x/>"))
+
+        snapshot = ids_circuit_breakers.snapshot()["booking"]
+        assert snapshot["state"] == CLOSED and snapshot["failure_rate"] == 0.0
+
+    def test_deadline_caps_timeout_and_skips_retries(self, service, monkeypatch):
+        calls = self._client(monkeypatch, lambda request: httpx.Response(502, text="gateway"))
+
+        with pytest.raises(BookingError):
+            run_async(service._make_request("availability", "<x/>", max_retries=3, deadline=time.monotonic() + 0.8))
+        # 0.8s budget: the attempt is capped below the 30s timeout and a 1s backoff does not fit
+        assert len(calls) == 1 and calls[0] <= 0.8
+
+        with pytest.raises(DeadlineExceededError):
+            run_async(service._make_request("availability", "<x/>", deadline=time.monotonic() - 1))
+        assert len(calls) == 1
+
+
+async def _no_sleep(seconds):
+    return None
@@ -0,0 +1,172 @@
+"""
+Booking confirmation email dispatcher tests
+"""
+
+import asyncio
+import json
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.exceptions import ExternalServiceError
+from app.models import Booking, Payment, Room
+from app.services import confirmation_emails as dispatcher_module
+from app.services import email as email_module
+from app.services import payment_outbox as outbox_module
+from app.services.confirmation_emails import CHANNEL, ConfirmationEmailDispatcher
+from tests.conftest import TestSessionLocal, run_async
+
+
+class FakeEmailService:
+    sent = []
+    fail_for = set()
+
+    async def send_deposit_confirmation_email(self, **kwargs):
+        await asyncio.sleep(0)
+        if kwargs["guest_email"] in self.fail_for:
+            return False
+        FakeEmailService.sent.append(kwargs["guest_email"])
+        return True
+
+
+async def _bookings(*specs):
+    async with TestSessionLocal() as session:
+        room = Room(
+            name="Dispatcher Room", category="Executive", pricing_category="Executive",
+            occupancy_max_adults=2, occupancy_max_children=0, occupancy_max_total=2,
+            price_per_night_single=1000, price_per_night_double=1500, inventory_count=1,
+        )
+        session.add(room)
+        await session.flush()
+        bookings = []
+        for email, reference, sent in specs:
+            booking = Booking(
+                room_id=room.id, check_in_date=date(2026, 12, 1), check_out_date=date(2026, 12, 4), nights=3,
+                occupancy_details={"adults_total": 2}, status="confirmed",
+                total_amount=30000, deposit_amount=5000, paid_amount=5000, balance_amount=25000,
+                guest_first_name="Guest", guest_email=email, guest_phone="9999999999",
+                ids_booking_reference=reference, confirmation_email_sent=sent,
+            )
+            session.add(booking)
+            bookings.append(booking)
+        await session.commit()
+        return [booking.id for booking in bookings]
+
+
+async def _sent_flags(booking_ids):
+    async with TestSessionLocal() as session:
+        return [(await session.get(Booking, booking_id)).confirmation_email_sent for booking_id in booking_ids]
+
+
+def test_notifications_send_each_confirmation_once(client: TestClient, monkeypatch):
+    monkeypatch.setattr(dispatcher_module, "EmailService", FakeEmailService)
+    monkeypatch.setattr(settings, "CONFIRMATION_EMAIL_SETTLE_SECONDS", 0)
+    FakeEmailService.sent = []
+    FakeEmailService.fail_for = {"fails@example.com"}
+    dispatcher = ConfirmationEmailDispatcher(session_factory=TestSessionLocal, concurrency=2, listen=False)
+
+    async def _flow():
+        ids = await _bookings(
+            ("ota@example.com", "MMT-1", False),
+            ("paid@example.com", "PAY-PW1", False),
+            ("done@example.com", "MMT-2", True),
+            ("fails@example.com", "MMT-3", False),
+        )
+        dispatcher.start()
+        try:
+            for booking_id in [ids[0], ids[0], ids[1], ids[2], ids[3]]:
+                dispatcher._on_notify(None, 1, CHANNEL, json.dumps({"booking_id": booking_id}))
+            dispatcher._on_notify(None, 1, CHANNEL, "not json")
+            await asyncio.wait_for(dispatcher.queue.join(), timeout=5)
+            return ids, await _sent_flags(ids), dispatcher.stats()
+        finally:
+            await dispatcher.stop()
+
+    ids, flags, stats = run_async(_flow())
+    # Payment bookings are left to the payment outbox; a failed send is released for the sweep
+    assert FakeEmailService.sent == ["ota@example.com"]
+    assert flags == [True, False, True, False]
+    assert stats["notifications"] == 6 and stats["sent"] == 1
+    assert stats["skipped"] == 2 and stats["failed"] == 1
+    assert stats["queue_to_sent"]["count"] == 1
+
+
+def test_sweep_is_the_safety_net_and_claims_are_exclusive(client: TestClient, monkeypatch):
+    monkeypatch.setattr(dispatcher_module, "EmailService", FakeEmailService)
+    monkeypatch.setattr(settings, "CONFIRMATION_EMAIL_SWEEP_MIN_AGE_SECONDS", -3600)
+    FakeEmailService.sent = []
+    FakeEmailService.fail_for = set()
+    dispatcher = ConfirmationEmailDispatcher(session_factory=TestSessionLocal, listen=False)
+
+    async def _flow():
+        ids = await _bookings(("missed@example.com", "PAY-PW2", False), ("race@example.com", "MMT-4", False))
+        dispatcher.queue = asyncio.Queue()
+        queued = await dispatcher.sweep()
+        # Two instances both heard the notification; only one of them sends
+        raced = await asyncio.gather(dispatcher.deliver(ids[1], True), dispatcher.deliver(ids[1], True))
+        delivered = await dispatcher.deliver(ids[0])
+        return queued, raced, delivered, await _sent_flags(ids)
+
+    queued, raced, delivered, flags = run_async(_flow())
+    assert queued >= 2
+    assert sorted(raced) == [False, True] and delivered is True
+    assert FakeEmailService.sent.count("race@example.com") == 1 and "missed@example.com" in FakeEmailService.sent
+    assert flags == [True, True]
+
+
+def test_payment_outbox_email_claims_the_flag(client: TestClient, monkeypatch):
+    monkeypatch.setattr(email_module, "EmailService", FakeEmailService)
+    FakeEmailService.sent = []
+    FakeEmailService.fail_for = {"flaky@example.com"}
+
+    async def _flow():
+        ids = await _bookings(
+            ("swept@example.com", "PAY-PW3", True),
+            ("flaky@example.com", "PAY-PW4", False),
+            ("outbox@example.com", "PAY-PW5", False),
+        )
+        outcomes = []
+        for booking_id in ids:
+            async with TestSessionLocal() as session:
+                payment = Payment(gateway="payu", amount=5000, net_amount=5000, payment_type="deposit", booking_id=booking_id)
+                session.add(payment)
+                await session.commit()
+                try:
+                    await outbox_module._deliver_confirmation_email(session, {"payment_id": payment.id})
+                    outcomes.append("delivered")
+                except ExternalServiceError:
+                    outcomes.append("retry")
+        return outcomes, await _sent_flags(ids)
+
+    outcomes, flags = run_async(_flow())
+    # The sweep already emailed the first guest; a failed send is released for the next attempt
+    assert outcomes == ["delivered", "retry", "delivered"]
+    assert FakeEmailService.sent == ["outbox@example.com"]
+    assert flags == [True, False, True]
+
+
+def test_sweep_takes_the_newest_missed_bookings_first(client: TestClient, monkeypatch):
+    monkeypatch.setattr(settings, "CONFIRMATION_EMAIL_SWEEP_MIN_AGE_SECONDS", -3600)
+    monkeypatch.setattr(settings, "CONFIRMATION_EMAIL_SWEEP_BATCH", 1)
+    dispatcher = ConfirmationEmailDispatcher(session_factory=TestSessionLocal, listen=False)
+
+    async def _flow():
+        ids = await _bookings(("bounces@example.com", "MMT-5", False))
+        async with TestSessionLocal() as session:
+            # A booking whose email keeps failing, stuck in the sweep since last week
+            booking = await session.get(Booking, ids[0])
+            booking.created_at = booking.created_at - timedelta(days=7)
+            await session.commit()
+        newer = await _bookings(("newer@example.com", "MMT-6", False))
+        async with TestSessionLocal() as session:
+            # Clearly newer than anything other tests left unsent
+            booking = await session.get(Booking, newer[0])
+            booking.created_at = booking.created_at + timedelta(minutes=10)
+            await session.commit()
+        dispatcher.queue = asyncio.Queue()
+        await dispatcher.sweep()
+        return newer[0], dispatcher.queue.get_nowait()[0]
+
+    newer_id, queued_id = run_async(_flow())
+    assert queued_id == newer_id
@@ -0,0 +1,59 @@
+"""
+Estimate cache key normalization and hit/miss tests
+"""
+
+from datetime import date, timedelta
+
+from app.schemas.booking import BookingEstimateRequest
+from app.services.estimate_cache import EstimateCache, request_hash
+
+from tests.conftest import DictCache, run_async
+
+
+def _request(**overrides):
+    check_in = date.today() + timedelta(days=10)
+    payload = {
+        "room_pricing_category": "Premium Garden",
+        "check_in_date": check_in.isoformat(),
+        "check_out_date": (check_in + timedelta(days=3)).isoformat(),
+        "adults_total": 2,
+    }
+    payload.update(overrides)
+    return BookingEstimateRequest(**payload)
+
+
+def test_caregiver_options_ignored_without_caregiver():
+    plain = _request()
+    noisy = _request(caregiver_meal="restaurant_dining", caregiver_room_pricing_category="Standard")
+    assert request_hash(plain) == request_hash(noisy)
+
+
+def test_caregiver_options_matter_when_caregiver_required():
+    shared = _request(caregiver_required=True, caregiver_stay_with_guest=True)
+    separate = _request(caregiver_required=True, caregiver_stay_with_guest=False)
+    assert request_hash(shared) != request_hash(separate)
+
+
+def test_get_after_set_is_a_hit_and_invalidate_misses(monkeypatch):
+    estimate_cache = EstimateCache(cache_manager=DictCache())
+
+    async def _version(db):
+        generation = await estimate_cache.cache.get("estimate:generation", 0)
+        return f"v{generation}"
+
+    monkeypatch.setattr(estimate_cache, "version", _version)
+    req = _request()
+
+    async def _flow():
+        first = await estimate_cache.get(req, db=None)
+        await estimate_cache.set(req, {"nights": 3}, db=None)
+        second = await estimate_cache.get(req, db=None)
+        await estimate_cache.invalidate()
+        third = await estimate_cache.get(req, db=None)
+        return first, second, third
+
+    first, second, third = run_async(_flow())
+    assert first is None
+    assert second == {"nights": 3}
+    assert third is None
+    assert (estimate_cache.hits, estimate_cache.misses) == (1, 2)
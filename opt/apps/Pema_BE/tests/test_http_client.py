@@ -0,0 +1,56 @@
+"""
+Shared pooled HTTP client tests
+"""
+
+import asyncio
+
+import httpx
+
+from app.core.http_client import PooledHTTPClient
+
+from tests.conftest import run_async
+
+
+def test_per_host_cap_limits_concurrency():
+    active = {"now": 0, "peak": 0}
+
+    async def handler(request):
+        active["now"] += 1
+        active["peak"] = max(active["peak"], active["now"])
+        await asyncio.sleep(0.01)
+        active["now"] -= 1
+        return httpx.Response(200, text="<Success/>")
+
+    async def _flow():
+        client = PooledHTTPClient(max_per_host=2, transport=httpx.MockTransport(handler))
+        responses = await asyncio.gather(*[client.post("http://pms.test/booking", content="<x/>") for _ in range(6)])
+        stats = client.stats()
+        await client.aclose()
+        return responses, stats
+
+    responses, stats = run_async(_flow())
+
+    assert all(r.status_code == 200 for r in responses)
+    assert active["peak"] == 2
+    assert stats["requests"] == 6
+    assert stats["peak_in_flight"] == 2
+    assert stats["in_flight"] == {}
+
+
+def test_transport_errors_are_counted():
+    async def handler(request):
+        raise httpx.ConnectError("refused", request=request)
+
+    async def _flow():
+        client = PooledHTTPClient(transport=httpx.MockTransport(handler))
+        try:
+            await client.get("http://pms.test/testconnectivity")
+        except httpx.ConnectError:
+            pass
+        stats = client.stats()
+        await client.aclose()
+        return stats
+
+    stats = run_async(_flow())
+    assert stats["errors"] == 1
+    assert stats["requests"] == 1
@@ -0,0 +1,49 @@
+"""
+IDS inbound idempotency store tests
+"""
+
+
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.services import ids_processing
+from app.services.ids_idempotency import ids_idempotency
+from app.services.ids_notification_parser import INVENTORY
+
+from tests.conftest import DictCache, run_async
+
+
+def _body(count: int) -> str:
+    return (
+        '<OTA_HotelInvCountNotifRQ xmlns="http://www.opentravel.org/OTA/2003/05" EchoToken="echo-7" userid="ids" password="secret">'
+        '<Inventories HotelCode="H1"><Inventory><StatusApplicationControl Start="2026-01-01" End="2026-01-02" '
+        f'InvTypeCode="PGT" RatePlanCode="BAR"/><InvCount CountType="2" Count="{count}"/></Inventory></Inventories>'
+        '</OTA_HotelInvCountNotifRQ>'
+    )
+
+
+def test_resend_is_answered_from_store_without_reprocessing(client: TestClient, monkeypatch):
+    monkeypatch.setattr(settings, "IDS_API_KEY", "ids")
+    monkeypatch.setattr(settings, "IDS_API_SECRET", "secret")
+    monkeypatch.setattr(ids_idempotency, "cache", DictCache())
+    applied = []
+
+    async def _record(self, parsed_data):
+        applied.append(parsed_data["inventories"][0]["inv_count"]["count"])
+
+    monkeypatch.setattr(ids_processing.IDSDataProcessor, "process_inventory_data", _record)
+
+    first = client.post("/api/v1/ids/inventory/receive", content=_body(3))
+    resend = client.post("/api/v1/ids/inventory/receive", content=_body(3))
+    # Same EchoToken with a different payload is a new message
+    changed = client.post("/api/v1/ids/inventory/receive", content=_body(4))
+    # Bad credentials are rejected even for a known payload
+    forged = client.post("/api/v1/ids/inventory/receive", content=_body(3).replace('password="secret"', 'password="x"'))
+
+    assert applied == [3, 4]
+    assert first.text == resend.text and "<Success" in resend.text
+    assert "<Success" in changed.text and "Invalid credentials" in forged.text
+
+    stats = run_async(ids_idempotency.stats([INVENTORY]))
+    assert stats["duplicates"][INVENTORY]["hits"] == 1
+    assert stats["duplicates"][INVENTORY]["bytes_skipped"] == len(_body(3))
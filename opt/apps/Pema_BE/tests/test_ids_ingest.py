@@ -0,0 +1,108 @@
+"""
+Asynchronous IDS ingestion queue tests
+"""
+
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.models import IDSInboundMessage, InboundMessageStatus
+from app.services import ids_processing
+from app.services.ids_ingest import IDSIngestQueue, partition_notification
+from app.services.ids_notification_parser import INVENTORY
+from tests.conftest import TestSessionLocal, run_async
+
+
+def _item(code, day, count):
+    return {
+        "status_application_control": {"start": day, "end": day, "inv_type_code": code, "rate_plan_code": "BAR"},
+        "inv_count": {"count_type": "2", "count": count},
+    }
+
+
+class TestIngestQueue:
+    def test_partitions_by_room_type_in_message_order(self):
+        parsed = {"echo_token": "t", "hotel_code": "H", "inventories": [
+            _item("PGT", "2026-01-01", 1), _item("STQ", "2026-01-01", 2), _item("PGT", "2026-01-02", 3),
+        ]}
+
+        partitions = partition_notification(INVENTORY, parsed)
+
+        assert list(partitions) == ["PGT", "STQ"]
+        assert [i["inv_count"]["count"] for i in partitions["PGT"]["inventories"]] == [1, 3]
+        assert partitions["STQ"]["hotel_code"] == "H"
+
+    def test_workers_apply_partitions_in_order_and_retry_failures(self, client: TestClient, monkeypatch):
+        queue = IDSIngestQueue(session_factory=TestSessionLocal, workers=1, max_attempts=2)
+        applied = []
+
+        async def _record(self, parsed_data):
+            items = parsed_data["inventories"]
+            if items[0]["inv_count"]["count"] == 99:
+                raise RuntimeError("bad push")
+            applied.append([(i["status_application_control"]["inv_type_code"], i["inv_count"]["count"]) for i in items])
+
+        monkeypatch.setattr(ids_processing.IDSDataProcessor, "process_inventory_data", _record)
+
+        async def _flow():
+            async with TestSessionLocal() as session:
+                await queue.enqueue(session, INVENTORY, {"echo_token": "a", "inventories": [
+                    _item("PGT", "2026-01-01", 99), _item("STQ", "2026-01-01", 2),
+                ]})
+                await queue.enqueue(session, INVENTORY, {"echo_token": "b", "inventories": [_item("PGT", "2026-01-01", 4)]})
+
+            # PGT head fails and is delayed for retry; its later message must wait behind it
+            while await queue.process_next():
+                pass
+            blocked = list(applied)
+
+            async with TestSessionLocal() as session:
+                await session.execute(
+                    IDSInboundMessage.__table__.update()
+                    .where(IDSInboundMessage.status == InboundMessageStatus.PENDING.value)
+                    .values(available_at=IDSInboundMessage.received_at)
+                )
+                await session.commit()
+            while await queue.process_next():
+                pass
+
+            async with TestSessionLocal() as session:
+                statuses = (await session.execute(
+                    select(IDSInboundMessage.partition_key, IDSInboundMessage.status, IDSInboundMessage.attempts)
+                    .order_by(IDSInboundMessage.id)
+                )).all()
+                stats = await queue.stats(session)
+            return blocked, statuses, stats
+
+        blocked, statuses, stats = run_async(_flow())
+
+        assert blocked == [[("STQ", 2)]]
+        assert applied == [[("STQ", 2)], [("PGT", 4)]]
+        assert [tuple(row) for row in statuses] == [
+            ("PGT", InboundMessageStatus.FAILED.value, 2),
+            ("STQ", InboundMessageStatus.DONE.value, 1),
+            ("PGT", InboundMessageStatus.DONE.value, 1),
+        ]
+        assert stats["queue"] == {INVENTORY: {InboundMessageStatus.FAILED.value: 1}}
+        assert stats["processed"] == 2 and stats["failed"] == 1 and stats["retried"] == 1
+
+    def test_webhook_acknowledges_before_processing(self, client: TestClient, monkeypatch):
+        monkeypatch.setattr(settings, "IDS_ASYNC_INGESTION", True)
+        monkeypatch.setattr(settings, "IDS_API_KEY", "ids")
+        monkeypatch.setattr(settings, "IDS_API_SECRET", "secret")
+
+        body = (
+            '<OTA_HotelInvCountNotifRQ xmlns="http://www.opentravel.org/OTA/2003/05" EchoToken="e1" userid="ids" password="secret">'
+            '<Inventories HotelCode="H1"><Inventory><StatusApplicationControl Start="2026-01-01" End="2026-01-05" '
+            'InvTypeCode="PGT" RatePlanCode="BAR"/><InvCount CountType="2" Count="3"/></Inventory></Inventories>'
+            '</OTA_HotelInvCountNotifRQ>'
+        )
+        response = client.post("/api/v1/ids/inventory/receive", content=body)
+
+        async def _queued():
+            async with TestSessionLocal() as session:
+                return (await session.execute(select(IDSInboundMessage.echo_token, IDSInboundMessage.status))).all()
+
+        assert response.status_code == 200 and "<Success" in response.text
+        assert [tuple(row) for row in run_async(_queued())] == [("e1", InboundMessageStatus.PENDING.value)]
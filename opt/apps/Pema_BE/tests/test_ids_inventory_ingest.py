@@ -0,0 +1,60 @@
+"""
+IDS inventory ingestion (set-based room_availability upsert) tests
+"""
+
+from datetime import date
+
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+
+from app.models import RoomAvailability
+from app.services.ids_processing import IDSDataProcessor
+from tests.conftest import TestSessionLocal, run_async
+
+
+def _item(code, start, end, count, rate_plan="BAR"):
+    return {
+        "status_application_control": {
+            "start": start, "end": end, "inv_type_code": code, "rate_plan_code": rate_plan, "meal_plan_code": "CP",
+        },
+        "inv_count": {"count_type": "2", "count": count},
+    }
+
+
+class TestInventoryIngest:
+    def test_notification_upserts_date_ranges(self, client: TestClient):
+        async def _flow():
+            async with TestSessionLocal() as session:
+                processor = IDSDataProcessor(session)
+                await processor.process_inventory_data({"inventories": [
+                    _item("PGT", "2026-01-01", "2026-12-31", 5),
+                    # Overlaps the first range; the later item wins within one notification
+                    _item("PGT", "2026-03-01", "2026-03-02", 2),
+                    _item("STQ", "2026-01-01", "2026-01-03", 4, rate_plan=None),
+                    _item("XXX", "2026-01-01", "2026-01-03", 9),
+                ]})
+                # A second push updates in place instead of adding rows
+                await processor.process_inventory_data({"inventories": [_item("PGT", "2026-03-02", "2026-03-03", 0)]})
+
+                total = await session.scalar(select(func.count()).select_from(RoomAvailability))
+                rows = await session.execute(
+                    select(RoomAvailability.date, RoomAvailability.available_count, RoomAvailability.source)
+                    .where(RoomAvailability.room_code == "PGT", RoomAvailability.date.between(date(2026, 2, 28), date(2026, 3, 4)))
+                    .order_by(RoomAvailability.date)
+                )
+                standard = await session.scalar(
+                    select(func.count()).select_from(RoomAvailability).where(RoomAvailability.room_code == "STD")
+                )
+                return total, [tuple(row) for row in rows.all()], standard
+
+        total, window, standard = run_async(_flow())
+
+        assert total == 365 + 3
+        assert standard == 3
+        assert window == [
+            (date(2026, 2, 28), 5, "ids_sync"),
+            (date(2026, 3, 1), 2, "ids_sync"),
+            (date(2026, 3, 2), 0, "ids_sync"),
+            (date(2026, 3, 3), 0, "ids_sync"),
+            (date(2026, 3, 4), 5, "ids_sync"),
+        ]
@@ -0,0 +1,143 @@
+"""
+Streaming IDS notification parser tests
+"""
+
+import pytest
+
+from app.services.ids_notification_parser import (
+    AVAILABILITY,
+    BOOKING,
+    INVENTORY,
+    ROOM_TYPE_DELTA,
+    NotificationParseStats,
+    notification_parse_stats,
+    parse_notification,
+    read_root_attributes,
+)
+
+OTA = 'xmlns="http://www.opentravel.org/OTA/2003/05"'
+
+
+def _inventory_xml(days: int) -> bytes:
+    items = "".join(
+        f'<Inventory><StatusApplicationControl Start="2026-01-{day:02d}" End="2026-01-{day:02d}" '
+        f'InvTypeCode="DLX" RatePlanCode="BAR" MealPlanCode="CP"/><InvCount CountType="2" Count="{day % 4}"/></Inventory>'
+        for day in range(1, days + 1)
+    )
+    return (
+        f'<OTA_HotelInvCountNotifRQ {OTA} EchoToken="tok-1" userid="ids" password="secret">'
+        f'<Inventories HotelCode="H1">{items}<Inventory><InvCount Count="1"/></Inventory></Inventories>'
+        f'</OTA_HotelInvCountNotifRQ>'
+    ).encode()
+
+
+class TestNotificationParser:
+    def test_inventory_single_pass_with_root_attributes(self):
+        parsed = parse_notification(_inventory_xml(31), INVENTORY)
+
+        assert parsed["echo_token"] == "tok-1" and parsed["hotel_code"] == "H1"
+        # The trailing Inventory without StatusApplicationControl is skipped, as before
+        assert len(parsed["inventories"]) == 31
+        assert parsed["inventories"][2] == {
+            "status_application_control": {
+                "start": "2026-01-03", "end": "2026-01-03",
+                "inv_type_code": "DLX", "rate_plan_code": "BAR", "meal_plan_code": "CP",
+            },
+            "inv_count": {"count_type": "2", "count": 3},
+        }
+        assert read_root_attributes(_inventory_xml(1)) == {"EchoToken": "tok-1", "userid": "ids", "password": "secret"}
+
+    def test_malformed_xml_raises_value_error(self):
+        with pytest.raises(ValueError):
+            parse_notification(b"<OTA_HotelInvCountNotifRQ><Inventories>", INVENTORY)
+
+    def test_availability_and_room_type_delta(self):
+        availability = parse_notification(
+            f'<OTA_HotelAvailNotifRQ {OTA} EchoToken="a1"><AvailStatusMessages HotelCode="H1">'
+            f'<AvailStatusMessage><StatusApplicationControl Start="2026-02-01" End="2026-02-03" InvTypeCode="DLX"/>'
+            f'<RestrictionStatus Status="Close" Restriction="Master"/></AvailStatusMessage>'
+            f'<AvailStatusMessage/></AvailStatusMessages></OTA_HotelAvailNotifRQ>',
+            AVAILABILITY,
+        )
+        assert availability["hotel_code"] == "H1"
+        assert availability["avail_status_messages"][0]["restriction_status"]["status"] == "Close"
+        assert availability["avail_status_messages"][1] == {"status_application_control": None, "restriction_status": None}
+
+        delta = parse_notification(
+            f'<RN_HotelRatePlanRQ {OTA} EchoToken="d1"><HotelCriteria HotelCode="H1"/>'
+            f'<RoomTypes><RoomType InvTypeCode="DLX" Name="Deluxe" Quantity="4" IsRoomActive="1">'
+            f'<RoomDescription>Garden view</RoomDescription></RoomType></RoomTypes>'
+            f'<RatePlans><RatePlan RatePlanCode="BAR" InvTypeCode="DLX"/></RatePlans>'
+            f'<Inclusions><Inclusion MealPlanCode="CP"/></Inclusions></RN_HotelRatePlanRQ>',
+            ROOM_TYPE_DELTA,
+        )
+        assert delta["room_types"][0]["room_description"] == "Garden view"
+        assert delta["room_types"][0]["quantity"] == 4 and delta["room_types"][0]["is_room_active"]
+        assert delta["rate_plans"][0]["rate_plan_code"] == "BAR"
+        assert delta["inclusions"] == [{"meal_plan_code": "CP", "meal_plan_desc": None}]
+
+    def test_booking_reservation_scopes(self):
+        parsed = parse_notification(
+            f'<OTA_HotelResNotifRQ {OTA} EchoToken="b1" MessageContentCode="1"><HotelReservations>'
+            f'<HotelReservation><UniqueID Type="14" ID="R-9"/><RoomStays>'
+            f'<RoomStay><RoomTypes><RoomType RoomTypeCode="DLX"/></RoomTypes><RatePlans><RatePlan RatePlanCode="BAR"/></RatePlans>'
+            f'<GuestCounts><GuestCount AgeQualifyingCode="10" Count="2"/></GuestCounts>'
+            f'<TimeSpan StartDate="2026-03-01" EndDate="2026-03-04"/><Total AmountAfterTax="1000" CurrencyCode="INR"/></RoomStay>'
+            f'</RoomStays><Services><Service ServiceType="Guest"><GuestName><GivenName>Asha</GivenName><Surname>Rao</Surname></GuestName>'
+            f'<ContactInfo><Phone PhoneNumber="999"/><Email>a@example.com</Email></ContactInfo></Service></Services>'
+            f'<ResGlobalInfo><Total AmountAfterTax="1"/></ResGlobalInfo></HotelReservation>'
+            f'</HotelReservations></OTA_HotelResNotifRQ>',
+            BOOKING,
+        )
+
+        assert parsed["message_content_code"] == "1"
+        reservation = parsed["hotel_reservations"][0]
+        assert reservation["unique_id"] == {"type": "14", "id": "R-9"}
+        room_stay = reservation["room_stays"][0]
+        assert room_stay["room_types"] == [{"room_type_code": "DLX"}]
+        assert room_stay["guest_counts"] == [{"age_qualifying_code": "10", "count": 2}]
+        assert room_stay["total"] == {"amount_after_tax": "1000", "currency_code": "INR"}
+        service = reservation["services"][0]
+        assert service["guest_name"] == {"given_name": "Asha", "surname": "Rao"}
+        assert service["contact_info"] == {"phones": [{"phone_number": "999"}], "emails": [{"email": "a@example.com"}]}
+
+    def test_parse_stats_are_kept_per_message_type(self):
+        stats = NotificationParseStats()
+        stats.record(INVENTORY, 365, 40000, 0.004)
+        stats.record(INVENTORY, 1, 200, 0.002)
+
+        entry = stats.stats()[INVENTORY]
+        assert entry["notifications"] == 2 and entry["messages"] == 366
+        assert entry["max_ms"] == 4.0 and entry["avg_ms"] == 3.0
+
+        parse_notification(_inventory_xml(2), INVENTORY)
+        assert notification_parse_stats.stats()[INVENTORY]["messages"] >= 2
+
+
+class TestNotificationAuth:
+    def test_webhook_rejects_bad_root_credentials_before_processing(self, client, monkeypatch):
+        from app.core.config import settings
+
+        monkeypatch.setattr(settings, "IDS_API_KEY", "ids")
+        monkeypatch.setattr(settings, "IDS_API_SECRET", "secret")
+        body = _inventory_xml(2).replace(b'password="secret"', b'password="wrong"')
+
+        response = client.post("/api/v1/ids/inventory/receive", content=body)
+
+        assert "Invalid credentials" in response.text and "<Success" not in response.text
+
+    def test_malformed_basic_header_falls_back_to_xml_credentials(self, monkeypatch):
+        from fastapi import HTTPException
+        from starlette.requests import Request
+
+        from app.api.v1.ids import verify_ids_auth
+        from app.core.config import settings
+        from tests.conftest import run_async
+
+        monkeypatch.setattr(settings, "IDS_API_KEY", "ids")
+        monkeypatch.setattr(settings, "IDS_API_SECRET", "secret")
+        request = Request({"type": "http", "headers": [(b"authorization", b"Basic not-base64!")]})
+
+        run_async(verify_ids_auth(request, _inventory_xml(1)))
+        with pytest.raises(HTTPException):
+            run_async(verify_ids_auth(request, _inventory_xml(1).replace(b'password="secret"', b'password="wrong"')))
@@ -0,0 +1,132 @@
+"""
+IDS push queue coalescing and date-range compaction tests
+"""
+
+import asyncio
+from datetime import date
+
+from app.models.ids import AvailabilityUpdate, RestrictionStatus, RestrictionType
+from app.services.ids_push_queue import (
+    IDSPushQueue,
+    compact_availability_updates,
+    compact_inventory_updates,
+    normalize_inventory_update,
+)
+
+from tests.conftest import run_async
+
+
+def _inventory(start, end, count, room="DLX", **extra):
+    return normalize_inventory_update({
+        "room_code": room,
+        "rate_plan_code": "BAR",
+        "start_date": start,
+        "end_date": end,
+        "available_count": count,
+        **extra,
+    })
+
+
+class _FakeIDSService:
+    def __init__(self, calls):
+        self.calls = calls
+
+    async def update_inventory(self, updates):
+        self.calls.append(("inventory", updates))
+        return {"messages": len(updates)}
+
+    async def update_availability(self, updates):
+        self.calls.append(("availability", updates))
+        return {"messages": len(updates)}
+
+
+class TestCompaction:
+    def test_inventory_last_write_wins_and_equal_days_merge(self):
+        messages = compact_inventory_updates([
+            _inventory(date(2026, 3, 1), date(2026, 3, 10), 5),
+            _inventory(date(2026, 3, 4), date(2026, 3, 5), 2),
+            _inventory(date(2026, 3, 5), date(2026, 3, 5), 5),
+            _inventory("2026-03-01", "2026-03-02", 1, room="STD"),
+        ])
+
+        ranges = [(m["room_code"], m["start_date"].day, m["end_date"].day, m["available_count"]) for m in messages]
+        assert ranges == [
+            ("DLX", 1, 3, 5),
+            ("DLX", 4, 4, 2),
+            ("DLX", 5, 10, 5),
+            ("STD", 1, 2, 1),
+        ]
+
+    def test_inventory_weekday_flags_limit_superseded_days(self):
+        # 2026-03-02 is a Monday; the second update only touches the weekend
+        messages = compact_inventory_updates([
+            _inventory(date(2026, 3, 2), date(2026, 3, 8), 4),
+            _inventory(date(2026, 3, 2), date(2026, 3, 8), 0, day_of_week={"mon": False, "tue": False, "wed": False, "thu": False, "fri": False}),
+        ])
+
+        assert [(m["start_date"].day, m["end_date"].day, m["available_count"]) for m in messages] == [(2, 6, 4), (7, 8, 0)]
+
+    def test_availability_restriction_types_are_independent(self):
+        def update(start, end, restriction, status, unique_id):
+            return AvailabilityUpdate(
+                room_code="DLX", rate_plan_code="BAR", meal_plan_code="CP",
+                start_date=start, end_date=end,
+                restriction_type=restriction, restriction_status=status, unique_id=unique_id,
+            )
+
+        messages = compact_availability_updates([
+            update(date(2026, 3, 1), date(2026, 3, 3), RestrictionType.MASTER, RestrictionStatus.CLOSE, "a"),
+            update(date(2026, 3, 2), date(2026, 3, 2), RestrictionType.ARRIVAL, RestrictionStatus.CLOSE, "b"),
+            update(date(2026, 3, 4), date(2026, 3, 6), RestrictionType.MASTER, RestrictionStatus.CLOSE, "c"),
+        ])
+
+        assert [(m.restriction_type, m.start_date.day, m.end_date.day, m.unique_id) for m in messages] == [
+            (RestrictionType.ARRIVAL, 2, 2, "b"),
+            (RestrictionType.MASTER, 1, 6, "a"),
+        ]
+
+
+class TestPushQueue:
+    def test_concurrent_pushes_share_one_request(self):
+        calls = []
+        queue = IDSPushQueue(window_seconds=0.01, service_factory=lambda: _FakeIDSService(calls))
+        updates = [
+            {"room_code": "DLX", "rate_plan_code": "BAR", "start_date": date(2026, 3, day), "end_date": date(2026, 3, day), "available_count": 3}
+            for day in range(1, 8)
+        ]
+
+        async def _flow():
+            return await asyncio.gather(*(queue.push_inventory([u]) for u in updates))
+
+        responses = run_async(_flow())
+
+        assert len(calls) == 1
+        assert calls[0][0] == "inventory" and len(calls[0][1]) == 1
+        assert responses == [{"messages": 1}] * 7
+        assert queue.stats()["updates_received"] == 7 and queue.stats()["requests_sent"] == 1
+
+    def test_large_batches_split_and_failures_reach_every_caller(self):
+        calls = []
+        queue = IDSPushQueue(window_seconds=0.01, max_messages=2, service_factory=lambda: _FakeIDSService(calls))
+        # Alternating counts cannot merge, so 5 days stay 5 messages
+        updates = [_inventory(date(2026, 3, day), date(2026, 3, day), day % 2) for day in range(1, 6)]
+        run_async(queue.push_inventory(updates))
+        assert [len(batch) for _, batch in calls] == [2, 2, 1]
+
+        class _Failing(_FakeIDSService):
+            async def update_availability(self, updates):
+                raise RuntimeError("IDS down")
+
+        failing = IDSPushQueue(window_seconds=0.01, service_factory=lambda: _Failing(calls))
+        update = AvailabilityUpdate(
+            room_code="DLX", rate_plan_code="BAR", meal_plan_code="CP",
+            start_date=date(2026, 3, 1), end_date=date(2026, 3, 1),
+        )
+
+        async def _flow():
+            return await asyncio.gather(
+                failing.push_availability([update]), failing.push_availability([update]), return_exceptions=True
+            )
+
+        results = run_async(_flow())
+        assert all(isinstance(result, RuntimeError) for result in results)
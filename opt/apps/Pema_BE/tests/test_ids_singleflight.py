@@ -0,0 +1,129 @@
+"""
+Single-flight IDS availability query tests
+"""
+
+import asyncio
+import time
+from datetime import date
+
+from app.models.ids import AvailabilityQuery, AvailabilityResponse
+from app.services.ids import IDSService
+from app.services.ids_singleflight import AvailabilitySingleFlight, availability_query_key
+from app.services import ids as ids_module
+
+from tests.conftest import run_async
+
+
+def _query(*room_codes):
+    return AvailabilityQuery(
+        room_codes=list(room_codes), rate_plan_codes=["BAR"],
+        start_date=date(2026, 12, 1), end_date=date(2026, 12, 2),
+    )
+
+
+def _answer(query):
+    return [
+        AvailabilityResponse(room_code=code, rate_plan_code="BAR", date=query.start_date, available=True)
+        for code in query.room_codes
+    ]
+
+
+def test_query_key_ignores_code_order_and_duplicates():
+    assert availability_query_key(_query("DLX", "STD", "DLX")) == availability_query_key(_query("STD", "DLX"))
+    assert availability_query_key(_query("DLX")) != availability_query_key(_query("STD"))
+
+
+def test_concurrent_identical_queries_share_one_request_and_cache():
+    flight = AvailabilitySingleFlight(ttl_seconds=60)
+    sent = []
+
+    async def _fetch(query):
+        sent.append(query.room_codes)
+        await asyncio.sleep(0.01)
+        return _answer(query)
+
+    async def _burst():
+        queries = [_query("DLX", "STD"), _query("STD", "DLX"), _query("DLX", "STD"), _query("EXT")]
+        return await asyncio.gather(*(flight.run(q, lambda q=q: _fetch(q)) for q in queries))
+
+    results = run_async(_burst())
+    assert len(sent) == 2
+    assert [len(r) for r in results] == [2, 2, 2, 1]
+
+    cached = run_async(flight.run(_query("STD", "DLX"), lambda: _fetch(_query("STD"))))
+    stats = flight.stats()
+    assert len(sent) == 2 and len(cached) == 2
+    assert stats["upstream_requests"] == 2 and stats["coalesced"] == 2 and stats["cache_hits"] == 1
+    assert stats["peak_waiters"] == 3 and stats["in_flight"] == 0
+
+
+def test_failures_are_not_cached_and_late_caller_keeps_its_deadline():
+    flight = AvailabilitySingleFlight(ttl_seconds=60)
+    sent = []
+
+    async def _empty():
+        sent.append(1)
+        return []
+
+    run_async(flight.run(_query("DLX"), _empty))
+    run_async(flight.run(_query("DLX"), _empty))
+    assert len(sent) == 2
+
+    async def _slow():
+        await asyncio.sleep(0.05)
+        return _answer(_query("STD"))
+
+    async def _deadlines():
+        patient = asyncio.ensure_future(flight.run(_query("STD"), _slow))
+        await asyncio.sleep(0)
+        hurried = await flight.run(_query("STD"), _slow, deadline=time.monotonic() + 0.01)
+        return hurried, await patient
+
+    hurried, patient = run_async(_deadlines())
+    # The impatient caller gives up without cancelling the shared request
+    assert hurried == [] and len(patient) == 1
+
+
+def test_ids_service_routes_availability_through_single_flight(monkeypatch):
+    flight = AvailabilitySingleFlight(ttl_seconds=0)
+    monkeypatch.setattr(ids_module, "ids_availability_flight", flight)
+    sent = []
+
+    async def _query_availability(self, query, deadline=None):
+        sent.append(query.room_codes)
+        await asyncio.sleep(0.01)
+        return _answer(query)
+
+    monkeypatch.setattr(IDSService, "_query_availability", _query_availability)
+
+    async def _burst():
+        service = IDSService()
+        return await asyncio.gather(*(service.check_availability(_query("DLX")) for _ in range(5)))
+
+    assert [len(r) for r in run_async(_burst())] == [1] * 5
+    assert len(sent) == 1 and flight.stats()["coalesced"] == 4
+
+
+def test_shared_request_is_not_cut_short_by_the_first_callers_deadline(monkeypatch):
+    flight = AvailabilitySingleFlight(ttl_seconds=0)
+    monkeypatch.setattr(ids_module, "ids_availability_flight", flight)
+
+    async def _query_availability(self, query, deadline=None):
+        # Like _make_request: an exhausted budget is reported as an empty answer
+        await asyncio.sleep(0.05)
+        if deadline is not None and time.monotonic() > deadline:
+            return []
+        return _answer(query)
+
+    monkeypatch.setattr(IDSService, "_query_availability", _query_availability)
+
+    async def _callers():
+        service = IDSService()
+        hurried = asyncio.ensure_future(service.check_availability(_query("DLX"), deadline=time.monotonic() + 0.01))
+        await asyncio.sleep(0)
+        patient = await service.check_availability(_query("DLX"), deadline=time.monotonic() + 5)
+        return await hurried, patient
+
+    hurried, patient = run_async(_callers())
+    assert hurried == [] and len(patient) == 1
+    assert flight.stats()["coalesced"] == 1
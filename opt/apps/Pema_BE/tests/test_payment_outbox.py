@@ -0,0 +1,174 @@
+"""
+Payment outbox tests
+"""
+
+from datetime import date
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app.models import Booking, OutboxMessage, OutboxStatus, Payment
+from app.services import payment_outbox as outbox_module
+from app.services.payment_outbox import (
+    CONFIRMATION_EMAIL, IDS_BOOKING, PAYU_SETTLEMENT, PaymentOutbox, payu_webhook_latency,
+)
+from tests.conftest import TestSessionLocal, run_async
+
+
+async def _payment(reference):
+    async with TestSessionLocal() as session:
+        payment = Payment(
+            gateway="payu", amount=5000, net_amount=5000, payment_type="deposit",
+            reference_number=reference, payment_order_id=reference, txnid=reference,
+            booking_details={"check_in_date": "2026-12-01", "check_out_date": "2026-12-04", "room_category": "Executive"},
+        )
+        session.add(payment)
+        await session.commit()
+        return payment.id
+
+
+async def _payment_status(payment_id):
+    async with TestSessionLocal() as session:
+        return (await session.get(Payment, payment_id)).status
+
+
+async def _rows():
+    async with TestSessionLocal() as session:
+        result = await session.execute(
+            select(OutboxMessage.kind, OutboxMessage.aggregate_key, OutboxMessage.status, OutboxMessage.attempts)
+            .order_by(OutboxMessage.id)
+        )
+        return [tuple(row) for row in result.all()]
+
+
+def test_webhook_records_callback_and_settles_in_background(client: TestClient, monkeypatch):
+    called = []
+
+    async def _create(payment, db):
+        called.append(payment.id)
+
+    monkeypatch.setattr(outbox_module, "create_booking_from_payment", _create)
+    outbox = PaymentOutbox(session_factory=TestSessionLocal, workers=1)
+    payment_id = run_async(_payment("TXN-OUT-1"))
+    before = payu_webhook_latency.count
+
+    for _ in range(2):
+        response = client.post(
+            "/api/v1/payments/webhook",
+            data={"status": "success", "txnid": "TXN-OUT-1", "amount": "5000.00", "mihpayid": "m1"},
+            follow_redirects=False,
+        )
+        assert response.status_code in (200, 303)
+
+    # Only the callbacks are recorded; the payment is untouched until a worker settles it
+    assert called == [] and payu_webhook_latency.count == before + 2
+    assert run_async(_rows()) == [
+        (PAYU_SETTLEMENT, "txn:TXN-OUT-1", OutboxStatus.PENDING.value, 0),
+        (PAYU_SETTLEMENT, "txn:TXN-OUT-1", OutboxStatus.PENDING.value, 0),
+    ]
+    assert run_async(_payment_status(payment_id)) == "initiated"
+
+    async def _settle():
+        # Stop before the IDS booking row; only the settlement steps are under test here
+        for _ in range(2):
+            await outbox.process_next()
+
+    run_async(_settle())
+    key = f"payment:{payment_id}"
+    # The duplicate callback is a no-op, so the booking steps are staged exactly once
+    assert run_async(_rows())[2:] == [
+        (IDS_BOOKING, key, OutboxStatus.PENDING.value, 0),
+        (CONFIRMATION_EMAIL, key, OutboxStatus.PENDING.value, 0),
+    ]
+    assert run_async(_payment_status(payment_id)) == "success"
+
+
+def test_duplicate_callbacks_credit_an_existing_booking_once(client: TestClient, monkeypatch):
+    async def _email(db, payload):
+        pass
+
+    monkeypatch.setitem(outbox_module.HANDLERS, CONFIRMATION_EMAIL, _email)
+    outbox = PaymentOutbox(session_factory=TestSessionLocal, workers=1)
+
+    async def _flow():
+        payment_id = await _payment("TXN-OUT-4")
+        async with TestSessionLocal() as session:
+            booking = Booking(
+                room_id=1, check_in_date=date(2026, 12, 1), check_out_date=date(2026, 12, 4), nights=3,
+                guest_first_name="Asha", guest_email="asha@example.com", guest_phone="9999999999",
+                occupancy_details={"adults_total": 1},
+                total_amount=20000, deposit_amount=5000, paid_amount=0, balance_amount=20000,
+                confirmation_number="PW-OUT-4",
+            )
+            session.add(booking)
+            await session.flush()
+            payment = await session.get(Payment, payment_id)
+            payment.booking_id = booking.id
+            for status in ("success", "success", "failure"):
+                outbox.add(session, PAYU_SETTLEMENT, "txn:TXN-OUT-4", {"payment_id": payment_id, "status": status})
+            await session.commit()
+            booking_id = booking.id
+
+        while await outbox.process_next():
+            pass
+        async with TestSessionLocal() as session:
+            booking = await session.get(Booking, booking_id)
+            payment = await session.get(Payment, payment_id)
+            return booking.paid_amount, payment.status
+
+    assert run_async(_flow()) == (5000, "success")
+
+
+def test_workers_retry_and_keep_booking_steps_in_order(client: TestClient, monkeypatch):
+    outbox = PaymentOutbox(session_factory=TestSessionLocal, workers=1, max_attempts=3)
+    attempts = []
+    emailed = []
+
+    async def _create(payment, db):
+        attempts.append(payment.id)
+        if len(attempts) == 1:
+            raise RuntimeError("PMS timeout")
+        return None
+
+    async def _email(db, payload):
+        emailed.append(payload["payment_id"])
+
+    monkeypatch.setattr(outbox_module, "create_booking_from_payment", _create)
+    monkeypatch.setitem(outbox_module.HANDLERS, CONFIRMATION_EMAIL, _email)
+
+    async def _flow():
+        payment_id = await _payment("TXN-OUT-2")
+        other_id = await _payment("TXN-OUT-3")
+        async with TestSessionLocal() as session:
+            for pid in (payment_id, other_id):
+                outbox.add(session, IDS_BOOKING, f"payment:{pid}", {"payment_id": pid})
+                outbox.add(session, CONFIRMATION_EMAIL, f"payment:{pid}", {"payment_id": pid})
+            await session.commit()
+
+        # The first payment's IDS push fails; its email must wait, the other payment proceeds
+        while await outbox.process_next():
+            pass
+        blocked = list(emailed)
+
+        async with TestSessionLocal() as session:
+            await session.execute(
+                OutboxMessage.__table__.update()
+                .where(OutboxMessage.status == OutboxStatus.PENDING.value)
+                .values(available_at=OutboxMessage.created_at)
+            )
+            await session.commit()
+        while await outbox.process_next():
+            pass
+
+        async with TestSessionLocal() as session:
+            stats = await outbox.stats(session)
+        return payment_id, other_id, blocked, stats
+
+    payment_id, other_id, blocked, stats = run_async(_flow())
+
+    assert blocked == [other_id]
+    assert emailed == [other_id, payment_id]
+    assert attempts == [payment_id, other_id, payment_id]
+    assert [row[2] for row in run_async(_rows())] == [OutboxStatus.DONE.value] * 4
+    assert stats["queue"] == {} and stats["outbox_lag_seconds"] == 0.0
+    assert stats["delivered"] == 4 and stats["retried"] == 1
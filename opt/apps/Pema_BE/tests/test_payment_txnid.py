@@ -0,0 +1,64 @@
+"""
+Indexed PayU txnid lookup tests
+"""
+
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select, text
+
+from app.api.v1.payments import _payment_by_txnid
+from app.models import Payment
+from tests.conftest import TestSessionLocal, run_async
+
+
+def test_txnid_lookup_uses_the_unique_index(client: TestClient):
+    async def _flow():
+        async with TestSessionLocal() as session:
+            for n in range(3):
+                session.add(Payment(
+                    gateway="payu", amount=100, net_amount=100, payment_type="deposit",
+                    reference_number=f"PWTX{n}", payment_order_id=f"PWTX{n}", txnid=f"PWTX{n}",
+                ))
+            await session.commit()
+
+            found = await _payment_by_txnid(session, "PWTX1")
+            missing = await _payment_by_txnid(session, "PWTX9")
+            compiled = select(Payment.id).where(Payment.txnid == "PWTX1").compile(
+                compile_kwargs={"literal_binds": True}
+            )
+            plan = (await session.execute(text(f"EXPLAIN QUERY PLAN {compiled}"))).all()
+            return found.reference_number, missing, " ".join(str(row[-1]) for row in plan)
+
+    reference, missing, plan = run_async(_flow())
+    assert reference == "PWTX1" and missing is None
+    assert "ix_payments_txnid" in plan
+
+
+def test_webhook_for_unknown_txnid_is_not_found(client: TestClient):
+    response = client.post("/api/v1/payments/webhook", data={"status": "success", "txnid": "PW-UNKNOWN"})
+    assert response.status_code == 404
+
+
+def test_confirmation_page_resolves_the_booking_from_txnid(client: TestClient):
+    async def _payment(**fields):
+        async with TestSessionLocal() as session:
+            payment = Payment(gateway="payu", amount=100, net_amount=100, payment_type="deposit", **fields)
+            session.add(payment)
+            await session.commit()
+            return payment.id
+
+    async def _settle(payment_id, booking_id):
+        async with TestSessionLocal() as session:
+            payment = await session.get(Payment, payment_id)
+            payment.status, payment.booking_id = "success", booking_id
+            await session.commit()
+
+    payment_id = run_async(_payment(txnid="PWTX-SETTLE"))
+    pending = client.get("/api/v1/payments/txn/PWTX-SETTLE").json()
+    # The outbox worker settles the payment and links the booking it created
+    run_async(_settle(payment_id, 7))
+    settled = client.get("/api/v1/payments/txn/PWTX-SETTLE").json()
+
+    assert pending == {"txnid": "PWTX-SETTLE", "payment_id": payment_id, "status": "initiated", "booking_id": None, "settled": False}
+    assert settled["booking_id"] == 7 and settled["settled"] is True
+    assert client.get("/api/v1/payments/txn/PWTX-NONE").status_code == 404
@@ -72,3 +72,59 @@ def test_payu_hash_sample_latest_v1_v2():
     assert computed_v2 == expected_v2
 
 
+def _response_hash_kwargs(**overrides):
+    kwargs = dict(
+        salts=["salt-v1", "salt-v2"],
+        status="success",
+        txnid="PW2509140825550020",
+        key="OpJrSH",
+        fields={
+            "email": ["posted@example.com", "zuber@tdd.com"],
+            "firstname": ["Zuber", "Zuber"],
+            "productinfo": ["Booking PW2509140036", "Booking PW2509140036"],
+            "amount": ["500", "500.00"],
+            "udf1": ["https://example.com/booking/confirmation", ""],
+            "udf2": ["", ""],
+        },
+    )
+    kwargs.update(overrides)
+    return kwargs
+
+
+def test_response_hash_verifier_learns_the_matching_variant():
+    from app.api.v1.payments import _compute_payu_response_hash
+    from app.services.payu_hash import PayUResponseHashVerifier
+
+    # PayU signed the stored email with the second salt and no UDFs echoed back
+    posted = _compute_payu_response_hash(
+        salt="salt-v2", status="success", udf1="", udf2="", udf3="", udf4="", udf5="",
+        email="zuber@tdd.com", firstname="Zuber", productinfo="Booking PW2509140036",
+        amount="500.00", txnid="PW2509140825550020", key="OpJrSH",
+    )
+    verifier = PayUResponseHashVerifier()
+
+    first = verifier.verify([None, posted.upper()], **_response_hash_kwargs())
+    assert first.valid and first.matched_hash == posted
+    assert "salt=1" in first.variant and "email=1" in first.variant and "udf1=1" in first.variant
+    # Duplicated stored/posted values are hashed once, not once per source
+    assert first.tried < 2 * 2 * 2 * 2 * 3
+
+    second = verifier.verify([posted], **_response_hash_kwargs())
+    assert second.valid and second.tried == 1
+    assert verifier.stats()["top_variants"][0] == {"variant": first.variant, "matches": 2}
+
+
+def test_response_hash_verifier_covers_blank_layouts_and_charges():
+    import hashlib
+
+    from app.services.payu_hash import PayUResponseHashVerifier
+
+    seq = "12.50|salt-v1|failure" + "|" * 11 + "posted@example.com|Zuber|Booking PW2509140036|500.00|PW2509140825550020|OpJrSH"
+    posted = hashlib.sha512(seq.encode()).hexdigest()
+    verifier = PayUResponseHashVerifier()
+
+    result = verifier.verify([posted], **_response_hash_kwargs(status="failure", additional_charges="12.50"))
+    assert result.valid and "layout=blank11" in result.variant and "charges=True" in result.variant
+
+    miss = verifier.verify(["0" * 128], **_response_hash_kwargs())
+    assert not miss.valid and miss.tried == verifier.hashes_computed - result.tried and len(miss.sample) == 3
@@ -0,0 +1,80 @@
+"""
+Pricing band index resolution tests
+"""
+
+from datetime import date, datetime
+
+from app.models import PricingBand
+from app.services.pricing_index import PricingBandIndex
+
+
+def _band(id, program_id=None, room_id=None, min_nights=3, max_nights=None, priority=0, **kwargs):
+    return PricingBand(
+        id=id,
+        program_id=program_id,
+        room_id=room_id,
+        min_nights=min_nights,
+        max_nights=max_nights,
+        price_single=kwargs.pop("price_single", 1000),
+        price_double=kwargs.pop("price_double", 2000),
+        is_active=kwargs.pop("is_active", True),
+        priority=priority,
+        created_at=kwargs.pop("created_at", datetime(2025, 1, 1)),
+        **kwargs,
+    )
+
+
+def test_lookup_follows_specificity_cascade():
+    index = PricingBandIndex(refresh_seconds=0)
+    index.load_bands([
+        _band(1),
+        _band(2, room_id=10),
+        _band(3, program_id=5),
+        _band(4, program_id=5, room_id=10),
+    ])
+
+    assert index.lookup(5, 10, 4).id == 4
+    assert index.lookup(5, 11, 4).id == 3
+    assert index.lookup(None, 10, 4).id == 2
+    assert index.lookup(None, 11, 4).id == 1
+
+
+def test_lookup_respects_night_ranges_and_priority():
+    index = PricingBandIndex(refresh_seconds=0)
+    index.load_bands([
+        _band(1, room_id=10, min_nights=3, max_nights=7),
+        _band(2, room_id=10, min_nights=8),
+        _band(3, room_id=10, min_nights=3, max_nights=7, priority=5),
+        _band(4, room_id=10, min_nights=1, is_active=False),
+    ])
+
+    assert index.lookup(None, 10, 2) is None
+    assert index.lookup(None, 10, 5).id == 3
+    assert index.lookup(None, 10, 8).id == 2
+
+
+def test_lookup_filters_on_season_validity():
+    index = PricingBandIndex(refresh_seconds=0)
+    index.load_bands([
+        _band(1, room_id=10),
+        _band(2, room_id=10, priority=1, season_name="peak",
+              valid_from=datetime(2025, 12, 20), valid_until=datetime(2026, 1, 5)),
+    ])
+
+    assert index.lookup(None, 10, 4, date(2025, 12, 24)).id == 2
+    assert index.lookup(None, 10, 4, date(2026, 2, 1)).id == 1
+
+
+def test_invalidate_bumps_version_on_next_load():
+    index = PricingBandIndex(refresh_seconds=0)
+    index.load_bands([_band(1)])
+    version = index.version
+
+    index.invalidate()
+    assert index.stats()["stale"] is True
+
+    index.load_bands([_band(1), _band(2, room_id=10)])
+    stats = index.stats()
+    assert stats["version"] == version + 1
+    assert stats["reloads"] == 2
+    assert stats["bands"] == 2
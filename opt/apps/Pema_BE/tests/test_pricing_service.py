@@ -0,0 +1,49 @@
+"""
+PricingService batch pricing tests
+"""
+
+
+from fastapi.testclient import TestClient
+
+from app.services.pricing import PricingService
+from tests.conftest import TestSessionLocal, run_async
+
+
+class TestCalculatePricesBatch:
+    def test_batch_matches_individual_calls(self, client: TestClient, test_room):
+        async def _price():
+            async with TestSessionLocal() as session:
+                service = PricingService(session)
+                batch = await service.calculate_prices_batch(
+                    room_id=test_room.id,
+                    nights=3,
+                    scenarios=[
+                        {"adults": 2},
+                        {"adults": 1},
+                        {"adults": 2, "caregiver_required": True, "caregiver_stay_with_guest": True},
+                    ],
+                )
+                single = await service.calculate_price(None, test_room.id, 3, adults=1)
+                return batch, single
+
+        batch, single = run_async(_price())
+
+        assert [r["base_price"] for r in batch] == [107000 * 3, 64000 * 3, 107000 * 3]
+        assert batch[1] == single
+        assert batch[2]["caregiver_price"] == 8000 * 3
+
+    def test_batch_uses_preloaded_room(self, client: TestClient, test_room):
+        async def _price():
+            async with TestSessionLocal() as session:
+                service = PricingService(session)
+
+                async def _no_room_query(room_id):
+                    raise AssertionError("room should not be re-fetched")
+
+                service._get_room = _no_room_query
+                return await service.calculate_prices_batch(
+                    room_id=test_room.id, nights=4, scenarios=[{"adults": 1}], room=test_room
+                )
+
+        result = run_async(_price())
+        assert result[0]["base_price"] == 64000 * 4
@@ -0,0 +1,95 @@
+"""
+Nightly rate calendar tests
+"""
+
+from datetime import date, datetime
+
+from app.models import PricingBand, Room
+from app.services.pricing_index import PricingBandIndex
+from app.services.rate_calendar import RateCalendar
+
+TODAY = date(2025, 12, 1)
+
+
+def _band(id, room_id=10, min_nights=1, max_nights=None, priority=0, **kwargs):
+    return PricingBand(
+        id=id,
+        program_id=None,
+        room_id=room_id,
+        min_nights=min_nights,
+        max_nights=max_nights,
+        pricing_type=kwargs.pop("pricing_type", "per_night"),
+        price_single=kwargs.pop("price_single", 1000),
+        price_double=kwargs.pop("price_double", 2000),
+        price_extra_adult=kwargs.pop("price_extra_adult", 0),
+        price_child=kwargs.pop("price_child", 0),
+        discount_percentage=kwargs.pop("discount_percentage", 0),
+        is_active=True,
+        priority=priority,
+        created_at=datetime(2025, 1, 1),
+        **kwargs,
+    )
+
+
+def _room():
+    return Room(
+        id=10,
+        price_per_night_single=500,
+        price_per_night_double=800,
+        price_per_night_extra_adult=0,
+        price_per_night_child=0,
+    )
+
+
+def _peak(**kwargs):
+    return _band(2, priority=1, season_name="peak", price_double=3000,
+                 valid_from=datetime(2025, 12, 20), valid_until=datetime(2025, 12, 31), **kwargs)
+
+
+def _calendar(bands):
+    index = PricingBandIndex(refresh_seconds=0)
+    index.load_bands(bands)
+    return index, RateCalendar(index=index, horizon_days=90)
+
+
+def test_stay_crossing_into_peak_is_priced_per_night():
+    index, calendar = _calendar([_band(1), _peak()])
+
+    rates = calendar.stay_rates(None, 10, date(2025, 12, 17), 5, today=TODAY)
+
+    # 3 off-peak nights (17-19) + 2 peak nights (20-21)
+    assert rates.base_price(_room(), 2) == 3 * 2000 + 2 * 3000
+    assert rates.band_ids == [1, 2]
+    assert rates.price_source == "calendar"
+
+
+def test_single_band_stay_matches_band_price_with_discount():
+    band = _band(1, price_double=1999, price_child=333, discount_percentage=7)
+    index, calendar = _calendar([band])
+
+    rates = calendar.stay_rates(None, 10, date(2025, 12, 2), 4, today=TODAY)
+
+    assert rates.base_price(_room(), 2, 1) == band.calculate_price(4, 2, 1)
+    assert rates.price_source == "band"
+
+
+def test_nights_without_band_use_room_rates_and_packages_fall_back():
+    index, calendar = _calendar([_peak(), _band(3, min_nights=10, pricing_type="per_package")])
+
+    rates = calendar.stay_rates(None, 10, date(2025, 12, 18), 3, today=TODAY)
+    assert rates.base_price(_room(), 2) == 2 * 800 + 3000
+    assert calendar.stay_rates(None, 10, date(2025, 12, 10), 12, today=TODAY) is None
+    assert calendar.stay_rates(None, 10, date(2026, 2, 25), 5, today=TODAY) is None
+
+
+def test_band_change_rebuilds_only_its_season():
+    index, calendar = _calendar([_band(1), _peak()])
+    calendar.stay_rates(None, 10, date(2025, 12, 17), 5, today=TODAY)
+    resolved = calendar.nights_resolved
+
+    index.load_bands([_band(1), _peak(price_single=1500)])
+    rates = calendar.stay_rates(None, 10, date(2025, 12, 17), 5, today=TODAY)
+
+    assert calendar.refreshes == 1
+    assert calendar.nights_resolved - resolved == 12
+    assert rates.base_price(_room(), 1) == 3 * 1000 + 2 * 1500
@@ -0,0 +1,58 @@
+"""
+Room/rate code registry tests
+"""
+
+from app.services.ids import IDSService
+from app.services.room_codes import PMS_ROOM_CODES, RoomCodeRegistry, room_codes
+
+
+def test_every_outbound_code_resolves_back_to_a_category():
+    registry = RoomCodeRegistry()
+
+    for category, code in PMS_ROOM_CODES.items():
+        assert registry.pms_code_for_category(category) == code
+        # Inbound and outbound tables agree: every code we send maps back to its own category
+        assert registry.category_for_ids_code(code) == category
+    # Explicit inbound aliases cover codes we never send
+    assert registry.category_for_ids_code("SUI") == "Executive Junior Suite"
+    assert registry.storage_code_for_category(registry.category_for_ids_code("SUI")) == "SUI"
+    # Inventory keeps its own, narrower alias table: DLX counts never land on PGT rows
+    assert registry.storage_code_for_inventory("SUI") == "SUI"
+    assert registry.storage_code_for_inventory("STT") == "STD"
+    assert registry.storage_code_for_inventory("DLX") is None
+    assert registry.storage_code_for_inventory("PES") is None
+    assert registry.category_for_ids_code("DLX") == "Premium Garden"
+    assert registry.storage_code_for_category(registry.category_for_ids_code("STT")) == "STD"
+    assert registry.pms_code_for_category("Unknown") == "Unknown"
+    assert registry.pms_code_for_category("Unknown", "UNK") == "UNK"
+    assert registry.catalogue_code_for_category("Executive Suite") == "EXS"
+    assert registry.catalogue_code_for_category("Lake House") == "LAK"
+
+
+def test_reload_rereads_the_environment_and_mapping_is_idempotent(monkeypatch):
+    registry = RoomCodeRegistry()
+    assert registry.to_ids_room_code("S01") == "S01"
+
+    monkeypatch.setenv("IDS_ROOM_CODE_MAPPING", '{"S01": "STT", "S02": "STT"}')
+    monkeypatch.setenv("IDS_RATE_PLAN_MAPPING", '{"Standard": "BAR"}')
+    monkeypatch.setenv("IDS_CATEGORY_ROOM_CODES", '{"Standard": "STQ"}')
+    registry.reload()
+
+    assert registry.version == 2
+    assert registry.to_ids_room_code("S02") == "STT"
+    # Already-mapped codes pass through, so mapping twice is harmless
+    assert registry.to_ids_room_code("STT") == "STT"
+    assert registry.to_ids_rate_plan("Standard") == "BAR" and registry.to_ids_rate_plan("BAR") == "BAR"
+    assert registry.pms_code_for_category("Standard") == "STQ"
+
+
+def test_ids_service_uses_the_shared_registry(monkeypatch):
+    monkeypatch.setenv("IDS_ROOM_CODE_MAPPING", '{"S01": "STT"}')
+    room_codes.reload()
+    try:
+        service = IDSService()
+        assert service._map_room_code("S01") == "STT"
+        assert service.room_code_mapping == {"S01": "STT"}
+    finally:
+        monkeypatch.undo()
+        room_codes.reload()
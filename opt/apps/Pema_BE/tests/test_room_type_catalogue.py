@@ -0,0 +1,120 @@
+"""
+In-memory room type catalogue tests
+"""
+
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.models.room import Room
+from app.services import ids as ids_module
+from app.services.room_type_catalogue import RoomTypeCatalogue, room_type_catalogues
+from tests.conftest import TestSessionLocal, run_async
+
+
+class _Loader:
+    def __init__(self):
+        self.calls = 0
+        self.fail = False
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(0)
+        if self.fail:
+            return {"success": False, "error": "PMS down", "room_types": [], "rate_plans": [], "inclusions": []}
+        return {"success": True, "room_types": [{"inv_type_code": f"V{self.calls}"}], "rate_plans": [], "inclusions": []}
+
+
+def _catalogue(loader, **kwargs):
+    catalogue = RoomTypeCatalogue("test", loader, **kwargs)
+    room_type_catalogues.remove(catalogue)
+    return catalogue
+
+
+def test_reads_are_served_from_memory_and_loads_coalesce():
+    loader = _Loader()
+    catalogue = _catalogue(loader)
+
+    async def _reads():
+        first = await asyncio.gather(*(catalogue.get() for _ in range(5)))
+        return first, await catalogue.get()
+
+    first, again = run_async(_reads())
+    assert loader.calls == 1
+    assert all(result is first[0] for result in first) and again is first[0]
+    assert catalogue.stats()["hits"] == 1
+
+
+def test_invalidation_refreshes_in_background_and_serves_stale_on_error(monkeypatch):
+    monkeypatch.setattr(settings, "ROOM_TYPE_CATALOGUE_RETRY_SECONDS", 60)
+    loader = _Loader()
+    catalogue = _catalogue(loader)
+
+    async def _flow():
+        await catalogue.get()
+        catalogue.invalidate()
+        stale = await catalogue.get()
+        await asyncio.sleep(0.01)
+        fresh = await catalogue.get()
+
+        loader.fail = True
+        catalogue.invalidate()
+        await asyncio.sleep(0.01)
+        kept = await catalogue.get()
+        await asyncio.sleep(0.01)
+        return stale, fresh, kept
+
+    stale, fresh, kept = run_async(_flow())
+    assert stale["room_types"] == [{"inv_type_code": "V1"}]
+    assert fresh["room_types"] == [{"inv_type_code": "V2"}]
+    # The failed refresh keeps the last good copy and backs off instead of retrying per read
+    assert kept is fresh and loader.calls == 3
+    stats = catalogue.stats()
+    assert stats["stale"] and stats["errors"] == 1 and stats["stale_served"] == 1
+    assert stats["last_error"] == "PMS down"
+
+
+def test_first_load_failure_is_not_cached_past_backoff(monkeypatch):
+    monkeypatch.setattr(settings, "ROOM_TYPE_CATALOGUE_RETRY_SECONDS", 0)
+    loader = _Loader()
+    loader.fail = True
+    catalogue = _catalogue(loader)
+
+    assert run_async(catalogue.get())["success"] is False
+    loader.fail = False
+    assert run_async(catalogue.get())["success"] is True and loader.calls == 2
+
+
+def test_room_commits_invalidate_rooms_catalogue(client: TestClient):
+    rooms_catalogue = _catalogue(_Loader(), from_rooms=True)
+    pms_catalogue = _catalogue(_Loader())
+    room_type_catalogues.extend([rooms_catalogue, pms_catalogue])
+    try:
+        async def _flow():
+            await rooms_catalogue.get()
+            await pms_catalogue.get()
+            async with TestSessionLocal() as session:
+                session.add(Room(
+                    name="Catalogue Room", category="Executive", pricing_category="Executive",
+                    occupancy_max_adults=2, occupancy_max_children=0, occupancy_max_total=2,
+                    price_per_night_single=1000, price_per_night_double=1500, inventory_count=1,
+                ))
+                await session.commit()
+            await asyncio.sleep(0.01)
+
+        run_async(_flow())
+        assert rooms_catalogue.refreshes == 2 and pms_catalogue.refreshes == 1
+    finally:
+        room_type_catalogues.remove(rooms_catalogue)
+        room_type_catalogues.remove(pms_catalogue)
+
+
+def test_room_types_endpoint_reads_the_catalogue(client: TestClient, monkeypatch):
+    loader = _Loader()
+    monkeypatch.setattr(ids_module, "ids_room_type_catalogue", _catalogue(loader))
+
+    for _ in range(3):
+        response = client.get("/api/v1/ids/room-types")
+        assert response.json()["room_types"] == [{"inv_type_code": "V1"}]
+    assert loader.calls == 1
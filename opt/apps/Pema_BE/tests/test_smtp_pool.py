@@ -0,0 +1,136 @@
+"""
+Pooled SMTP transport tests
+"""
+
+import asyncio
+import smtplib
+import time
+from email.mime.text import MIMEText
+
+import pytest
+
+from app.core.smtp_pool import PooledSMTPTransport
+
+from tests.conftest import run_async
+
+
+def _message(to="guest@example.com"):
+    msg = MIMEText("hello")
+    msg["To"] = to
+    return msg
+
+
+class FakeSMTP:
+    """Records the calls smtplib.SMTP would make; can drop or stall on send"""
+
+    instances = []
+
+    def __init__(self, host, port, timeout=None):
+        self.logins = 0
+        self.sent = []
+        self.drop_next = False
+        self.delay = 0.0
+        self.closed = False
+        FakeSMTP.instances.append(self)
+
+    def starttls(self):
+        pass
+
+    def login(self, username, password):
+        self.logins += 1
+
+    def send_message(self, msg, to_addrs=None):
+        if self.drop_next:
+            self.drop_next = False
+            raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+        time.sleep(self.delay)
+        self.sent.append(list(to_addrs))
+
+    def quit(self):
+        self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def _reset_fake():
+    FakeSMTP.instances = []
+
+
+def test_sessions_are_reused_and_dropped_sessions_reconnect_once():
+    transport = PooledSMTPTransport("smtp.test", 587, size=1, timeout=5, idle_seconds=60, smtp_factory=FakeSMTP)
+
+    async def _flow():
+        for _ in range(3):
+            await transport.send(_message(), ["guest@example.com"], "user", "pw")
+        FakeSMTP.instances[0].drop_next = True
+        await transport.send(_message(), ["guest@example.com", "cc@example.com"], "user", "pw")
+
+    run_async(_flow())
+    first, second = FakeSMTP.instances
+    assert first.logins == 1 and len(first.sent) == 3 and first.closed
+    assert second.sent == [["guest@example.com", "cc@example.com"]]
+    stats = transport.stats()
+    assert stats["sent"] == 4 and stats["connections_opened"] == 2 and stats["reconnects"] == 1
+    assert stats["idle_sessions"] == 1 and stats["send_latency"]["count"] == 4
+
+
+def test_idle_sessions_expire_and_credential_changes_reconnect():
+    transport = PooledSMTPTransport("smtp.test", 587, size=2, timeout=5, idle_seconds=60, smtp_factory=FakeSMTP)
+
+    run_async(transport.send(_message(), ["a@example.com"], "user", "pw"))
+    run_async(transport.send(_message(), ["b@example.com"], "other", "pw"))
+    transport.idle_seconds = 0
+    run_async(transport.send(_message(), ["c@example.com"], "other", "pw"))
+
+    assert len(FakeSMTP.instances) == 3
+    assert FakeSMTP.instances[0].closed and FakeSMTP.instances[1].closed
+    assert transport.stats()["reconnects"] == 2
+
+
+def test_send_runs_off_the_event_loop_and_times_out():
+    transport = PooledSMTPTransport("smtp.test", 587, size=1, timeout=0.2, idle_seconds=60, smtp_factory=FakeSMTP)
+    run_async(transport.send(_message(), ["guest@example.com"], "user", "pw"))
+    FakeSMTP.instances[0].delay = 0.5
+
+    async def _flow():
+        ticks = 0
+
+        async def _ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.ensure_future(_ticker())
+        try:
+            with pytest.raises(asyncio.TimeoutError):
+                await transport.send(_message(), ["guest@example.com"], "user", "pw")
+        finally:
+            ticker.cancel()
+        return ticks
+
+    # The loop kept running while the SMTP send was stuck in its worker thread
+    assert run_async(_flow()) >= 5
+    stats = transport.stats()
+    assert stats["timeouts"] == 1 and stats["failed"] == 1 and stats["sent"] == 1
+
+
+def test_abandoned_sends_are_not_delivered_late():
+    transport = PooledSMTPTransport("smtp.test", 587, size=1, timeout=0.2, idle_seconds=60, smtp_factory=FakeSMTP)
+    run_async(transport.send(_message(), ["warm@example.com"], "user", "pw"))
+    FakeSMTP.instances[0].delay = 0.3
+
+    async def _flow():
+        results = await asyncio.gather(
+            transport.send(_message(), ["stuck@example.com"], "user", "pw"),
+            transport.send(_message(), ["queued@example.com"], "user", "pw"),
+            return_exceptions=True,
+        )
+        # Let the stuck send finish and free the slot for the queued thread
+        await asyncio.sleep(0.4)
+        return results
+
+    results = run_async(_flow())
+    assert all(isinstance(result, asyncio.TimeoutError) for result in results)
+    # The in-flight send completes; the one still waiting for a slot is dropped
+    assert FakeSMTP.instances[0].sent == [["warm@example.com"], ["stuck@example.com"]]
+    assert transport.stats()["timeouts"] == 2 and transport.stats()["in_use"] == 0